@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS, CIRCUIT_MAX_OPEN_SECONDS
+
+logger = logging.getLogger('goodgains_bot')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Endpoint families, matched against the request path
+ENDPOINT_FAMILIES = ('GetMatchDetails', 'GetMatchHistory', 'GetLiveLeagueGames', 'ISteamUser')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while its endpoint's breaker is open."""
+
+    def __init__(self, family):
+        super().__init__(f"Circuit open for {family}")
+        self.family = family
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one endpoint family.
+
+    After failure_threshold consecutive failures the breaker opens and callers fail fast. A
+    background probe waits out the open period, moves to half-open and runs check_api_health;
+    success closes the breaker, failure reopens it with the open period doubled (up to
+    max_open_seconds).
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, open_seconds=CIRCUIT_OPEN_SECONDS,
+                 max_open_seconds=CIRCUIT_MAX_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.open_for = open_seconds
+        self.opened_at = 0
+        self.rejected = 0
+        self._probe = None
+
+    def allow(self):
+        """Return True if a request may be sent now."""
+        if self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self):
+        if self.state != CLOSED:
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logger.warning(f"Circuit for {self.name} opened after {self.failures} failures, "
+                       f"probing again in {self.open_for}s")
+        if self._probe is None or self._probe.done():
+            self._probe = asyncio.create_task(self._probe_until_closed())
+
+    def _close(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.open_for = self.open_seconds
+        logger.info(f"Circuit for {self.name} closed")
+
+    async def _probe_until_closed(self):
+        from api.steam import check_api_health
+
+        while self.state != CLOSED:
+            await asyncio.sleep(self.open_for)
+            self.state = HALF_OPEN
+            if await check_api_health():
+                self._close()
+            else:
+                self.open_for = min(self.open_for * 2, self.max_open_seconds)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit for {self.name} still failing, probing again in {self.open_for}s")
+
+
+breakers = {family: CircuitBreaker(family) for family in ENDPOINT_FAMILIES}
+
+
+def breaker_for_path(path):
+    """Return the breaker guarding a Steam API path, or None if it isn't in a guarded family."""
+    for family, breaker in breakers.items():
+        if f"/{family}/" in path:
+            return breaker
+    return None
+
+
+def is_open(family):
+    """True while the family's breaker is rejecting requests (open or half-open)."""
+    return breakers[family].state != CLOSED
+
+
+def breaker_stats():
+    """Return {family: {state, failures, rejected, open_for}}."""
+    return {
+        family: {
+            'state': breaker.state,
+            'failures': breaker.failures,
+            'rejected': breaker.rejected,
+            'open_for': breaker.open_for,
+        }
+        for family, breaker in breakers.items()
+    }
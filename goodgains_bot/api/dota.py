@@ -1,54 +1,186 @@
-import requests
-import logging
 import asyncio
-from config import STEAM_API_KEY
-from api.rate_limiter import ApiRateLimiter
+import logging
+import time
+from config import MATCH_DETAILS_TTL_IN_PROGRESS, MATCH_DETAILS_TTL_COMPLETED
+from api.http import steam_get_json, steam_get_decoded, HttpStatusError, json_loads
+from api.rate_limiter import rate_limiter
+from api.scheduler import PRIORITY_CRITICAL, PRIORITY_DISCOVERY
+from api.circuit_breaker import CircuitOpenError, is_open
+from database.async_db import db
+from database.write_queue import write_queue
+from database.match_cache import load_completed_match, store_completed_match
+from utils.timestamps import now_ms
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it league games are decoded in full and then projected
+    ijson = None
 
 logger = logging.getLogger('goodgains_bot')
-rate_limiter = ApiRateLimiter()
 
+# Single-flight state for get_match_details: match_id -> Task, and match_id -> (expires_at, result)
+_match_details_inflight = {}
+_match_details_cache = {}
+match_details_stats = {'requests': 0, 'cache_hits': 0, 'stale_hits': 0, 'coalesced': 0, 'disk_hits': 0, 'fetches': 0}
+
+
+async def get_match_details(match_id, priority=PRIORITY_CRITICAL):
+    """Get details for a specific Dota 2 match.
+
+    Concurrent callers for the same match share one in-flight request, and results are
+    cached briefly: MATCH_DETAILS_TTL_IN_PROGRESS for live matches and
+    MATCH_DETAILS_TTL_COMPLETED once a winner is known. Failures are not cached.
+    Completed matches are also kept on disk and never fetched again. A shared request
+    keeps the priority of the caller that started it. While the GetMatchDetails circuit is
+    open, expired cache entries are served rather than failing.
+    """
+    match_id = str(match_id)
+    match_details_stats['requests'] += 1
+
+    cached = _match_details_cache.get(match_id)
+    if cached:
+        if cached[0] > time.monotonic():
+            match_details_stats['cache_hits'] += 1
+            return cached[1]
+        if is_open('GetMatchDetails'):
+            match_details_stats['stale_hits'] += 1
+            return cached[1]
+        del _match_details_cache[match_id]
+
+    task = _match_details_inflight.get(match_id)
+    if task is not None:
+        match_details_stats['coalesced'] += 1
+    else:
+        task = asyncio.create_task(_load_or_fetch_match_details(match_id, priority))
+        _match_details_inflight[match_id] = task
+        task.add_done_callback(lambda _t: _match_details_inflight.pop(match_id, None))
+
+    # Shield the shared request so one caller timing out doesn't cancel it for the others
+    result = await asyncio.shield(task)
+
+    if result and match_id not in _match_details_cache:
+        ttl = MATCH_DETAILS_TTL_COMPLETED if result.get('status') == 'completed' else MATCH_DETAILS_TTL_IN_PROGRESS
+        _match_details_cache[match_id] = (time.monotonic() + ttl, result)
+    return result
+
+
+def prune_match_details_cache():
+    """Drop expired cached match details; returns how many were removed."""
+    # Expired entries are still served during an outage, so keep them until it's over
+    if is_open('GetMatchDetails'):
+        return 0
+
+    now = time.monotonic()
+    expired = [match_id for match_id, (expires_at, _) in _match_details_cache.items() if expires_at <= now]
+    for match_id in expired:
+        del _match_details_cache[match_id]
+    return len(expired)
+
+
+def get_match_details_stats():
+    """Return the coalescing counters plus the share of requests that avoided an API call."""
+    stats = dict(match_details_stats)
+    stats['cached'] = len(_match_details_cache)
+    stats['dedup_ratio'] = 1 - stats['fetches'] / stats['requests'] if stats['requests'] else 0.0
+    return stats
+
+
+async def get_cached_match_details(match_id):
+    """Like get_match_details, but only from the in-memory and on-disk caches; never calls the API."""
+    match_id = str(match_id)
+    cached = _match_details_cache.get(match_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    try:
+        return await db.run(load_completed_match, match_id, readonly=True)
+    except Exception as e:
+        logger.error(f"Error reading cached details for match {match_id}: {e}")
+        return None
+
+
+async def remember_completed_match(match_data):
+    """Cache a finished match's data (e.g. from the sequence feed) as its get_match_details result."""
+    match_id = str(match_data['match_id'])
+    result = {
+        "status": "completed",
+        "winner": "team1" if match_data["radiant_win"] else "team2",
+        "data": match_data
+    }
+    _match_details_cache[match_id] = (time.monotonic() + MATCH_DETAILS_TTL_COMPLETED, result)
+    try:
+        await db.run(store_completed_match, match_id, result)
+    except Exception as e:
+        logger.error(f"Error caching details for match {match_id}: {e}")
+    return result
+
+
+async def _load_or_fetch_match_details(match_id, priority):
+    """Serve a completed match from the on-disk cache, otherwise fetch it and persist it once completed."""
+    try:
+        cached = await db.run(load_completed_match, match_id, readonly=True)
+    except Exception as e:
+        logger.error(f"Error reading cached details for match {match_id}: {e}")
+        cached = None
+
+    if cached:
+        match_details_stats['disk_hits'] += 1
+        write_queue.enqueue(
+            'UPDATE match_details_cache SET last_used_at = ? WHERE match_id = ?',
+            (now_ms(), match_id)
+        )
+        return cached
+
+    match_details_stats['fetches'] += 1
+    result = await _fetch_match_details(match_id, priority)
+
+    if result and result.get('status') == 'completed':
+        try:
+            await db.run(store_completed_match, match_id, result)
+        except Exception as e:
+            logger.error(f"Error caching details for match {match_id}: {e}")
+    return result
 
-async def get_match_details(match_id):
-    """Get details for a specific Dota 2 match."""
+
+async def _fetch_match_details(match_id, priority):
+    """Fetch match details from the Steam API (no coalescing)."""
     # Check if we should skip this API call due to previous failures
     if not rate_limiter.should_retry(f"match_details_{match_id}"):
         logger.info(f"Skipping API call for match {match_id} due to recent failures")
         return None
 
-    url = f"https://api.steampowered.com/IDOTA2Match_570/GetMatchDetails/v1/?key={STEAM_API_KEY}&match_id={match_id}"
     try:
-        async with asyncio.timeout(10):
-            response = await asyncio.to_thread(requests.get, url)
-
-            if response.status_code == 500:
-                # 500 status typically means match is in progress
-                backoff = rate_limiter.record_failure(f"match_details_{match_id}")
-                logger.warning(f"API returned 500 for match {match_id}, backing off for {backoff} seconds")
-                return {"status": "in_progress"}
-
-            response.raise_for_status()
-            data = response.json()
-
-            # Record success to reset backoff
-            rate_limiter.record_success(f"match_details_{match_id}")
-
-            if "result" in data:
-                # If radiant_win is present, match is complete
-                if "radiant_win" in data["result"]:
-                    winner = "team1" if data["result"]["radiant_win"] else "team2"
-                    return {
-                        "status": "completed",
-                        "winner": winner,
-                        "data": data["result"]
-                    }
-                else:
-                    # Match data exists but no winner yet
-                    return {"status": "in_progress", "data": data["result"]}
+        data = await steam_get_json('/IDOTA2Match_570/GetMatchDetails/v1/', {'match_id': match_id}, timeout=10,
+                                    priority=priority)
+
+        # Record success to reset backoff
+        rate_limiter.record_success(f"match_details_{match_id}")
+
+        if "result" in data:
+            # If radiant_win is present, match is complete
+            if "radiant_win" in data["result"]:
+                winner = "team1" if data["result"]["radiant_win"] else "team2"
+                return {
+                    "status": "completed",
+                    "winner": winner,
+                    "data": data["result"]
+                }
             else:
-                logger.warning(f"Match {match_id} data incomplete")
-                return None
+                # Match data exists but no winner yet
+                return {"status": "in_progress", "data": data["result"]}
+        else:
+            logger.warning(f"Match {match_id} data incomplete")
+            return None
+
+    except CircuitOpenError:
+        return None
+    except HttpStatusError as e:
+        if e.status == 500:
+            # 500 status typically means match is in progress
+            backoff = rate_limiter.record_failure(f"match_details_{match_id}")
+            logger.warning(f"API returned 500 for match {match_id}, backing off for {backoff} seconds")
+            return {"status": "in_progress"}
 
-    except requests.HTTPError as e:
         backoff = rate_limiter.record_failure(f"match_details_{match_id}")
         logger.error(f"HTTP error fetching match {match_id}: {e}, backing off for {backoff} seconds")
         return None
@@ -57,48 +189,161 @@ async def get_match_details(match_id):
         return None
 
 
-async def get_match_history(account_id, matches_requested=5):
-    """Get recent match history for a player."""
+async def get_match_history(account_id, matches_requested=5, date_min=None, start_at_match_id=None):
+    """Get recent match history for a player, newest first.
+
+    date_min (epoch seconds) drops matches that started earlier; start_at_match_id pages
+    back from that match to older ones.
+    """
     if not rate_limiter.should_retry(f"match_history_{account_id}"):
         logger.info(f"Skipping match history API call for account {account_id} due to rate limiting")
         return None
 
-    url = f"https://api.steampowered.com/IDOTA2Match_570/GetMatchHistory/v1/?key={STEAM_API_KEY}&account_id={account_id}&matches_requested={matches_requested}"
+    params = {'account_id': account_id, 'matches_requested': matches_requested}
+    if date_min is not None:
+        params['date_min'] = date_min
+    if start_at_match_id is not None:
+        params['start_at_match_id'] = start_at_match_id
+
     try:
-        response = await asyncio.to_thread(requests.get, url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = await steam_get_json(
+            '/IDOTA2Match_570/GetMatchHistory/v1/',
+            params,
+            timeout=10,
+            priority=PRIORITY_DISCOVERY
+        )
 
         rate_limiter.record_success(f"match_history_{account_id}")
 
         if "result" in data and data["result"].get("status") == 1:
             return data["result"].get("matches", [])
         return []
+    except CircuitOpenError:
+        return None
     except Exception as e:
         backoff = rate_limiter.record_failure(f"match_history_{account_id}")
         logger.error(f"Error fetching match history for {account_id}: {e}, backing off for {backoff}s")
         return None
 
 
+class _LeagueGamesProjection:
+    """Collects only match_id and each player's account_id/team from GetLiveLeagueGames parse events.
+
+    The full document carries scoreboards, picks and bans for every game and runs to several
+    megabytes; none of that is needed for detection.
+    """
+
+    def __init__(self):
+        self.games = []
+        self._game = None
+        self._player = None
+
+    def feed(self, prefix, event, value):
+        if prefix == 'result.games.item':
+            if event == 'start_map':
+                self._game = {'players': []}
+            elif event == 'end_map':
+                if 'match_id' in self._game:
+                    self.games.append(self._game)
+                self._game = None
+        elif prefix == 'result.games.item.match_id':
+            self._game['match_id'] = value
+        elif prefix == 'result.games.item.players.item':
+            if event == 'start_map':
+                self._player = {}
+            elif event == 'end_map':
+                self._game['players'].append(self._player)
+                self._player = None
+        elif prefix == 'result.games.item.players.item.account_id':
+            self._player['account_id'] = value
+        elif prefix == 'result.games.item.players.item.team':
+            self._player['team'] = value
+
+
+def project_league_games(data):
+    """Reduce an already-decoded GetLiveLeagueGames document to the same projection."""
+    return [
+        {
+            'match_id': game['match_id'],
+            'players': [
+                {key: player[key] for key in ('account_id', 'team') if key in player}
+                for player in game.get('players', [])
+            ]
+        }
+        for game in data.get('result', {}).get('games', [])
+        if 'match_id' in game
+    ]
+
+
+async def _decode_league_games(response):
+    """Stream the response through ijson when available, keeping only the projected fields."""
+    if ijson is None:
+        return project_league_games(json_loads(await response.read()))
+
+    projection = _LeagueGamesProjection()
+    async for prefix, event, value in ijson.parse_async(response.content):
+        projection.feed(prefix, event, value)
+    return projection.games
+
+
 async def get_live_league_games():
-    """Get currently active league games."""
+    """Get currently active league games, projected to match_id and players' account_id/team."""
     if not rate_limiter.should_retry("live_league_games"):
         return None
 
-    url = f"https://api.steampowered.com/IDOTA2Match_570/GetLiveLeagueGames/v1/?key={STEAM_API_KEY}"
     try:
-        response = await asyncio.to_thread(requests.get, url, timeout=8)
-        response.raise_for_status()
-        data = response.json()
+        games = await steam_get_decoded('/IDOTA2Match_570/GetLiveLeagueGames/v1/', _decode_league_games,
+                                        timeout=8, priority=PRIORITY_DISCOVERY)
 
         rate_limiter.record_success("live_league_games")
-
-        if "result" in data and "games" in data["result"]:
-            return data["result"]["games"]
-        return []
+        return games
+    except CircuitOpenError:
+        return None
     except Exception as e:
         backoff = rate_limiter.record_failure("live_league_games")
         logger.error(f"Error fetching live league games: {e}, backing off for {backoff}s")
         return None
 
-# Add other Dota 2 API functions as needed
\ No newline at end of file
+
+async def get_match_history_by_seq_num(start_at_match_seq_num, matches_requested=100):
+    """Get finished matches in the order they were recorded, starting at a sequence number."""
+    if not rate_limiter.should_retry("match_sequence"):
+        return None
+
+    try:
+        data = await steam_get_json(
+            '/IDOTA2Match_570/GetMatchHistoryBySequenceNum/v1/',
+            {'start_at_match_seq_num': start_at_match_seq_num, 'matches_requested': matches_requested},
+            timeout=10,
+            priority=PRIORITY_CRITICAL
+        )
+
+        rate_limiter.record_success("match_sequence")
+
+        if "result" in data and data["result"].get("status") == 1:
+            return data["result"].get("matches", [])
+        return []
+    except CircuitOpenError:
+        return None
+    except Exception as e:
+        backoff = rate_limiter.record_failure("match_sequence")
+        logger.error(f"Error fetching matches from sequence {start_at_match_seq_num}: {e}, backing off for {backoff}s")
+        return None
+
+
+async def get_latest_match_seq_num():
+    """Return the sequence number of the most recent public match, or None."""
+    try:
+        data = await steam_get_json(
+            '/IDOTA2Match_570/GetMatchHistory/v1/',
+            {'matches_requested': 1},
+            timeout=10,
+            priority=PRIORITY_CRITICAL
+        )
+        matches = data.get("result", {}).get("matches", [])
+        return matches[0]["match_seq_num"] if matches else None
+    except Exception as e:
+        logger.error(f"Error fetching latest match sequence number: {e}")
+        return None
+
+# Add other Dota 2 API functions as needed
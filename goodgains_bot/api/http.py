@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+import aiohttp
+from urllib.parse import urlparse
+from config import (STEAM_API_KEY, STEAM_API_BASE_URL, HTTP_TIMEOUT_SECONDS, HTTP_CONNECT_TIMEOUT_SECONDS,
+                    HTTP_MAX_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST)
+from api.scheduler import scheduler, PRIORITY_PROFILE
+from api.circuit_breaker import breaker_for_path, CircuitOpenError
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib decoder is just slower
+    json_loads = json.loads
+
+logger = logging.getLogger('goodgains_bot')
+
+_session = None
+_steam_host = urlparse(STEAM_API_BASE_URL).netloc
+
+
+class HttpStatusError(Exception):
+    """Raised when the Steam Web API answers with a non-2xx status."""
+
+    def __init__(self, status, path):
+        super().__init__(f"HTTP {status} from {path}")
+        self.status = status
+        self.path = path
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use (must run on the bot's event loop)."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+        )
+    return _session
+
+
+async def close_session():
+    """Close the shared session and its pooled connections."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def steam_get_json(path, params=None, timeout=None, priority=PRIORITY_PROFILE):
+    """GET a Steam Web API path (e.g. '/ISteamUser/GetPlayerSummaries/v2/') and decode the JSON body.
+
+    The API key is added automatically, and the call waits for the shared scheduler in its
+    priority class; the timeout only covers the request itself. Raises CircuitOpenError at once
+    while the endpoint's breaker is open, HttpStatusError for non-2xx responses and
+    aiohttp/asyncio errors for transport failures and timeouts.
+    """
+    return await steam_get_decoded(path, _decode_json, params, timeout, priority)
+
+
+async def _decode_json(response):
+    return json_loads(await response.read())
+
+
+async def steam_get_decoded(path, decode, params=None, timeout=None, priority=PRIORITY_PROFILE):
+    """Like steam_get_json, but the body is handed to `await decode(response)` (e.g. to stream it)."""
+    breaker = breaker_for_path(path)
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(breaker.name)
+
+    query = {'key': STEAM_API_KEY} if STEAM_API_KEY else {}
+    query.update({name: str(value) for name, value in (params or {}).items()})
+
+    await scheduler.acquire(_steam_host, priority)
+
+    request_timeout = aiohttp.ClientTimeout(total=timeout, connect=HTTP_CONNECT_TIMEOUT_SECONDS) if timeout else None
+    try:
+        async with get_session().get(f"{STEAM_API_BASE_URL}{path}", params=query, timeout=request_timeout) as response:
+            if response.status >= 400:
+                await response.read()
+                raise HttpStatusError(response.status, path)
+            data = await decode(response)
+    except HttpStatusError as e:
+        if breaker is not None:
+            if _is_outage_status(breaker.name, e.status):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+
+    if breaker is not None:
+        breaker.record_success()
+    return data
+
+
+def _is_outage_status(family, status):
+    """Whether an error status means the endpoint is struggling (and should count toward its breaker)."""
+    # GetMatchDetails answers 500 for matches that are still being played
+    if family == 'GetMatchDetails' and status == 500:
+        return False
+    return status == 429 or status >= 500
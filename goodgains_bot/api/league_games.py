@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from config import LEAGUE_SNAPSHOT_MAX_AGE_SECONDS
+from api.dota import get_live_league_games
+
+logger = logging.getLogger('goodgains_bot')
+
+SnapshotDiff = namedtuple('SnapshotDiff', ['joined', 'left'])
+
+
+class LeagueGamesSnapshot:
+    """One GetLiveLeagueGames download per poll cycle, indexed by account_id.
+
+    The index maps account_id -> (match_id, team) so per-user lookups are a dict hit
+    instead of a scan over every game and player. Each refresh reports which accounts
+    joined or left a league match since the previous snapshot.
+    """
+
+    def __init__(self, max_age=LEAGUE_SNAPSHOT_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self.index = {}
+        self.fetched_at = 0
+        self.fetches = 0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self):
+        return time.monotonic() - self.fetched_at < self.max_age
+
+    @staticmethod
+    def build_index(games):
+        """Map each account_id in the live league games to its (match_id, team)."""
+        index = {}
+        for game in games:
+            match_id = str(game['match_id'])
+            for player in game.get('players', []):
+                account_id = player.get('account_id')
+                if account_id is None:
+                    continue
+                team = "team1" if player.get('team', 0) == 0 else "team2"
+                index[account_id] = (match_id, team)
+        return index
+
+    async def refresh(self, force=False):
+        """Download a new snapshot unless the current one is still fresh.
+
+        Concurrent callers share a single download. Returns a SnapshotDiff of accounts that
+        joined ({account_id: (match_id, team)}) or left ({account_id: previous entry}) a
+        league match, or None if nothing was fetched.
+        """
+        async with self._lock:
+            if not force and self.is_fresh():
+                return None
+
+            games = await get_live_league_games()
+            if games is None:
+                # Leave fetched_at alone so lookups treat the old snapshot as stale
+                return None
+
+            new_index = self.build_index(games)
+            old_index = self.index
+            joined = {account_id: entry for account_id, entry in new_index.items()
+                      if old_index.get(account_id) != entry}
+            left = {account_id: entry for account_id, entry in old_index.items()
+                    if new_index.get(account_id) != entry}
+
+            self.index = new_index
+            self.fetched_at = time.monotonic()
+            self.fetches += 1
+
+            if joined or left:
+                logger.info(f"League snapshot: {len(games)} games, {len(joined)} joined, {len(left)} left")
+            return SnapshotDiff(joined, left)
+
+    async def lookup(self, account_id):
+        """Return (match_id, team) if the account is in a live league match, else None."""
+        if not self.is_fresh():
+            await self.refresh()
+        if not self.is_fresh():
+            return None
+        return self.index.get(account_id)
+
+
+league_games = LeagueGamesSnapshot()
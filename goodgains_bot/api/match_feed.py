@@ -0,0 +1,89 @@
+import logging
+import time
+from config import MATCH_FEED_POLL_SECONDS, MATCH_FEED_MAX_BATCHES
+from api.dota import get_match_history_by_seq_num, get_latest_match_seq_num, remember_completed_match
+from database.async_db import db
+from database.write_queue import write_queue
+from utils.timestamps import now_ms
+
+logger = logging.getLogger('goodgains_bot')
+
+BATCH_SIZE = 100
+
+
+class MatchSequenceFeed:
+    """Follows GetMatchHistoryBySequenceNum to spot tracked matches as soon as they finish.
+
+    Every finished match gets a sequence number, so reading the feed from a persisted cursor
+    sees each one exactly once. Matches whose id is in the tracked set are cached as completed
+    and handed back to the caller; everything else is skipped. The number of API calls
+    depends on global match volume, not on how many matches we are tracking.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, max_batches=MATCH_FEED_MAX_BATCHES):
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.seq_num = None
+        self.caught_up = False
+        self.last_caught_up = 0
+        self.matches_seen = 0
+        self.matches_found = 0
+
+    def is_live(self):
+        """True while the feed is keeping up, so per-match completion polling can be skipped."""
+        return self.caught_up and time.monotonic() - self.last_caught_up < MATCH_FEED_POLL_SECONDS * 3
+
+    async def _load_cursor(self):
+        row = await db.fetchone('SELECT seq_num FROM feed_cursors WHERE name = ?', ('match_sequence',))
+        if row:
+            return row['seq_num']
+
+        # First run: start from the newest match instead of the beginning of Dota history
+        latest = await get_latest_match_seq_num()
+        return latest + 1 if latest is not None else None
+
+    def _save_cursor(self):
+        write_queue.enqueue(
+            '''INSERT INTO feed_cursors (name, seq_num, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET seq_num = excluded.seq_num, updated_at = excluded.updated_at''',
+            ('match_sequence', self.seq_num, now_ms())
+        )
+
+    async def poll(self, tracked_match_ids):
+        """Read new batches from the feed; returns get_match_details-style results for tracked matches."""
+        if self.seq_num is None:
+            self.seq_num = await self._load_cursor()
+            if self.seq_num is None:
+                return []
+
+        start_seq_num = self.seq_num
+        found = []
+        self.caught_up = False
+
+        for _ in range(self.max_batches):
+            matches = await get_match_history_by_seq_num(self.seq_num, self.batch_size)
+            if matches is None:
+                break
+
+            for match in matches:
+                self.matches_seen += 1
+                match_id = str(match.get('match_id'))
+                if match_id in tracked_match_ids and 'radiant_win' in match:
+                    found.append((match_id, await remember_completed_match(match)))
+
+            if matches:
+                self.seq_num = max(match['match_seq_num'] for match in matches) + 1
+
+            if len(matches) < self.batch_size:
+                self.caught_up = True
+                self.last_caught_up = time.monotonic()
+                break
+
+        if self.seq_num != start_seq_num:
+            self._save_cursor()
+
+        self.matches_found += len(found)
+        return found
+
+
+match_feed = MatchSequenceFeed()
@@ -1,44 +1,84 @@
 import time
+from collections import OrderedDict
+from config import RATE_LIMITER_MAX_KEYS, RATE_LIMITER_ENTRY_TTL_SECONDS
 
 
 class ApiRateLimiter:
-    """Handles rate limiting for API calls with exponential backoff."""
+    """Handles rate limiting for API calls with exponential backoff.
 
-    def __init__(self):
-        self.failures = {}
-        self.backoff_times = {}
+    Backoff state is kept per key in least-recently-failed order, so stale keys expire from
+    the front in O(1) once they go RATE_LIMITER_ENTRY_TTL_SECONDS without a failure, and the
+    oldest keys are evicted when more than max_keys are tracked.
+    """
+
+    def __init__(self, max_keys=RATE_LIMITER_MAX_KEYS, entry_ttl=RATE_LIMITER_ENTRY_TTL_SECONDS):
+        self.max_keys = max_keys
+        self.entry_ttl = entry_ttl
+        # key -> (failures, backoff_until, last_failure), oldest last_failure first
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now):
+        """Drop keys whose last failure is older than the TTL (they sit at the front)."""
+        while self._entries:
+            key, (_, _, last_failure) = next(iter(self._entries.items()))
+            if now - last_failure < self.entry_ttl:
+                break
+            self._entries.popitem(last=False)
 
     def should_retry(self, key):
         """Determine if we should retry a failed API call based on exponential backoff."""
-        if key not in self.failures:
-            return True
-
-        if key not in self.backoff_times:
+        entry = self._entries.get(key)
+        if entry is None:
             return True
 
         current_time = time.time()
-        if current_time > self.backoff_times[key]:
+        if current_time - entry[2] >= self.entry_ttl:
+            self._expire(current_time)
             return True
 
-        return False
+        return current_time > entry[1]
 
     def record_failure(self, key):
         """Record an API failure and set the backoff time."""
-        if key not in self.failures:
-            self.failures[key] = 1
-        else:
-            self.failures[key] += 1
+        current_time = time.time()
+        self._expire(current_time)
+
+        entry = self._entries.pop(key, None)
+        failures = entry[0] + 1 if entry else 1
 
         # Calculate backoff time: 2^failures seconds, max 10 minutes
-        backoff_seconds = min(2 ** self.failures[key], 600)
-        self.backoff_times[key] = time.time() + backoff_seconds
+        backoff_seconds = min(2 ** failures, 600)
+        self._entries[key] = (failures, current_time + backoff_seconds, current_time)
+
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
 
         return backoff_seconds
 
     def record_success(self, key):
         """Reset failure count after a successful API call."""
-        if key in self.failures:
-            del self.failures[key]
+        self._entries.pop(key, None)
+
+    def export_state(self):
+        """Return the live entries as (key, failures, backoff_until, last_failure) rows, oldest first."""
+        self._expire(time.time())
+        return [(key, *entry) for key, entry in self._entries.items()]
+
+    def import_state(self, rows):
+        """Load rows from export_state (e.g. after a restart), skipping ones that have already expired."""
+        current_time = time.time()
+        for key, failures, backoff_until, last_failure in sorted(rows, key=lambda row: row[3]):
+            if current_time - last_failure >= self.entry_ttl:
+                continue
+            self._entries.pop(key, None)
+            self._entries[key] = (failures, backoff_until, last_failure)
+
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
 
-        if key in self.backoff_times:
-            del self.backoff_times[key]
\ No newline at end of file
+# Shared by the Dota and Steam API modules and the bot, so backoff state lives in one place
+rate_limiter = ApiRateLimiter()
@@ -0,0 +1,122 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from config import API_RATE_LIMIT, API_RATE_BURST, MATCH_API_PRIORITY
+
+logger = logging.getLogger('goodgains_bot')
+
+# Priority classes, most urgent first
+PRIORITY_CRITICAL = 'critical'    # bet resolution and validation of tracked matches
+PRIORITY_DISCOVERY = 'discovery'  # finding new matches for registered players
+PRIORITY_PROFILE = 'profile'      # profile lookups, vanity URLs and health checks
+
+# With MATCH_API_PRIORITY=high, match discovery preempts profile lookups; otherwise they share a class
+PRIORITY_RANKS = {
+    PRIORITY_CRITICAL: 0,
+    PRIORITY_DISCOVERY: 1,
+    PRIORITY_PROFILE: 2 if MATCH_API_PRIORITY == 'high' else 1,
+}
+
+
+class _HostBucket:
+    """Token bucket for one API host with a priority queue of waiting requests."""
+
+    def __init__(self, host, rate, burst):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self.depth = {name: 0 for name in PRIORITY_RANKS}
+        self.granted = {name: 0 for name in PRIORITY_RANKS}
+        self.wait_total = {name: 0.0 for name in PRIORITY_RANKS}
+        self.wait_max = {name: 0.0 for name in PRIORITY_RANKS}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _record(self, priority, waited):
+        self.granted[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+    async def acquire(self, priority):
+        self._refill()
+        if not self._waiting and self.tokens >= 1:
+            self.tokens -= 1
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        heapq.heappush(self._waiting, (PRIORITY_RANKS[priority], next(self._seq), future))
+        self.depth[priority] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await future
+        finally:
+            self.depth[priority] -= 1
+        self._record(priority, time.monotonic() - enqueued_at)
+
+    async def _dispatch(self):
+        while self._waiting:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiting)
+            # Callers that gave up while queued don't use up a token
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+
+class ApiScheduler:
+    """Process-wide rate scheduler for outgoing API calls.
+
+    Each host gets a token bucket holding API_RATE_BURST tokens, refilled at API_RATE_LIMIT
+    requests per second (which must stay under Steam's daily per-key quota). Calls that find
+    the bucket empty queue instead of failing, and are released in priority order (critical,
+    then discovery, then profile), first come first served within a class.
+    """
+
+    def __init__(self, rate=API_RATE_LIMIT, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._buckets = {}
+
+    async def acquire(self, host, priority=PRIORITY_PROFILE):
+        """Wait until a request to host may be sent."""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(host, self.rate, self.burst)
+        await bucket.acquire(priority)
+
+    def stats(self):
+        """Return {host: {priority: {queued, granted, avg_wait_ms, max_wait_ms}}}."""
+        return {
+            host: {
+                name: {
+                    'queued': bucket.depth[name],
+                    'granted': bucket.granted[name],
+                    'avg_wait_ms': bucket.wait_total[name] / bucket.granted[name] * 1000 if bucket.granted[name] else 0.0,
+                    'max_wait_ms': bucket.wait_max[name] * 1000,
+                }
+                for name in PRIORITY_RANKS
+            }
+            for host, bucket in self._buckets.items()
+        }
+
+
+scheduler = ApiScheduler(API_RATE_LIMIT, API_RATE_BURST)
@@ -1,37 +1,109 @@
-import requests
-import logging
 import asyncio
+import logging
+import time
 from urllib.parse import urlparse
 import re
-from config import STEAM_API_KEY
-from api.rate_limiter import ApiRateLimiter
+from config import PLAYER_SUMMARY_BATCH_WINDOW_MS, PLAYER_SUMMARY_TTL_SECONDS
+from api.http import steam_get_json
+from api.circuit_breaker import CircuitOpenError
+from api.rate_limiter import rate_limiter
 
 logger = logging.getLogger('goodgains_bot')
-rate_limiter = ApiRateLimiter()
+
+
+# Lookups arriving within PLAYER_SUMMARY_BATCH_WINDOW_MS share one request per 100 IDs
+MAX_SUMMARIES_PER_REQUEST = 100
+_summary_cache = {}  # steam_id -> (expires_at, summary)
+_pending_summaries = {}  # steam_id -> Future shared by everyone waiting on that ID
+_summary_batch_task = None
 
 
 async def get_player_summary(steam_id):
-    """Get player summary from Steam API."""
+    """Get player summary from Steam API.
+
+    Cached for PLAYER_SUMMARY_TTL_SECONDS; misses are collected for a short window and
+    fetched together with other pending lookups.
+    """
+    global _summary_batch_task
+    steam_id = str(steam_id)
+
+    cached = _summary_cache.get(steam_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     if not rate_limiter.should_retry(f"player_summary_{steam_id}"):
         logger.info(f"Skipping API call for player {steam_id} due to rate limiting")
         return None
 
-    url = f"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/?key={STEAM_API_KEY}&steamids={steam_id}"
-    try:
-        async with asyncio.timeout(10):
-            response = await asyncio.to_thread(requests.get, url)
-            response.raise_for_status()
-            data = response.json()
+    future = _pending_summaries.get(steam_id)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _pending_summaries[steam_id] = future
+        if _summary_batch_task is None or _summary_batch_task.done():
+            _summary_batch_task = asyncio.create_task(_flush_summary_batches())
 
-            rate_limiter.record_success(f"player_summary_{steam_id}")
+    return await asyncio.shield(future)
+
+
+async def warm_player_summaries(steam_ids):
+    """Prefetch summaries for many players (e.g. every steam_mapping at startup)."""
+    await asyncio.gather(*(get_player_summary(steam_id) for steam_id in set(steam_ids)))
+    logger.info(f"Warmed player summary cache with {len(_summary_cache)} profiles")
 
-            if "response" in data and "players" in data["response"]:
-                return data["response"]["players"][0] if data["response"]["players"] else None
-            return None
+
+async def _flush_summary_batches():
+    # Lookups that arrive while a round is in flight are picked up by the next round
+    while _pending_summaries:
+        await asyncio.sleep(PLAYER_SUMMARY_BATCH_WINDOW_MS / 1000)
+
+        pending = dict(_pending_summaries)
+        _pending_summaries.clear()
+        steam_ids = list(pending)
+        await asyncio.gather(*(
+            _fetch_summary_batch(steam_ids[i:i + MAX_SUMMARIES_PER_REQUEST], pending)
+            for i in range(0, len(steam_ids), MAX_SUMMARIES_PER_REQUEST)
+        ))
+
+
+async def _fetch_summary_batch(steam_ids, pending):
+    """Fetch up to 100 summaries in one call and resolve each waiter (None if not found or on error)."""
+    summaries = {}
+    try:
+        data = await steam_get_json(
+            '/ISteamUser/GetPlayerSummaries/v2/',
+            {'steamids': ','.join(steam_ids)},
+            timeout=10
+        )
+
+        expires_at = time.monotonic() + PLAYER_SUMMARY_TTL_SECONDS
+        for player in data.get("response", {}).get("players", []):
+            steam_id = str(player.get("steamid"))
+            summaries[steam_id] = player
+            _summary_cache[steam_id] = (expires_at, player)
+
+        for steam_id in steam_ids:
+            rate_limiter.record_success(f"player_summary_{steam_id}")
+    except CircuitOpenError:
+        pass
     except Exception as e:
-        backoff = rate_limiter.record_failure(f"player_summary_{steam_id}")
-        logger.error(f"Error fetching player summary for {steam_id}: {e}, backing off for {backoff} seconds")
-        return None
+        backoff = 0
+        for steam_id in steam_ids:
+            backoff = rate_limiter.record_failure(f"player_summary_{steam_id}")
+        logger.error(f"Error fetching {len(steam_ids)} player summaries: {e}, backing off for {backoff} seconds")
+
+    for steam_id in steam_ids:
+        future = pending[steam_id]
+        if not future.done():
+            future.set_result(summaries.get(steam_id))
+
+
+def prune_player_summary_cache():
+    """Drop expired player summaries; returns how many were removed."""
+    now = time.monotonic()
+    expired = [steam_id for steam_id, (expires_at, _) in _summary_cache.items() if expires_at <= now]
+    for steam_id in expired:
+        del _summary_cache[steam_id]
+    return len(expired)
 
 
 async def resolve_vanity_url(vanity_url):
@@ -39,17 +111,16 @@ async def resolve_vanity_url(vanity_url):
     if not rate_limiter.should_retry(f"vanity_url_{vanity_url}"):
         return None
 
-    url = f"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/?key={STEAM_API_KEY}&vanityurl={vanity_url}"
     try:
-        response = await asyncio.to_thread(requests.get, url)
-        response.raise_for_status()
-        data = response.json()
+        data = await steam_get_json('/ISteamUser/ResolveVanityURL/v1/', {'vanityurl': vanity_url})
 
         rate_limiter.record_success(f"vanity_url_{vanity_url}")
 
         if data["response"]["success"] == 1:
             return data["response"]["steamid"]
         return None
+    except CircuitOpenError:
+        return None
     except Exception as e:
         backoff = rate_limiter.record_failure(f"vanity_url_{vanity_url}")
         logger.error(f"Error resolving vanity URL {vanity_url}: {e}, backing off for {backoff} seconds")
@@ -80,11 +151,8 @@ def extract_steam_id_from_url(steam_url):
 async def check_api_health():
     """Check if the Steam API is working properly."""
     try:
-        test_url = f"https://api.steampowered.com/ISteamWebAPIUtil/GetSupportedAPIList/v1/?key={STEAM_API_KEY}"
-        async with asyncio.timeout(5):
-            response = await asyncio.to_thread(requests.get, test_url)
-            response.raise_for_status()
-            return True
+        await steam_get_json('/ISteamWebAPIUtil/GetSupportedAPIList/v1/', timeout=5)
+        return True
     except Exception as e:
         logger.error(f"Steam API health check failed: {e}")
         return False
\ No newline at end of file
@@ -1,11 +1,19 @@
 import logging
 from datetime import datetime, timedelta
-from database.connection import get_db_connection
+from database.async_db import db
+from database.user_stats import record_bet_placed
+from utils.timestamps import now_ms, to_ms
 from config import MIN_BET_AMOUNT, MAX_BET_AMOUNT, MAX_BETS_PER_HOUR
 
 logger = logging.getLogger('goodgains_bot')
 
 
+def _insert_bet(conn, sql, params):
+    """Insert a bet and count it in the user's stats in the same transaction."""
+    bet_id = conn.execute(sql, params).lastrowid
+    record_bet_placed(conn, bet_id)
+
+
 async def place_team_win_bet(user_id, match_id, team, amount):
     """Place a bet on team winning a match."""
     # Validate bet amount
@@ -21,12 +29,11 @@ async def place_team_win_bet(user_id, match_id, team, amount):
 
     # Place bet in database
     try:
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT INTO bets (user_id, match_id, bet_type, team, amount) VALUES (?, ?, ?, ?, ?)',
-                (user_id, match_id, "team_win", team, amount)
-            )
-            conn.commit()
+        await db.run(
+            _insert_bet,
+            'INSERT INTO bets (user_id, match_id, bet_type, team, amount) VALUES (?, ?, ?, ?, ?)',
+            (user_id, match_id, "team_win", team, amount)
+        )
 
         logger.info(f"User {user_id} placed {amount} ETH bet on {team} in match {match_id}")
         return {"success": True, "message": f"You bet {amount} ETH on {team} in match {match_id}!"}
@@ -51,12 +58,11 @@ async def place_first_blood_bet(user_id, match_id, player, amount):
 
     # Place bet in database
     try:
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT INTO bets (user_id, match_id, bet_type, target, amount) VALUES (?, ?, ?, ?, ?)',
-                (user_id, match_id, "first_blood", player, amount)
-            )
-            conn.commit()
+        await db.run(
+            _insert_bet,
+            'INSERT INTO bets (user_id, match_id, bet_type, target, amount) VALUES (?, ?, ?, ?, ?)',
+            (user_id, match_id, "first_blood", player, amount)
+        )
 
         logger.info(f"User {user_id} placed {amount} ETH bet on {player} getting First Blood in match {match_id}")
         return {"success": True,
@@ -82,12 +88,11 @@ async def place_mvp_bet(user_id, match_id, player, amount):
 
     # Place bet in database
     try:
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT INTO bets (user_id, match_id, bet_type, target, amount) VALUES (?, ?, ?, ?, ?)',
-                (user_id, match_id, "mvp", player, amount)
-            )
-            conn.commit()
+        await db.run(
+            _insert_bet,
+            'INSERT INTO bets (user_id, match_id, bet_type, target, amount) VALUES (?, ?, ?, ?, ?)',
+            (user_id, match_id, "mvp", player, amount)
+        )
 
         logger.info(f"User {user_id} placed {amount} ETH bet on {player} being MVP in match {match_id}")
         return {"success": True, "message": f"You bet {amount} ETH that {player} will be MVP in match {match_id}!"}
@@ -100,12 +105,12 @@ async def place_mvp_bet(user_id, match_id, player, amount):
 async def check_bet_rate_limit(user_id):
     """Check if user has exceeded the betting rate limit."""
     try:
-        with get_db_connection() as conn:
+        def count_and_record(conn):
             # Count bets in the last hour
             one_hour_ago = datetime.now() - timedelta(hours=1)
             recent_bets = conn.execute(
                 'SELECT COUNT(*) as count FROM bets WHERE user_id = ? AND placed_at > ?',
-                (user_id, one_hour_ago.isoformat())
+                (user_id, to_ms(one_hour_ago))
             ).fetchone()
 
             if recent_bets and recent_bets['count'] >= MAX_BETS_PER_HOUR:
@@ -114,12 +119,12 @@ async def check_bet_rate_limit(user_id):
             # Update rate limit tracking
             conn.execute(
                 'INSERT OR REPLACE INTO rate_limits (user_id, action, timestamp) VALUES (?, ?, ?)',
-                (user_id, "place_bet", datetime.now().isoformat())
+                (user_id, "place_bet", now_ms())
             )
-            conn.commit()
-
             return True
 
+        return await db.run(count_and_record)
+
     except Exception as e:
         logger.error(f"Error checking bet rate limit: {e}")
         return False  # Default to preventing bet on error
@@ -128,13 +133,12 @@ async def check_bet_rate_limit(user_id):
 async def check_active_bets(user_id, match_id):
     """Check if user has already placed bets on this match."""
     try:
-        with get_db_connection() as conn:
-            existing_bets = conn.execute(
-                'SELECT bet_type FROM bets WHERE user_id = ? AND match_id = ?',
-                (user_id, match_id)
-            ).fetchall()
+        existing_bets = await db.fetchall(
+            'SELECT bet_type FROM bets WHERE user_id = ? AND match_id = ?',
+            (user_id, match_id)
+        )
 
-            return [bet['bet_type'] for bet in existing_bets]
+        return [bet['bet_type'] for bet in existing_bets]
 
     except Exception as e:
         logger.error(f"Error checking active bets: {e}")
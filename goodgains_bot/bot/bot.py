@@ -6,7 +6,9 @@ from threading import Lock
 from datetime import datetime
 from config import DISCORD_BOT_TOKEN, LOG_CHANNEL_ID
 from database.connection import get_db_connection
-from api.rate_limiter import ApiRateLimiter
+from database.async_db import db
+from api.rate_limiter import rate_limiter
+from api.http import close_session
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -36,41 +38,64 @@ class GoodGainsBot(commands.Bot):
         self.game_state_cache = {}  # Track game state transitions
         self.match_detection_confidence = {}  # Track confidence levels of match detection
 
-        # Initialize API rate limiter
-        self.api_limiter = ApiRateLimiter()
+        # Process-wide API backoff state
+        self.api_limiter = rate_limiter
 
         # Start time for uptime calculation
         self.start_time = datetime.now()
 
     def reload_caches(self):
         """Load data from database into memory caches."""
+        with get_db_connection(readonly=True) as conn:
+            self._populate_caches(self._read_cache_rows(conn))
+
+    async def refresh_caches(self):
+        """Reload memory caches without blocking the event loop."""
+        self._populate_caches(await db.run(self._read_cache_rows, readonly=True))
+
+    @staticmethod
+    def _read_cache_rows(conn):
+        """Read the rows backing the in-memory caches."""
+        steam_rows = conn.execute('SELECT user_id, steam_id FROM steam_mappings').fetchall()
+        active_rows = conn.execute(
+            'SELECT user_id, game_id, match_id, team, match_start_time, draft_detected_at, game_start_time '
+            'FROM active_players'
+        ).fetchall()
+        wallet_rows = conn.execute(
+            'SELECT user_id, wallet_address, session_id, connected FROM wallet_sessions WHERE connected = TRUE'
+        ).fetchall()
+        return steam_rows, active_rows, wallet_rows
+
+    def _populate_caches(self, rows):
+        """Replace the in-memory caches with freshly loaded rows."""
+        steam_rows, active_rows, wallet_rows = rows
         self.steam_ids_cache = {}
         self.active_players_cache = {}
         self.wallet_sessions_cache = {}
 
-        with get_db_connection() as conn:
-            # Load Steam IDs
-            for row in conn.execute('SELECT user_id, steam_id FROM steam_mappings'):
-                self.steam_ids_cache[row['user_id']] = row['steam_id']
-
-            # Load active players
-            for row in conn.execute('SELECT user_id, game_id, match_id, team, match_start_time FROM active_players'):
-                self.active_players_cache[row['user_id']] = {
-                    'game_id': row['game_id'],
-                    'match_id': row['match_id'],
-                    'team': row['team'],
-                    'match_start_time': row['match_start_time'],
-                    'last_check_time': int(datetime.now().timestamp())
-                }
-
-            # Load wallet sessions
-            for row in conn.execute(
-                    'SELECT user_id, wallet_address, session_id, connected FROM wallet_sessions WHERE connected = TRUE'):
-                self.wallet_sessions_cache[row['user_id']] = {
-                    'address': row['wallet_address'],
-                    'session_id': row['session_id'],
-                    'connected': row['connected']
-                }
+        # Load Steam IDs
+        for row in steam_rows:
+            self.steam_ids_cache[row['user_id']] = row['steam_id']
+
+        # Load active players
+        for row in active_rows:
+            self.active_players_cache[row['user_id']] = {
+                'game_id': row['game_id'],
+                'match_id': row['match_id'],
+                'team': row['team'],
+                'match_start_time': row['match_start_time'],
+                'draft_detected_at': row['draft_detected_at'],
+                'game_start_time': row['game_start_time'],
+                'last_check_time': int(datetime.now().timestamp())
+            }
+
+        # Load wallet sessions
+        for row in wallet_rows:
+            self.wallet_sessions_cache[row['user_id']] = {
+                'address': row['wallet_address'],
+                'session_id': row['session_id'],
+                'connected': row['connected']
+            }
 
     async def on_ready(self):
         logger.info(f'Logged in as {self.user.name} (ID: {self.user.id})')
@@ -89,6 +114,15 @@ class GoodGainsBot(commands.Bot):
         from bot.tasks import start_tasks
         start_tasks(self)
 
+        # Prefetch every registered player's Steam profile in batches of 100
+        from api.steam import warm_player_summaries
+        asyncio.create_task(warm_player_summaries(list(self.steam_ids_cache.values())))
+
+    async def close(self):
+        """Close the shared Steam API session before disconnecting."""
+        await close_session()
+        await super().close()
+
     def get_uptime(self):
         """Return the bot's uptime in a human-readable format."""
         uptime_seconds = (datetime.now() - self.start_time).total_seconds()
@@ -101,15 +135,18 @@ class GoodGainsBot(commands.Bot):
         return f"{int(days)}d {int(hours)}h {int(minutes)}m {int(seconds)}s"
 
     async def send_direct_message(self, user_id, message):
-        """Send a direct message to a user safely."""
+        """Send a direct message to a user safely; returns True if it was delivered."""
         try:
-            user = await self.fetch_user(user_id)
+            # Prefer the member cache; fetch_user is an API call
+            user = self.get_user(user_id) or await self.fetch_user(user_id)
             if user:
                 await user.send(message)
                 logger.info(f"DM sent to user {user_id}")
+                return True
             else:
                 logger.warning(f"Could not find user with ID {user_id}")
         except discord.Forbidden:
             logger.warning(f"Cannot send DM to user {user_id} (forbidden)")
         except Exception as e:
-            logger.error(f"Error sending DM to user {user_id}: {e}")
\ No newline at end of file
+            logger.error(f"Error sending DM to user {user_id}: {e}")
+        return False
\ No newline at end of file
@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import time
+from config import (POLL_IDLE_SECONDS, POLL_RECENT_SECONDS, POLL_DRAFT_SECONDS, POLL_IN_GAME_SECONDS,
+                    POLL_GSI_LIVE_SECONDS)
+from gsi.heartbeat import gsi_heartbeats
+
+STATE_INTERVALS = {
+    'idle': POLL_IDLE_SECONDS,
+    'recent': POLL_RECENT_SECONDS,
+    'draft': POLL_DRAFT_SECONDS,
+    'in_game': POLL_IN_GAME_SECONDS,
+    'gsi_live': POLL_GSI_LIVE_SECONDS,
+}
+
+DRAFT_STATES = {'DOTA_GAMERULES_STATE_HERO_SELECTION', 'DOTA_GAMERULES_STATE_STRATEGY_TIME'}
+
+# How long after their last match a user still counts as recently active
+RECENT_ACTIVITY_SECONDS = 1800
+
+# Longest a detected draft (pick/ban plus strategy time) is expected to last before the game starts
+DRAFT_MAX_SECONDS = 300
+
+
+class PollScheduler:
+    """Min-heap of per-user next-due times for match detection polling.
+
+    Each user is rescheduled after a check with an interval chosen from their state (idle,
+    recently active, in draft, in game, or GSI-live), so quiet users cost little and users
+    about to start a match are checked often. Removed users are dropped lazily when popped.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._users = {}  # user_id -> {'steam_id', 'due', 'last_checked', 'last_active', 'state'}
+
+    def __len__(self):
+        return len(self._users)
+
+    def sync(self, steam_ids):
+        """Match the scheduled users to {user_id: steam_id}; new users are due immediately."""
+        now = time.time()
+        for user_id in list(self._users):
+            if user_id not in steam_ids:
+                del self._users[user_id]
+
+        for user_id, steam_id in steam_ids.items():
+            entry = self._users.get(user_id)
+            if entry is None:
+                self._users[user_id] = {'steam_id': steam_id, 'due': now, 'last_checked': None,
+                                        'last_active': 0, 'state': 'idle'}
+                heapq.heappush(self._heap, (now, next(self._seq), user_id))
+            else:
+                entry['steam_id'] = steam_id
+
+    def pop_due(self, limit, now=None):
+        """Return up to limit (user_id, steam_id) pairs whose next check is due, most overdue first."""
+        now = now or time.time()
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now:
+            due_at, _, user_id = heapq.heappop(self._heap)
+            entry = self._users.get(user_id)
+            # Skip users removed since they were queued, and stale heap entries from rescheduling
+            if entry is None or entry['due'] != due_at:
+                continue
+            entry['due'] = None
+            due.append((user_id, entry['steam_id']))
+        return due
+
+    def classify(self, bot, user_id, now):
+        """Pick the polling state for a user from their tracked match and GSI liveness.
+
+        Draft comes first: the game is about to start, so even while a live GSI feed makes the
+        API check a no-op, the next real check is never more than POLL_DRAFT_SECONDS away.
+        """
+        tracked = bot.active_players_cache.get(user_id, {})
+        draft_detected_at = tracked.get('draft_detected_at')
+        if draft_detected_at and not tracked.get('game_start_time') and now - draft_detected_at < DRAFT_MAX_SECONDS:
+            return 'draft'
+        beat = gsi_heartbeats.get(user_id)
+        if beat and beat[2] in DRAFT_STATES and beat[0] < DRAFT_MAX_SECONDS:
+            return 'draft'
+        if gsi_heartbeats.is_live(user_id):
+            return 'gsi_live'
+        if 'match_id' in tracked:
+            return 'in_game'
+        if now - self._users[user_id]['last_active'] < RECENT_ACTIVITY_SECONDS:
+            return 'recent'
+        return 'idle'
+
+    def reschedule(self, bot, user_id, in_match):
+        """Record a finished check and queue the user's next one."""
+        entry = self._users.get(user_id)
+        if entry is None:
+            return
+
+        now = time.time()
+        entry['last_checked'] = now
+        if in_match:
+            entry['last_active'] = now
+        entry['state'] = self.classify(bot, user_id, now)
+        entry['due'] = now + STATE_INTERVALS[entry['state']]
+        heapq.heappush(self._heap, (entry['due'], next(self._seq), user_id))
+
+    def stats(self):
+        """Return sweep lag (how overdue the oldest due check is) and per-user staleness in seconds."""
+        now = time.time()
+        overdue = [now - entry['due'] for entry in self._users.values()
+                   if entry['due'] is not None and entry['due'] <= now]
+        staleness = sorted(now - entry['last_checked'] for entry in self._users.values()
+                           if entry['last_checked'] is not None)
+        states = {}
+        for entry in self._users.values():
+            states[entry['state']] = states.get(entry['state'], 0) + 1
+
+        return {
+            'users': len(self._users),
+            'due': len(overdue),
+            'sweep_lag': max(overdue, default=0.0),
+            'staleness_p50': staleness[len(staleness) // 2] if staleness else 0.0,
+            'staleness_max': staleness[-1] if staleness else 0.0,
+            'never_checked': len(self._users) - len(staleness),
+            'states': states,
+        }
+
+
+poll_scheduler = PollScheduler()
@@ -1,12 +1,29 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, time as dt_time, timezone
 from discord.ext import tasks
-from database.connection import get_db_connection
-from api.dota import get_match_details
+from database.async_db import db
+from database.retention import rollup_and_prune, run_incremental_vacuum
+from database.backup import backup_database
+from database.api_backoff import save_backoff_state
+from database.user_stats import weekly_summaries
+from database.write_queue import write_queue
+from config import (VACUUM_HOUR_UTC, BACKUP_INTERVAL_HOURS, RATE_LIMITER_PERSIST, MATCH_FEED_ENABLED,
+                    MATCH_FEED_POLL_SECONDS, MATCH_FEED_BACKSTOP_MINUTES, POLL_TICK_SECONDS, POLL_SYNC_SECONDS,
+                    POLL_MAX_CHECKS_PER_TICK, RESOLUTION_CONCURRENCY)
+from utils.timestamps import DAY_MS, to_ms, from_ms, floor_ms, now_ms
+from api.dota import get_match_details, get_cached_match_details
+from api.match_feed import match_feed
+from api.league_games import league_games
+from api.scheduler import PRIORITY_DISCOVERY
+from api.rate_limiter import rate_limiter
 from bot.bot import active_players_lock
+from bot.poll_scheduler import poll_scheduler
+from gsi.heartbeat import gsi_heartbeats
 from betting.resolver import resolve_match_team_win_bets, check_event_based_bets
 from gsi.handlers import cross_validate_match_detection
+from utils.dm_fanout import queue_direct_messages, deliver_pending_messages
 
 
 logger = logging.getLogger('goodgains_bot')
@@ -19,59 +36,72 @@ def start_tasks(bot):
 
     # Bet resolution
     resolve_bets.start(bot)
+    if MATCH_FEED_ENABLED:
+        follow_match_feed.start(bot)
 
     # Maintenance tasks
     cleanup_stale_matches.start(bot)
     clean_expired_sessions.start(bot)
     maintain_match_caches.start(bot)
+    rollup_telemetry.start(bot)
+    vacuum_database.start(bot)
+    backup_database_online.start(bot)
+    if RATE_LIMITER_PERSIST:
+        snapshot_api_backoff.start(bot)
 
     # User engagement
     send_weekly_summaries.start(bot)
     check_inactive_users.start(bot)
 
 
-@tasks.loop(seconds=15)
-async def check_game_activity(bot):
-    """Check for active Dota 2 games."""
-    await bot.wait_until_ready()
+# When the poll scheduler was last synced with bot.steam_ids_cache (monotonic seconds)
+_last_poll_sync = 0
 
-    try:
-        with get_db_connection() as conn:
-            # Get all registered Steam IDs
-            steam_mappings = conn.execute('SELECT user_id, steam_id FROM steam_mappings').fetchall()
 
-        # Process in small batches to avoid overwhelming the API
-        batch_size = 5
-        for i in range(0, len(steam_mappings), batch_size):
-            batch = steam_mappings[i:i + batch_size]
-            tasks = []
+@tasks.loop(seconds=POLL_TICK_SECONDS)
+async def check_game_activity(bot):
+    """Check due users for active Dota 2 games.
 
-            for mapping in batch:
-                user_id = mapping['user_id']
-                steam_id = mapping['steam_id']
+    Users come off the poll scheduler's heap when their next check is due, at most
+    POLL_MAX_CHECKS_PER_TICK per tick, and are rescheduled according to their state.
+    """
+    global _last_poll_sync
+    await bot.wait_until_ready()
 
-                # Add rate limiting check
-                if user_id in bot.active_players_cache:
-                    last_check = bot.active_players_cache[user_id].get('last_check_time', 0)
-                    current_time = int(datetime.now().timestamp())
+    try:
+        # Pick up registrations and removals from the in-memory Steam ID cache
+        now = time.monotonic()
+        if now - _last_poll_sync >= POLL_SYNC_SECONDS or len(poll_scheduler) != len(bot.steam_ids_cache):
+            poll_scheduler.sync(dict(bot.steam_ids_cache))
+            _last_poll_sync = now
 
-                    # Only check every 60 seconds unless they're not in a match
-                    if current_time - last_check < 60 and 'match_id' in bot.active_players_cache[user_id]:
-                        continue
+        due = poll_scheduler.pop_due(POLL_MAX_CHECKS_PER_TICK)
+        if due:
+            await asyncio.gather(*(_check_and_reschedule(bot, user_id, steam_id) for user_id, steam_id in due))
 
-                tasks.append(check_dota2_match(bot, user_id, steam_id))
+    except Exception as e:
+        logger.error(f"Error in check_game_activity task: {e}")
 
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-                await asyncio.sleep(1)  # Brief pause between batches
 
+async def _check_and_reschedule(bot, user_id, steam_id):
+    in_match = False
+    try:
+        # A live GSI heartbeat already tells us the user's match state; only poll the API once it goes stale
+        if gsi_heartbeats.is_live(user_id):
+            gsi_heartbeats.checks_skipped += 1
+            beat = gsi_heartbeats.get(user_id)
+            in_match = bool(beat and beat[1])
+            return
+        in_match = await check_dota2_match(bot, user_id, steam_id)
     except Exception as e:
-        logger.error(f"Error in check_game_activity task: {e}")
+        logger.error(f"Error checking Dota 2 match for user {user_id}: {e}")
+    finally:
+        poll_scheduler.reschedule(bot, user_id, in_match)
 
 
 async def check_dota2_match(bot, user_id, steam_id):
     """Enhanced check for Dota 2 matches with improved start detection."""
-    from api.dota import get_match_history, get_live_league_games
+    from api.dota import get_match_history
     from utils.notifications import send_match_notification
 
     account_id = int(steam_id) - 76561197960265728  # Convert to Dota 2 account ID
@@ -80,16 +110,15 @@ async def check_dota2_match(bot, user_id, steam_id):
     current_time = int(datetime.now().timestamp())
 
     # Check if user is already tracked in a match
-    with get_db_connection() as conn:
-        current_match = conn.execute(
-            'SELECT match_id, match_start_time FROM active_players WHERE user_id = ?',
-            (user_id,)
-        ).fetchone()
+    current_match = await db.fetchone(
+        'SELECT match_id, match_start_time FROM active_players WHERE user_id = ?',
+        (user_id,)
+    )
 
     if current_match:
         # Validate if the tracked match is truly active
         match_id = current_match['match_id']
-        match_details = await get_match_details(match_id)
+        match_details = await get_tracked_match_details(match_id)
 
         # If match has ended, clean it up
         if match_details and match_details.get('status') == 'completed':
@@ -99,9 +128,7 @@ async def check_dota2_match(bot, user_id, steam_id):
             bot.completed_matches.add(match_id)
             bot.recently_cleaned_matches[match_id] = current_time
 
-            with get_db_connection() as conn:
-                conn.execute('DELETE FROM active_players WHERE user_id = ?', (user_id,))
-                conn.commit()
+            await db.execute('DELETE FROM active_players WHERE user_id = ?', (user_id,))
 
             with active_players_lock:
                 if user_id in bot.active_players_cache:
@@ -114,35 +141,54 @@ async def check_dota2_match(bot, user_id, steam_id):
             return True
 
     # Check if player is in a league match
-    league_games = await get_live_league_games()
-    if league_games:
-        for game in league_games:
-            for player in game.get('players', []):
-                if player.get('account_id') == account_id:
-                    match_id = str(game['match_id'])
-                    team = "team1" if player.get('team', 0) == 0 else "team2"
-
-                    logger.info(f"Found user {user_id} in league match {match_id}")
-                    await update_player_match(bot, user_id, "570", match_id, team, "League Match")
-
-                    # Cross-validate with API
-                    await cross_validate_match_detection(bot, user_id, match_id, 'api')
-                    return True
-
-    # Check recent matches
-    recent_matches = await get_match_history(account_id, 3)
+    league_entry = await league_games.lookup(account_id)
+    if league_entry:
+        match_id, team = league_entry
+
+        logger.info(f"Found user {user_id} in league match {match_id}")
+        await update_player_match(bot, user_id, "570", match_id, team, "League Match")
+
+        # Cross-validate with API
+        await cross_validate_match_detection(bot, user_id, match_id, 'api')
+        return True
+
+    # Check matches newer than this account's history cursor; the newest is the only one that can still be live
+    cursor = await db.fetchone(
+        'SELECT last_match_id, last_start_time, completed FROM match_history_cursors WHERE account_id = ?',
+        (account_id,)
+    )
+    date_min = current_time - 1800  # Only consider recent matches (last 30 minutes)
+    if cursor:
+        date_min = max(date_min, cursor['last_start_time'])
+
+    recent_matches = await get_match_history(account_id, 3, date_min=date_min)
     if recent_matches:
+        newest = max(recent_matches, key=lambda match: match.get('match_id', 0))
+        newest_completed = bool(cursor and cursor['last_match_id'] == newest['match_id'] and cursor['completed'])
+
         for match in recent_matches:
             match_id = str(match.get('match_id'))
             start_time = match.get('start_time', 0)
 
-            # Only consider recent matches (last 30 minutes)
             if current_time - start_time > 1800:  # 30 minutes
                 continue
 
+            # Older than the cursor, or the cursor's match once it has finished: already classified
+            if cursor and (match['match_id'] < cursor['last_match_id'] or
+                           (match['match_id'] == cursor['last_match_id'] and cursor['completed'])):
+                continue
+            if match_id in bot.completed_matches:
+                if match is newest:
+                    newest_completed = True
+                continue
+
             # Check if match is still ongoing
-            match_details = await get_match_details(match_id)
-            if match_details and match_details.get('status') == 'in_progress':
+            match_details = await get_match_details(match_id, PRIORITY_DISCOVERY)
+            if match_details and match_details.get('status') == 'completed':
+                bot.completed_matches.add(match_id)
+                if match is newest:
+                    newest_completed = True
+            elif match_details and match_details.get('status') == 'in_progress':
                 # Determine player's team
                 for player in match.get('players', []):
                     if player.get('account_id') == account_id:
@@ -152,11 +198,31 @@ async def check_dota2_match(bot, user_id, steam_id):
 
                         # Cross-validate with API
                         await cross_validate_match_detection(bot, user_id, match_id, 'api')
+                        await _advance_history_cursor(account_id, cursor, newest, False)
                         return True
 
+        await _advance_history_cursor(account_id, cursor, newest, newest_completed)
+
     return False
 
 
+async def _advance_history_cursor(account_id, cursor, newest, completed):
+    """Move the account's match-history cursor to its newest seen match, if anything changed."""
+    if cursor and (cursor['last_match_id'], bool(cursor['completed'])) == (newest['match_id'], completed):
+        return
+
+    write_queue.enqueue(
+        '''INSERT INTO match_history_cursors (account_id, last_match_id, last_start_time, completed, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (account_id) DO UPDATE SET
+            last_match_id = excluded.last_match_id,
+            last_start_time = excluded.last_start_time,
+            completed = excluded.completed,
+            updated_at = excluded.updated_at''',
+        (account_id, newest['match_id'], newest.get('start_time', 0), completed, now_ms())
+    )
+
+
 async def update_player_match(bot, user_id, game_id, match_id, team, match_type, match_start_time=None):
     """Enhanced update function with better start time detection."""
     # Calculate start time
@@ -165,29 +231,28 @@ async def update_player_match(bot, user_id, game_id, match_id, team, match_type,
 
     try:
         # Check if we're already tracking this match for this user
-        with get_db_connection() as conn:
-            existing_match = conn.execute(
-                'SELECT match_id, match_start_time, game_start_time FROM active_players WHERE user_id = ?',
-                (user_id,)
-            ).fetchone()
-
-            # If already in this exact match, don't update or notify again
-            if existing_match and existing_match['match_id'] == match_id:
-                # Use the most precise start time available
-                precise_start_time = existing_match['game_start_time'] or existing_match['match_start_time']
-
-                # Just update the last check time in the cache
-                with active_players_lock:
-                    if user_id in bot.active_players_cache:
-                        bot.active_players_cache[user_id]['last_check_time'] = current_time
-                        if precise_start_time:
-                            bot.active_players_cache[user_id]['match_start_time'] = precise_start_time
-
-                logger.info(f"User {user_id} already being tracked in match {match_id}, skipping update")
-                return
+        existing_match = await db.fetchone(
+            'SELECT match_id, match_start_time, game_start_time FROM active_players WHERE user_id = ?',
+            (user_id,)
+        )
+
+        # If already in this exact match, don't update or notify again
+        if existing_match and existing_match['match_id'] == match_id:
+            # Use the most precise start time available
+            precise_start_time = existing_match['game_start_time'] or existing_match['match_start_time']
+
+            # Just update the last check time in the cache
+            with active_players_lock:
+                if user_id in bot.active_players_cache:
+                    bot.active_players_cache[user_id]['last_check_time'] = current_time
+                    if precise_start_time:
+                        bot.active_players_cache[user_id]['match_start_time'] = precise_start_time
+
+            logger.info(f"User {user_id} already being tracked in match {match_id}, skipping update")
+            return
 
         # Update database for new match
-        with get_db_connection() as conn:
+        def replace_active_match(conn):
             # First remove any existing active matches for this user
             conn.execute('DELETE FROM active_players WHERE user_id = ?', (user_id,))
 
@@ -196,8 +261,9 @@ async def update_player_match(bot, user_id, game_id, match_id, team, match_type,
                 'INSERT INTO active_players (user_id, game_id, match_id, team, match_start_time, detection_source) VALUES (?, ?, ?, ?, ?, ?)',
                 (user_id, game_id, match_id, team, start_time, 'api')
             )
-            conn.commit()
-            logger.info(f"Database updated for user {user_id} in match {match_id}")
+
+        await db.run(replace_active_match)
+        logger.info(f"Database updated for user {user_id} in match {match_id}")
 
         # Update cache
         current_time = int(datetime.now().timestamp())
@@ -220,37 +286,119 @@ async def update_player_match(bot, user_id, game_id, match_id, team, match_type,
     except Exception as e:
         logger.error(f"Error in update_player_match: {e}")
 
+# match_id -> last time (monotonic) a tracked match was checked against the API while the feed was live
+_feed_backstop_checks = {}
+
+
+async def get_tracked_match_details(match_id):
+    """Match details for a tracked or bet-on match.
+
+    While the sequence feed is keeping up it reports every completion itself, so only the
+    caches are consulted. As a backstop for matches that finished before the feed saw them,
+    each match still gets one API check per MATCH_FEED_BACKSTOP_MINUTES.
+    """
+    if not match_feed.is_live():
+        return await get_match_details(match_id)
+
+    match_details = await get_cached_match_details(match_id)
+    if match_details is None:
+        now = time.monotonic()
+        if now - _feed_backstop_checks.get(match_id, 0) > MATCH_FEED_BACKSTOP_MINUTES * 60:
+            _feed_backstop_checks[match_id] = now
+            match_details = await get_match_details(match_id)
+    return match_details
+
+
+@tasks.loop(seconds=MATCH_FEED_POLL_SECONDS)
+async def follow_match_feed(bot):
+    """Read newly finished matches from the sequence feed and resolve tracked ones immediately."""
+    await bot.wait_until_ready()
+
+    try:
+        def tracked_match_ids(conn):
+            rows = conn.execute(
+                'SELECT match_id FROM bets WHERE resolved = FALSE UNION SELECT match_id FROM active_players'
+            ).fetchall()
+            return {row['match_id'] for row in rows}
+
+        tracked = await db.run(tracked_match_ids, readonly=True)
+        if not tracked:
+            return
+
+        for match_id, match_details in await match_feed.poll(tracked):
+            logger.info(f"Sequence feed: tracked match {match_id} finished, {match_details['winner']} won")
+            bot.completed_matches.add(match_id)
+            await resolve_match_team_win_bets(bot, match_id, match_details['winner'])
+            await check_event_based_bets(bot, match_id)
+    except Exception as e:
+        logger.error(f"Error in follow_match_feed task: {e}")
+
+
 @tasks.loop(minutes=5)
 async def resolve_bets(bot):
-    """Resolve pending bets for matches that have ended."""
+    """Resolve pending bets for matches that have ended.
+
+    Pending matches are written to resolution_queue and worked through with at most
+    RESOLUTION_CONCURRENCY in flight; each match leaves the queue once handled, so a run
+    interrupted by a crash resumes from what is left instead of starting over.
+    """
     await bot.wait_until_ready()
     logger.info("Resolving pending bets...")
 
-    with get_db_connection() as conn:
+    def load_queue(conn):
+        queued = conn.execute('SELECT match_id FROM resolution_queue ORDER BY enqueued_at').fetchall()
+        if queued:
+            return [row['match_id'] for row in queued], True
+
         # Get distinct match IDs with unresolved bets
-        pending_matches = conn.execute(
-            'SELECT DISTINCT match_id FROM bets WHERE resolved = FALSE'
-        ).fetchall()
+        conn.execute(
+            'INSERT OR IGNORE INTO resolution_queue (match_id, enqueued_at) '
+            'SELECT DISTINCT match_id, ? FROM bets WHERE resolved = FALSE',
+            (now_ms(),)
+        )
+        return [row['match_id'] for row in conn.execute('SELECT match_id FROM resolution_queue').fetchall()], False
 
-        for match in pending_matches:
-            match_id = match['match_id']
+    try:
+        match_ids, resumed = await db.run(load_queue)
+    except Exception as e:
+        logger.error(f"Error loading bet resolution queue: {e}")
+        return
 
-            # Skip legacy synthetic matches
-            if match_id.startswith("dota_") or match_id.startswith("sim_"):
-                logger.warning(f"Found legacy synthetic match ID {match_id} - skipping automatic resolution")
-                continue
+    if resumed:
+        logger.info(f"Resuming interrupted bet resolution run with {len(match_ids)} matches left")
 
-            # Check if match has concluded
-            match_details = await get_match_details(match_id)
+    semaphore = asyncio.Semaphore(RESOLUTION_CONCURRENCY)
 
-            if match_details and match_details.get('status') == 'completed':
-                winning_team = match_details.get('winner')
+    async def resolve_one(match_id):
+        async with semaphore:
+            try:
+                await _resolve_match(bot, match_id)
+            except Exception as e:
+                logger.error(f"Error resolving bets for match {match_id}: {e}")
+            finally:
+                write_queue.enqueue('DELETE FROM resolution_queue WHERE match_id = ?', (match_id,))
 
-                if winning_team:
-                    await resolve_match_team_win_bets(bot, match_id, winning_team)
+    await asyncio.gather(*(resolve_one(match_id) for match_id in match_ids))
 
-            # Check for event-based bets (first_blood, mvp, etc.)
-            await check_event_based_bets(bot, match_id)
+
+async def _resolve_match(bot, match_id):
+    """Settle whatever can be settled for one match."""
+    # Skip legacy synthetic matches
+    if match_id.startswith("dota_") or match_id.startswith("sim_"):
+        logger.warning(f"Found legacy synthetic match ID {match_id} - skipping automatic resolution")
+        return
+
+    # Check if match has concluded
+    match_details = await get_tracked_match_details(match_id)
+
+    if match_details and match_details.get('status') == 'completed':
+        winning_team = match_details.get('winner')
+
+        if winning_team:
+            await resolve_match_team_win_bets(bot, match_id, winning_team)
+
+    # Check for event-based bets (first_blood, mvp, etc.)
+    await check_event_based_bets(bot, match_id)
 
 
 @tasks.loop(minutes=10)
@@ -262,67 +410,60 @@ async def cleanup_stale_matches(bot):
     current_time = int(datetime.now().timestamp())
     MAX_MATCH_DURATION = 7200  # 2 hours in seconds
 
-    with get_db_connection() as conn:
-        active_players = conn.execute(
-            'SELECT user_id, match_id, match_start_time FROM active_players'
-        ).fetchall()
+    active_players = await db.fetchall(
+        'SELECT user_id, match_id, match_start_time FROM active_players'
+    )
 
+    # Group tracked players by match, so party stacks cost one lookup and one message
+    matches = {}
     for player in active_players:
-        user_id = player['user_id']
-        match_id = player['match_id']
-        match_start_time = player['match_start_time']
+        matches.setdefault(player['match_id'], []).append(player)
+
+    for match_id, players in matches.items():
+        user_ids = [player['user_id'] for player in players]
+        mentions = ", ".join(f"<@{user_id}>" for user_id in user_ids)
 
         # First check absolute match duration - force cleanup if too old
-        match_duration = current_time - match_start_time
+        match_duration = current_time - min(player['match_start_time'] for player in players)
         if match_duration > MAX_MATCH_DURATION:
-            logger.info(f"Cleanup: Match {match_id} for user {user_id} exceeded maximum duration")
-
-            # Remove from database
-            with get_db_connection() as conn:
-                conn.execute('DELETE FROM active_players WHERE user_id = ?', (user_id,))
-                conn.commit()
-
-            # Remove from cache
-            with active_players_lock:
-                if user_id in bot.active_players_cache:
-                    del bot.active_players_cache[user_id]
-
-            # Notify log channel
-            try:
-                await bot.get_channel(bot.log_channel_id).send(
-                    f"⏱️ <@{user_id}>'s match {match_id} has been automatically closed after exceeding maximum duration."
-                )
-            except Exception as e:
-                logger.error(f"Failed to send cleanup notification: {e}")
-
+            logger.info(f"Cleanup: Match {match_id} for users {user_ids} exceeded maximum duration")
+            await _remove_match_players(bot, match_id)
+            await _send_cleanup_notification(
+                bot, f"⏱️ Match {match_id} ({mentions}) has been automatically closed after exceeding maximum duration."
+            )
             continue  # Skip further validation
 
         # For matches within reasonable duration, check if they're actually active
-        match_details = await get_match_details(match_id)
+        match_details = await get_tracked_match_details(match_id)
 
         if match_details and match_details.get('status') == 'completed':
-            logger.info(f"Cleanup: Match {match_id} for user {user_id} is no longer active")
+            logger.info(f"Cleanup: Match {match_id} for users {user_ids} is no longer active")
 
             # Add to completed matches set
             bot.completed_matches.add(match_id)
 
-            # Remove from database
-            with get_db_connection() as conn:
-                conn.execute('DELETE FROM active_players WHERE user_id = ?', (user_id,))
-                conn.commit()
+            await _remove_match_players(bot, match_id)
+            await _send_cleanup_notification(
+                bot, f"🏁 {mentions} {'is' if len(user_ids) == 1 else 'are'} no longer in match {match_id} "
+                     f"(detected during cleanup)."
+            )
 
-            # Remove from cache
-            with active_players_lock:
-                if user_id in bot.active_players_cache:
-                    del bot.active_players_cache[user_id]
 
-            # Notify log channel
-            try:
-                await bot.get_channel(bot.log_channel_id).send(
-                    f"🏁 <@{user_id}> is no longer in match {match_id} (detected during cleanup)."
-                )
-            except Exception as e:
-                logger.error(f"Failed to send cleanup notification: {e}")
+async def _remove_match_players(bot, match_id):
+    """Stop tracking everyone in a match: one bulk delete, then one pass over the cache."""
+    await db.execute('DELETE FROM active_players WHERE match_id = ?', (match_id,))
+
+    with active_players_lock:
+        for user_id in [user_id for user_id, entry in bot.active_players_cache.items()
+                        if entry.get('match_id') == match_id]:
+            del bot.active_players_cache[user_id]
+
+
+async def _send_cleanup_notification(bot, message):
+    try:
+        await bot.get_channel(bot.log_channel_id).send(message)
+    except Exception as e:
+        logger.error(f"Failed to send cleanup notification: {e}")
 
 
 @tasks.loop(minutes=15)
@@ -331,75 +472,62 @@ async def clean_expired_sessions(bot):
     await bot.wait_until_ready()
     logger.info("Cleaning expired wallet sessions...")
 
-    with get_db_connection() as conn:
-        # Find sessions older than 24 hours
-        cutoff = datetime.now() - timedelta(hours=24)
-        conn.execute(
-            'DELETE FROM wallet_sessions WHERE last_active < ? AND connected = FALSE',
-            (cutoff.isoformat(),)
-        )
-        conn.commit()
+    # Find sessions older than 24 hours
+    cutoff = datetime.now() - timedelta(hours=24)
+    await db.execute(
+        'DELETE FROM wallet_sessions WHERE last_active < ? AND connected = FALSE',
+        (to_ms(cutoff),)
+    )
 
     # Reload caches
-    bot.reload_caches()
+    await bot.refresh_caches()
+
+
+def format_weekly_summary(stats, start_date, end_date):
+    """Build the weekly summary DM from one weekly_summaries row."""
+    profit = (stats['total_winnings'] or 0) - (stats['total_wagered'] or 0)
+    win_rate = (stats['wins'] / stats['total_bets'] * 100) if stats['total_bets'] > 0 else 0
+
+    return (
+        f"📊 **Your Weekly Betting Summary**\n\n"
+        f"**Period:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}\n\n"
+        f"**Activity:**\n"
+        f"• Total Bets: {stats['total_bets']}\n"
+        f"• Win Rate: {win_rate:.1f}%\n"
+        f"• Amount Wagered: {stats['total_wagered']:.4f} ETH\n"
+        f"• Profit/Loss: {profit:+.4f} ETH\n\n"
+        f"Keep up the good work! Remember to check `/profile` for your all-time stats."
+    )
 
 
 @tasks.loop(hours=24 * 7)  # Run once a week
 async def send_weekly_summaries(bot):
-    """Send weekly betting summaries to active users."""
+    """Send weekly betting summaries to users who bet this week.
+
+    The summaries are computed in one grouped query and written to the DM outbox under a
+    per-week job key, then delivered by the throttled fan-out. A restart mid-run resumes the
+    unsent messages instead of regenerating the week or messaging anyone twice.
+    """
     await bot.wait_until_ready()
     logger.info("Sending weekly summaries...")
 
     # Get date range for past week
     end_date = datetime.now()
     start_date = end_date - timedelta(days=7)
+    job = f"weekly_summary:{end_date.strftime('%G-W%V')}"
 
-    with get_db_connection() as conn:
-        # Find users who placed bets in the last month (to avoid messaging inactive users)
-        active_users = conn.execute(
-            '''SELECT DISTINCT user_id FROM bets 
-            WHERE placed_at > ?''',
-            ((end_date - timedelta(days=30)).isoformat(),)
-        ).fetchall()
-
-        for user in active_users:
-            user_id = user['user_id']
-
-            # Get weekly stats
-            weekly_stats = conn.execute(
-                '''SELECT 
-                    COUNT(*) AS total_bets,
-                    SUM(amount) AS total_wagered,
-                    SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins,
-                    SUM(payout) AS total_winnings
-                FROM bets 
-                WHERE user_id = ? AND placed_at BETWEEN ? AND ?''',
-                (user_id, start_date.isoformat(), end_date.isoformat())
-            ).fetchone()
-
-            # Skip users with no activity this week
-            if weekly_stats['total_bets'] == 0:
-                continue
+    summaries = await db.run(weekly_summaries, floor_ms(to_ms(start_date), DAY_MS), readonly=True)
+    queued = await queue_direct_messages(
+        job, [(row['user_id'], format_weekly_summary(row, start_date, end_date)) for row in summaries]
+    )
+    if queued:
+        logger.info(f"Queued weekly summaries for {len(summaries)} users ({job})")
 
-            # Calculate profit/loss
-            profit = (weekly_stats['total_winnings'] or 0) - (weekly_stats['total_wagered'] or 0)
-            win_rate = (weekly_stats['wins'] / weekly_stats['total_bets'] * 100) if weekly_stats[
-                                                                                        'total_bets'] > 0 else 0
-
-            # Format and send the message
-            message = (
-                f"📊 **Your Weekly Betting Summary**\n\n"
-                f"**Period:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}\n\n"
-                f"**Activity:**\n"
-                f"• Total Bets: {weekly_stats['total_bets']}\n"
-                f"• Win Rate: {win_rate:.1f}%\n"
-                f"• Amount Wagered: {weekly_stats['total_wagered']:.4f} ETH\n"
-                f"• Profit/Loss: {profit:+.4f} ETH\n\n"
-                f"Keep up the good work! Remember to check `/profile` for your all-time stats."
-            )
+    sent = await deliver_pending_messages(bot)
+    logger.info(f"Sent {sent} queued DMs")
 
-            await bot.send_direct_message(user_id, message)
-            logger.info(f"Sent weekly summary to user {user_id}")
+    # Keep a month of messages so a re-run of the same week is still recognised
+    write_queue.enqueue('DELETE FROM dm_outbox WHERE queued_at < ?', (now_ms() - 30 * DAY_MS,))
 
 
 @tasks.loop(hours=24)
@@ -409,41 +537,38 @@ async def check_inactive_users(bot):
     logger.info("Checking for inactive users...")
 
     # Define inactivity threshold (14 days)
-    threshold = (datetime.now() - timedelta(days=14)).isoformat()
-
-    with get_db_connection() as conn:
-        # Find previously active users who haven't bet recently
-        inactive_users = conn.execute(
-            '''SELECT user_id, MAX(placed_at) as last_bet,
-                (SELECT COUNT(*) FROM bets WHERE user_id = b.user_id) as total_bets
-            FROM bets b
-            GROUP BY user_id
-            HAVING MAX(placed_at) < ? AND total_bets > 3''',
-            (threshold,)
-        ).fetchall()
-
-        for user in inactive_users:
-            # Check if they're a regular user worth reminding (placed several bets)
-            if user['total_bets'] < 3:
-                continue
-
-            # Calculate days since last activity
-            last_bet_date = datetime.fromisoformat(user['last_bet'])
-            days_inactive = (datetime.now() - last_bet_date).days
-
-            # Send personalized reminder
-            message = (
-                f"👋 **We Miss You!**\n\n"
-                f"It's been **{days_inactive} days** since your last bet. We hope you'll join us again soon!\n\n"
-                f"**What's new:**\n"
-                f"• Several users won big recently\n"
-                f"• Betting mechanisms have been optimized\n"
-                f"• New types of bets coming soon\n\n"
-                f"Ready to jump back in? Use `/check_match` next time you're playing Dota 2!"
-            )
+    threshold = to_ms(datetime.now() - timedelta(days=14))
+
+    # Find previously active users who haven't bet recently
+    inactive_users = await db.fetchall(
+        '''SELECT user_id, last_bet_at as last_bet, total_bets
+        FROM user_stats
+        WHERE last_bet_at < ? AND total_bets > 3''',
+        (threshold,)
+    )
+
+    for user in inactive_users:
+        # Check if they're a regular user worth reminding (placed several bets)
+        if user['total_bets'] < 3:
+            continue
+
+        # Calculate days since last activity
+        last_bet_date = from_ms(user['last_bet'])
+        days_inactive = (datetime.now() - last_bet_date).days
+
+        # Send personalized reminder
+        message = (
+            f"👋 **We Miss You!**\n\n"
+            f"It's been **{days_inactive} days** since your last bet. We hope you'll join us again soon!\n\n"
+            f"**What's new:**\n"
+            f"• Several users won big recently\n"
+            f"• Betting mechanisms have been optimized\n"
+            f"• New types of bets coming soon\n\n"
+            f"Ready to jump back in? Use `/check_match` next time you're playing Dota 2!"
+        )
 
-            await bot.send_direct_message(user['user_id'], message)
-            logger.info(f"Sent inactivity reminder to user {user['user_id']} ({days_inactive} days inactive)")
+        await bot.send_direct_message(user['user_id'], message)
+        logger.info(f"Sent inactivity reminder to user {user['user_id']} ({days_inactive} days inactive)")
 
 
 @tasks.loop(minutes=30)
@@ -468,4 +593,72 @@ async def maintain_match_caches(bot):
         # Convert to list, sort by time added (if available), and keep most recent
         bot.completed_matches = set(list(bot.completed_matches)[-2000:])
 
-    logger.info(f"Maintenance: Removed {removed} old entries from recently_cleaned_matches")
\ No newline at end of file
+    # Drop expired match details from the coalescing cache, and bound the on-disk one
+    from api.dota import prune_match_details_cache
+    from api.steam import prune_player_summary_cache
+    from database.match_cache import evict_match_cache
+    pruned = prune_match_details_cache()
+    pruned_summaries = prune_player_summary_cache()
+
+    # Forget backstop checks for matches we no longer need to look at
+    backstop_cutoff = time.monotonic() - MATCH_FEED_BACKSTOP_MINUTES * 60
+    for match_id in [m for m, checked in _feed_backstop_checks.items() if checked < backstop_cutoff]:
+        del _feed_backstop_checks[match_id]
+    try:
+        await db.run(evict_match_cache)
+    except Exception as e:
+        logger.error(f"Error evicting match details cache: {e}")
+
+    logger.info(f"Maintenance: Removed {removed} old entries from recently_cleaned_matches, "
+                f"{pruned} expired match details, {pruned_summaries} expired player summaries")
+
+
+@tasks.loop(hours=1)
+async def rollup_telemetry(bot):
+    """Roll raw GSI telemetry up into hourly summaries and prune rows past their TTL."""
+    await bot.wait_until_ready()
+    logger.info("Rolling up GSI telemetry...")
+
+    try:
+        # Commit queued telemetry first so the rollup doesn't move its watermark past it
+        await write_queue.flush_async()
+        await db.run(rollup_and_prune)
+    except Exception as e:
+        logger.error(f"Error in rollup_telemetry task: {e}")
+
+
+@tasks.loop(time=dt_time(hour=VACUUM_HOUR_UTC, tzinfo=timezone.utc))
+async def vacuum_database(bot):
+    """Reclaim free pages off-peak with an incremental vacuum."""
+    await bot.wait_until_ready()
+    logger.info("Running incremental vacuum...")
+
+    try:
+        await db.run(run_incremental_vacuum)
+    except Exception as e:
+        logger.error(f"Error in vacuum_database task: {e}")
+
+
+@tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+async def backup_database_online(bot):
+    """Take an online backup of the database without pausing writers."""
+    await bot.wait_until_ready()
+    logger.info("Backing up database...")
+
+    try:
+        # Runs on its own thread and connection so the DB reader/writer threads stay free
+        await asyncio.to_thread(backup_database)
+    except Exception as e:
+        logger.error(f"Error in backup_database_online task: {e}")
+
+
+@tasks.loop(minutes=5)
+async def snapshot_api_backoff(bot):
+    """Save API backoff state so a restart doesn't hammer endpoints that are already failing."""
+    await bot.wait_until_ready()
+
+    try:
+        # Copy the state on the event loop, where it's mutated, then write it on the DB thread
+        await db.run(save_backoff_state, rate_limiter.export_state())
+    except Exception as e:
+        logger.error(f"Error in snapshot_api_backoff task: {e}")
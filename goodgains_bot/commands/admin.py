@@ -1,10 +1,21 @@
 import discord
 from discord import app_commands
+import asyncio
 import logging
+import json
 import psutil
-from datetime import datetime
-from database.connection import get_db_connection
+from io import BytesIO
+from datetime import datetime, timedelta
+from config import DM_FANOUT_PER_SECOND, DM_FANOUT_CONCURRENCY, DM_MAX_ATTEMPTS
+from database.async_db import db
+from database.write_queue import write_queue
+from database.query_stats import query_stats
+from database.backup import backup_database
+from database.retention import count_recent_gsi_packets
+from database.user_stats import rebuild_user_stats, find_stats_drift, weekly_summaries
 from bot.bot import active_players_lock
+from utils.dm_fanout import estimate_fanout_seconds
+from utils.timestamps import DAY_MS, now_ms, to_ms, floor_ms
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -22,17 +33,38 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=True)
 
         # Gather statistics
-        with get_db_connection() as conn:
+        def gather_counts(conn):
             active_matches = conn.execute('SELECT COUNT(*) as count FROM active_players').fetchone()['count']
             pending_bets = conn.execute('SELECT COUNT(*) as count FROM bets WHERE resolved = FALSE').fetchone()['count']
             user_count = conn.execute('SELECT COUNT(DISTINCT user_id) as count FROM steam_mappings').fetchone()['count']
             wallet_count = \
             conn.execute('SELECT COUNT(*) as count FROM wallet_sessions WHERE connected = TRUE').fetchone()['count']
+            return active_matches, pending_bets, user_count, wallet_count
+
+        active_matches, pending_bets, user_count, wallet_count = await db.run(gather_counts, readonly=True)
 
         # Check API status
         from api.steam import check_api_health
         steam_api_status = "✅ Working" if await check_api_health() else "⚠️ Issues detected"
 
+        from api.dota import get_match_details_stats
+        from api.scheduler import scheduler
+        from api.circuit_breaker import breaker_stats
+        from bot.poll_scheduler import poll_scheduler
+        poll_stats = poll_scheduler.stats()
+        from gsi.heartbeat import gsi_heartbeats
+        gsi_stats = gsi_heartbeats.stats()
+        match_stats = get_match_details_stats()
+        open_circuits = [family for family, entry in breaker_stats().items() if entry['state'] != 'closed']
+
+        scheduler_lines = []
+        for host, classes in scheduler.stats().items():
+            summary = ", ".join(
+                f"{name} {entry['queued']} queued/{entry['avg_wait_ms']:.0f}ms avg/{entry['max_wait_ms']:.0f}ms max"
+                for name, entry in classes.items()
+            )
+            scheduler_lines.append(f"**API Queue ({host}):** {summary}\n")
+
         # Memory usage
         process = psutil.Process()
         memory_usage = process.memory_info().rss / 1024 / 1024  # MB
@@ -47,11 +79,81 @@ def register_commands(bot):
             f"**Steam API:** {steam_api_status}\n"
             f"**Memory Usage:** {memory_usage:.2f} MB\n"
             f"**Uptime:** {bot.get_uptime()}\n"
-            f"**API Rate Limits:** {len(bot.api_limiter.failures)} failures tracked\n"
+            f"**API Rate Limits:** {len(bot.api_limiter)} failures tracked\n"
+            f"**Match Details:** {match_stats['requests']} requests, {match_stats['fetches']} API calls "
+            f"({match_stats['cache_hits']} cached, {match_stats['disk_hits']} from disk, "
+            f"{match_stats['coalesced']} coalesced, "
+            f"{match_stats['dedup_ratio']:.0%} deduplicated)\n"
+            f"**Match Polling:** {poll_stats['users']} users, {poll_stats['due']} due, "
+            f"lag {poll_stats['sweep_lag']:.1f}s, staleness p50 {poll_stats['staleness_p50']:.0f}s / "
+            f"max {poll_stats['staleness_max']:.0f}s\n"
+            f"**GSI Heartbeats:** {gsi_stats['live']} live of {gsi_stats['tracked']}, "
+            f"{gsi_stats['checks_skipped']} API checks skipped\n"
+            f"**API Circuits:** {', '.join(open_circuits) + ' open' if open_circuits else 'all closed'}\n"
+            + "".join(scheduler_lines)
         )
 
         await interaction.followup.send(status_message)
 
+    @bot.tree.command(name="db_stats", description="Show database statement timings (admin only)")
+    @app_commands.describe(
+        limit="How many of the most expensive statements to list",
+        as_json="Attach the full statistics and slow-query log as JSON"
+    )
+    async def db_stats(interaction: discord.Interaction, limit: int = 10, as_json: bool = False):
+        """Show per-statement call counts and latency percentiles, busiest first."""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        statements = query_stats.snapshot()
+        slow_count = len(query_stats.slow_queries())
+
+        lines = []
+        for fingerprint, entry in list(statements.items())[:max(1, limit)]:
+            lines.append(
+                f"`{fingerprint[:90]}`\n"
+                f"  {entry['calls']} calls, {entry['total_ms']:.1f} ms total, "
+                f"p50/p95/p99 {entry['p50_ms']:.2f}/{entry['p95_ms']:.2f}/{entry['p99_ms']:.2f} ms, {entry['rows']} rows"
+            )
+
+        message = (
+            "🗄️ **Database Statements**\n\n" +
+            ("\n".join(lines) if lines else "No statements recorded yet.") +
+            f"\n\n**Slow queries logged:** {slow_count} (threshold {query_stats.slow_ms:g} ms)"
+        )
+
+        # Discord caps messages at 2000 characters
+        if len(message) > 1900:
+            message = message[:1900] + "\n…"
+
+        if as_json:
+            dump = BytesIO(json.dumps(query_stats.dump(), indent=2).encode())
+            await interaction.followup.send(message, file=discord.File(dump, filename="query_stats.json"))
+        else:
+            await interaction.followup.send(message)
+
+    @bot.tree.command(name="backup_db", description="Admin-only: Take an online database backup now")
+    async def backup_db(interaction: discord.Interaction):
+        """Back up the live database without pausing bet placement."""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            path = await asyncio.to_thread(backup_database)
+        except Exception as e:
+            logger.error(f"Manual database backup failed: {e}")
+            await interaction.followup.send(f"❌ Backup failed: {e}")
+            return
+
+        await interaction.followup.send(f"✅ Database backed up to `{path}`.")
+        logger.info(f"Admin {interaction.user.id} took a database backup: {path}")
+
     @bot.tree.command(name="clean_synthetic_matches", description="Admin-only: Clean up legacy synthetic matches")
     async def clean_synthetic_matches(interaction: discord.Interaction):
         """Remove all synthetic matches from the database."""
@@ -61,18 +163,14 @@ def register_commands(bot):
 
         await interaction.response.defer(ephemeral=True)
 
-        with get_db_connection() as conn:
+        def remove_synthetic_matches(conn):
             # Find all synthetic matches
             synthetic_matches = conn.execute(
                 "SELECT match_id FROM active_players WHERE match_id LIKE 'dota_%' OR match_id LIKE 'sim_%'"
             ).fetchall()
 
             if not synthetic_matches:
-                await interaction.followup.send("✅ No synthetic matches found in the database.")
-                return
-
-            match_count = len(synthetic_matches)
-            match_ids = [match['match_id'] for match in synthetic_matches]
+                return synthetic_matches, None
 
             # Remove from active_players
             conn.execute(
@@ -84,12 +182,25 @@ def register_commands(bot):
                 "SELECT COUNT(*) as count FROM bets WHERE (match_id LIKE 'dota_%' OR match_id LIKE 'sim_%') AND resolved = FALSE"
             ).fetchone()
 
+            affected_users = [row['user_id'] for row in conn.execute(
+                "SELECT DISTINCT user_id FROM bets WHERE match_id LIKE 'dota_%' OR match_id LIKE 'sim_%'"
+            ).fetchall()]
+
             # Mark all bets on synthetic matches as resolved with no winner
             conn.execute(
                 "UPDATE bets SET resolved = TRUE, won = FALSE, payout = 0 WHERE match_id LIKE 'dota_%' OR match_id LIKE 'sim_%'"
             )
+            rebuild_user_stats(conn, affected_users)
+            return synthetic_matches, unresolved_bets
+
+        synthetic_matches, unresolved_bets = await db.run(remove_synthetic_matches)
+
+        if not synthetic_matches:
+            await interaction.followup.send("✅ No synthetic matches found in the database.")
+            return
 
-            conn.commit()
+        match_count = len(synthetic_matches)
+        match_ids = [match['match_id'] for match in synthetic_matches]
 
         await interaction.followup.send(
             f"✅ Cleaned up {match_count} synthetic matches:\n" +
@@ -120,12 +231,10 @@ def register_commands(bot):
             await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
             return
 
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO match_events (match_id, event_type, event_target, event_time) VALUES (?, ?, ?, ?)',
-                (match_id, event_type, target, int(datetime.now().timestamp()))
-            )
-            conn.commit()
+        await db.execute(
+            'INSERT OR REPLACE INTO match_events (match_id, event_type, event_target, event_time) VALUES (?, ?, ?, ?)',
+            (match_id, event_type, target, now_ms())
+        )
 
         await interaction.response.send_message(
             f"✅ Recorded {event_type} event for match {match_id}: {target}",
@@ -171,12 +280,10 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=False)
 
         # Record the winner event
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO match_events (match_id, event_type, event_target, event_time) VALUES (?, ?, ?, ?)',
-                (match_id, "winner", winner, int(datetime.now().timestamp()))
-            )
-            conn.commit()
+        await db.execute(
+            'INSERT OR REPLACE INTO match_events (match_id, event_type, event_target, event_time) VALUES (?, ?, ?, ?)',
+            (match_id, "winner", winner, now_ms())
+        )
 
         # Resolve the match bets
         from betting.resolver import resolve_match_team_win_bets
@@ -215,24 +322,13 @@ def register_commands(bot):
         else:
             ngrok_status = "❌ Not running"
 
-        # Check database for recent GSI activity
-        with get_db_connection() as conn:
-            # Check for GSI connections
-            conn_exists = False
-            for table in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall():
-                if table[0] == 'gsi_connections':
-                    conn_exists = True
-                    break
-
-            if conn_exists:
-                thirty_min_ago = (datetime.now() - timedelta(minutes=30)).isoformat()
-                recent_gsi = conn.execute(
-                    'SELECT COUNT(*) as count FROM gsi_connections WHERE user_id = ? AND timestamp > ?',
-                    (user_id, thirty_min_ago)
-                ).fetchone()
-
-                if recent_gsi and recent_gsi['count'] > 0:
-                    gsi_status = f"✅ Working (received {recent_gsi['count']} updates in last 30 minutes)"
+        # Check database for recent GSI activity, including packets still in the write queue
+        await write_queue.flush_async()
+        thirty_min_ago = datetime.now() - timedelta(minutes=30)
+        recent_count = await db.run(count_recent_gsi_packets, user_id, thirty_min_ago, readonly=True)
+
+        if recent_count > 0:
+            gsi_status = f"✅ Working (received {recent_count} updates recently)"
 
         # Build response
         response = (
@@ -256,5 +352,80 @@ def register_commands(bot):
 
         await interaction.followup.send(response)
 
+    @bot.tree.command(name="rebuild_stats", description="Admin-only: Recompute betting stats from the bets table")
+    async def rebuild_stats(interaction: discord.Interaction):
+        """Rebuild the per-user betting stats tables from scratch."""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        rebuilt = await db.run(rebuild_user_stats)
+
+        await interaction.followup.send(f"✅ Rebuilt betting stats for {rebuilt} users.")
+        logger.info(f"Admin {interaction.user.id} rebuilt betting stats for {rebuilt} users")
+
+    @bot.tree.command(name="check_stats", description="Admin-only: Check betting stats against the bets table")
+    @app_commands.describe(fix="Rebuild the stats of any users that are out of sync")
+    async def check_stats(interaction: discord.Interaction, fix: bool = False):
+        """Report users whose stored betting stats have drifted from their bets."""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        drifted = await db.run(find_stats_drift, readonly=True)
+
+        if not drifted:
+            await interaction.followup.send("✅ Betting stats are consistent with the bets table.")
+            return
+
+        message = (
+            f"⚠️ Stats are out of sync for {len(drifted)} users:\n" +
+            ", ".join(str(user_id) for user_id in drifted[:20]) +
+            (f" ...and {len(drifted) - 20} more" if len(drifted) > 20 else "")
+        )
+
+        if fix:
+            await db.run(rebuild_user_stats, drifted)
+            message += "\n\n✅ Rebuilt stats for these users."
+
+        await interaction.followup.send(message)
+        logger.warning(f"Betting stats drift found for {len(drifted)} users (fixed: {fix})")
+
+    @bot.tree.command(name="weekly_summary_dry_run",
+                      description="Admin-only: Estimate how long the weekly summary DMs take to send")
+    @app_commands.describe(user_count="Estimate for this many users instead of this week's actual count")
+    async def weekly_summary_dry_run(interaction: discord.Interaction, user_count: int = None):
+        """Report the weekly summary recipient count and expected delivery time without sending anything."""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ This command is for administrators only.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        if user_count is None:
+            since_day = floor_ms(to_ms(datetime.now() - timedelta(days=7)), DAY_MS)
+            user_count = len(await db.run(weekly_summaries, since_day, readonly=True))
+
+        outbox = await db.fetchone(
+            '''SELECT
+                SUM(CASE WHEN attempts < ? THEN 1 ELSE 0 END) AS waiting,
+                SUM(CASE WHEN attempts >= ? THEN 1 ELSE 0 END) AS failed
+            FROM dm_outbox WHERE sent_at IS NULL''',
+            (DM_MAX_ATTEMPTS, DM_MAX_ATTEMPTS)
+        )
+        seconds = estimate_fanout_seconds(user_count)
+
+        await interaction.followup.send(
+            f"📊 Weekly summary dry run: {user_count} recipients, "
+            f"about {timedelta(seconds=round(seconds))} to deliver "
+            f"({DM_FANOUT_PER_SECOND}/s, {DM_FANOUT_CONCURRENCY} concurrent).\n"
+            f"{outbox['waiting'] or 0} DMs are waiting in the outbox, "
+            f"{outbox['failed'] or 0} failed after {DM_MAX_ATTEMPTS} attempts."
+        )
+
     logger.info("Admin commands registered")
     return bot
\ No newline at end of file
@@ -2,7 +2,7 @@ import discord
 from discord import app_commands
 import logging
 from datetime import datetime
-from database.connection import get_db_connection
+from database.async_db import db
 from betting.bets import place_team_win_bet, place_first_blood_bet, place_mvp_bet, check_betting_window
 from utils.notifications import send_bet_confirmation
 
@@ -22,11 +22,10 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=True)
 
         # Check if user is in a game
-        with get_db_connection() as conn:
-            active_player = conn.execute(
-                'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ?',
-                (user_id,)
-            ).fetchone()
+        active_player = await db.fetchone(
+            'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ?',
+            (user_id,)
+        )
 
         if not active_player:
             await interaction.followup.send("❌ You must be actively playing a game to place a bet.")
@@ -44,11 +43,10 @@ def register_commands(bot):
             return
 
         # Check if user has connected wallet
-        with get_db_connection() as conn:
-            wallet_session = conn.execute(
-                'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
+        wallet_session = await db.fetchone(
+            'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
         if not wallet_session:
             await interaction.followup.send("❌ Connect your wallet with `/connect_wallet` first.")
@@ -74,11 +72,10 @@ def register_commands(bot):
             )
 
             # Notify other bettors
-            with get_db_connection() as conn:
-                other_bettors = conn.execute(
-                    'SELECT DISTINCT user_id FROM bets WHERE match_id = ? AND user_id != ?',
-                    (match_id, user_id)
-                ).fetchall()
+            other_bettors = await db.fetchall(
+                'SELECT DISTINCT user_id FROM bets WHERE match_id = ? AND user_id != ?',
+                (match_id, user_id)
+            )
 
             if other_bettors:
                 # Get the username of the new bettor
@@ -111,11 +108,10 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=True)
 
         # Check if user is in a Dota 2 game specifically
-        with get_db_connection() as conn:
-            active_player = conn.execute(
-                'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ? AND game_id = "570"',
-                (user_id,)
-            ).fetchone()
+        active_player = await db.fetchone(
+            'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ? AND game_id = "570"',
+            (user_id,)
+        )
 
         if not active_player:
             await interaction.followup.send("❌ You must be actively playing Dota 2 to place this bet.")
@@ -128,11 +124,10 @@ def register_commands(bot):
             return
 
         # Check if user has connected wallet
-        with get_db_connection() as conn:
-            wallet_session = conn.execute(
-                'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
+        wallet_session = await db.fetchone(
+            'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
         if not wallet_session:
             await interaction.followup.send("❌ Connect your wallet with `/connect_wallet` first.")
@@ -171,11 +166,10 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=True)
 
         # Check if user is in a Dota 2 game specifically
-        with get_db_connection() as conn:
-            active_player = conn.execute(
-                'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ? AND game_id = "570"',
-                (user_id,)
-            ).fetchone()
+        active_player = await db.fetchone(
+            'SELECT game_id, match_id, team, match_start_time FROM active_players WHERE user_id = ? AND game_id = "570"',
+            (user_id,)
+        )
 
         if not active_player:
             await interaction.followup.send("❌ You must be actively playing Dota 2 to place this bet.")
@@ -188,11 +182,10 @@ def register_commands(bot):
             return
 
         # Check if user has connected wallet
-        with get_db_connection() as conn:
-            wallet_session = conn.execute(
-                'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
+        wallet_session = await db.fetchone(
+            'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
         if not wallet_session:
             await interaction.followup.send("❌ Connect your wallet with `/connect_wallet` first.")
@@ -4,7 +4,7 @@ import logging
 from io import BytesIO
 import json
 from api.steam import extract_steam_id_from_url, resolve_vanity_url
-from database.connection import get_db_connection
+from database.async_db import db
 from gsi.parser import generate_gsi_config
 from config import NGROK_ENABLED
 
@@ -118,12 +118,10 @@ def register_commands(bot):
                 return
 
         # Save to database
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO steam_mappings (user_id, steam_id) VALUES (?, ?)',
-                (user_id, steam_id)
-            )
-            conn.commit()
+        await db.execute(
+            'INSERT OR REPLACE INTO steam_mappings (user_id, steam_id) VALUES (?, ?)',
+            (user_id, steam_id)
+        )
 
         # Update cache
         bot.steam_ids_cache[user_id] = steam_id
@@ -204,7 +202,7 @@ def register_commands(bot):
 
         await interaction.response.defer(ephemeral=True)
 
-        with get_db_connection() as conn:
+        def clear_active_match(conn):
             # Get current active match info before deletion
             match_info = conn.execute(
                 'SELECT match_id, team FROM active_players WHERE user_id = ?',
@@ -216,7 +214,9 @@ def register_commands(bot):
                 'DELETE FROM active_players WHERE user_id = ?',
                 (user_id,)
             ).rowcount > 0
-            conn.commit()
+            return match_info, deleted
+
+        match_info, deleted = await db.run(clear_active_match)
 
         # Also clear from cache
         from bot.bot import active_players_lock
@@ -2,7 +2,8 @@ import discord
 from discord import app_commands
 import logging
 from datetime import datetime
-from database.connection import get_db_connection
+from database.async_db import db
+from utils.timestamps import from_ms
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -32,7 +33,7 @@ def register_commands(bot):
         # Gather all profile data
         user_id = target_user.id
 
-        with get_db_connection() as conn:
+        def load_profile(conn):
             # Get wallet information
             wallet = conn.execute(
                 'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
@@ -45,29 +46,15 @@ def register_commands(bot):
                 (user_id,)
             ).fetchone()
 
-            # Get betting statistics
+            # Get betting statistics (kept up to date as bets are placed and resolved)
             stats = conn.execute(
-                '''SELECT 
-                    COUNT(*) AS total_bets,
-                    SUM(amount) AS total_wagered,
-                    SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins,
-                    SUM(CASE WHEN won = FALSE AND resolved = TRUE THEN 1 ELSE 0 END) AS losses,
-                    SUM(CASE WHEN resolved = FALSE THEN 1 ELSE 0 END) AS pending,
-                    SUM(payout) AS total_winnings
-                FROM bets 
-                WHERE user_id = ?''',
+                'SELECT total_bets, total_wagered, wins, losses, pending, total_winnings FROM user_stats WHERE user_id = ?',
                 (user_id,)
             ).fetchone()
 
             # Get bet type distribution
             bet_types = conn.execute(
-                '''SELECT 
-                    bet_type, 
-                    COUNT(*) as count,
-                    SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins
-                FROM bets 
-                WHERE user_id = ? 
-                GROUP BY bet_type''',
+                'SELECT bet_type, bets AS count, wins FROM user_bet_type_stats WHERE user_id = ?',
                 (user_id,)
             ).fetchall()
 
@@ -90,6 +77,13 @@ def register_commands(bot):
                 (user_id,)
             ).fetchall()
 
+            return wallet, steam, stats, bet_types, recent_bets
+
+        wallet, steam, stats, bet_types, recent_bets = await db.run(load_profile, readonly=True)
+
+        # Users who have never bet have no stats row yet
+        stats = stats or {'total_bets': 0, 'total_wagered': 0, 'wins': 0, 'losses': 0, 'pending': 0, 'total_winnings': 0}
+
         # Calculate win rate and profit
         wins = stats['wins'] or 0
         total_resolved = (stats['wins'] or 0) + (stats['losses'] or 0)
@@ -173,7 +167,7 @@ def register_commands(bot):
                     status = "❌ Lost"
 
                 # Format date
-                date = datetime.fromisoformat(bet['placed_at']).strftime("%m/%d/%y")
+                date = from_ms(bet['placed_at']).strftime("%m/%d/%y")
 
                 bet_history.append(f"**{date}**: {bet['amount']:.4f} ETH on {bet_desc} - {status}")
 
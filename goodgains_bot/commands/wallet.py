@@ -6,7 +6,8 @@ from io import BytesIO
 import asyncio
 from datetime import datetime
 import logging
-from database.connection import get_db_connection
+from database.async_db import db
+from utils.timestamps import now_ms, from_ms
 from wallet.walletconnect import create_wallet_session, wait_for_wallet_connection, cleanup_failed_sessions
 from wallet.crypto import validate_eth_address
 
@@ -26,24 +27,22 @@ def register_commands(bot):
         await interaction.response.defer(ephemeral=True)
 
         # Check rate limits
-        with get_db_connection() as conn:
-            last_attempt = conn.execute(
-                'SELECT timestamp FROM rate_limits WHERE user_id = ? AND action = "connect_wallet"',
-                (user_id,)
-            ).fetchone()
-
-            if last_attempt:
-                last_time = datetime.fromisoformat(last_attempt['timestamp'])
-                if (datetime.now() - last_time).total_seconds() < 60:  # 1 minute cooldown
-                    await interaction.followup.send("⚠️ Please wait before trying to connect your wallet again.")
-                    return
-
-            # Update rate limit
-            conn.execute(
-                'INSERT OR REPLACE INTO rate_limits (user_id, action, timestamp) VALUES (?, ?, ?)',
-                (user_id, "connect_wallet", datetime.now().isoformat())
-            )
-            conn.commit()
+        last_attempt = await db.fetchone(
+            'SELECT timestamp FROM rate_limits WHERE user_id = ? AND action = "connect_wallet"',
+            (user_id,)
+        )
+
+        if last_attempt:
+            last_time = from_ms(last_attempt['timestamp'])
+            if (datetime.now() - last_time).total_seconds() < 60:  # 1 minute cooldown
+                await interaction.followup.send("⚠️ Please wait before trying to connect your wallet again.")
+                return
+
+        # Update rate limit
+        await db.execute(
+            'INSERT OR REPLACE INTO rate_limits (user_id, action, timestamp) VALUES (?, ?, ?)',
+            (user_id, "connect_wallet", now_ms())
+        )
 
         # Create wallet session
         session = await create_wallet_session(user_id)
@@ -105,7 +104,7 @@ def register_commands(bot):
                 logger.warning(f"Wallet connection timed out for user {user_id}")
 
                 # Clean up failed session
-                cleanup_failed_sessions(user_id)
+                await cleanup_failed_sessions(user_id)
         else:
             await interaction.followup.send(f"❌ Failed to generate WalletConnect session. Please try again later.")
 
@@ -125,27 +124,25 @@ def register_commands(bot):
         # Create a new wallet session
         session_id = f"direct_{user_id}_{int(datetime.now().timestamp())}"
 
-        with get_db_connection() as conn:
-            # Check if user already has a connected wallet
-            existing = conn.execute(
-                'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
-
-            if existing:
-                await interaction.response.send_message(
-                    f"⚠️ You already have a connected wallet: `{existing['wallet_address']}`\n"
-                    f"Do you want to replace it with `{wallet_address}`? Use `/disconnect_wallet` first.",
-                    ephemeral=True
-                )
-                return
+        # Check if user already has a connected wallet
+        existing = await db.fetchone(
+            'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
-            # Create new wallet connection
-            conn.execute(
-                'INSERT INTO wallet_sessions (user_id, session_id, wallet_address, connected, last_active) VALUES (?, ?, ?, TRUE, ?)',
-                (user_id, session_id, wallet_address, datetime.now().isoformat())
+        if existing:
+            await interaction.response.send_message(
+                f"⚠️ You already have a connected wallet: `{existing['wallet_address']}`\n"
+                f"Do you want to replace it with `{wallet_address}`? Use `/disconnect_wallet` first.",
+                ephemeral=True
             )
-            conn.commit()
+            return
+
+        # Create new wallet connection
+        await db.execute(
+            'INSERT INTO wallet_sessions (user_id, session_id, wallet_address, connected, last_active) VALUES (?, ?, ?, TRUE, ?)',
+            (user_id, session_id, wallet_address, now_ms())
+        )
 
         # Update cache
         from bot.bot import sessions_lock
@@ -169,25 +166,23 @@ def register_commands(bot):
         """Disconnect your currently connected wallet."""
         user_id = interaction.user.id
 
-        with get_db_connection() as conn:
-            wallet = conn.execute(
-                'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
+        wallet = await db.fetchone(
+            'SELECT wallet_address FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
-            if not wallet:
-                await interaction.response.send_message("❌ You don't have a connected wallet.", ephemeral=True)
-                return
+        if not wallet:
+            await interaction.response.send_message("❌ You don't have a connected wallet.", ephemeral=True)
+            return
 
-            # Get the wallet address before disconnecting
-            wallet_address = wallet['wallet_address']
+        # Get the wallet address before disconnecting
+        wallet_address = wallet['wallet_address']
 
-            # Disconnect all sessions for this user
-            conn.execute(
-                'UPDATE wallet_sessions SET connected = FALSE WHERE user_id = ?',
-                (user_id,)
-            )
-            conn.commit()
+        # Disconnect all sessions for this user
+        await db.execute(
+            'UPDATE wallet_sessions SET connected = FALSE WHERE user_id = ?',
+            (user_id,)
+        )
 
         # Update cache
         from bot.bot import sessions_lock
@@ -207,14 +202,13 @@ def register_commands(bot):
         """Check if your wallet is connected and get its address."""
         user_id = interaction.user.id
 
-        with get_db_connection() as conn:
-            wallet_session = conn.execute(
-                'SELECT wallet_address, connected, last_active FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
-                (user_id,)
-            ).fetchone()
+        wallet_session = await db.fetchone(
+            'SELECT wallet_address, connected, last_active FROM wallet_sessions WHERE user_id = ? AND connected = TRUE',
+            (user_id,)
+        )
 
         if wallet_session:
-            last_active = datetime.fromisoformat(wallet_session['last_active'])
+            last_active = from_ms(wallet_session['last_active'])
             time_ago = datetime.now() - last_active
             hours = time_ago.total_seconds() / 3600
 
@@ -245,32 +239,29 @@ def register_commands(bot):
             return
 
         # Find the most recent session for this user
-        with get_db_connection() as conn:
-            # Find any pending session
-            session = conn.execute(
-                'SELECT session_id FROM wallet_sessions WHERE user_id = ? AND connected = FALSE ORDER BY last_active DESC LIMIT 1',
-                (user_id,)
-            ).fetchone()
-
-            if session:
-                # Complete the pending connection
-                conn.execute(
-                    'UPDATE wallet_sessions SET wallet_address = ?, connected = TRUE, last_active = ? WHERE user_id = ? AND session_id = ?',
-                    (wallet_address, datetime.now().isoformat(), user_id, session['session_id'])
-                )
-                conn.commit()
-                await interaction.response.send_message(
-                    f"✅ Connection completed! Wallet `{wallet_address}` is now connected.", ephemeral=False)
-            else:
-                # Create a new connection
-                session_id = f"manual_{user_id}_{int(datetime.now().timestamp())}"
-                conn.execute(
-                    'INSERT INTO wallet_sessions (user_id, session_id, wallet_address, connected, last_active) VALUES (?, ?, ?, TRUE, ?)',
-                    (user_id, session_id, wallet_address, datetime.now().isoformat())
-                )
-                conn.commit()
-                await interaction.response.send_message(f"✅ New wallet connection created for `{wallet_address}`",
-                                                        ephemeral=False)
+        # Find any pending session
+        session = await db.fetchone(
+            'SELECT session_id FROM wallet_sessions WHERE user_id = ? AND connected = FALSE ORDER BY last_active DESC LIMIT 1',
+            (user_id,)
+        )
+
+        if session:
+            # Complete the pending connection
+            await db.execute(
+                'UPDATE wallet_sessions SET wallet_address = ?, connected = TRUE, last_active = ? WHERE user_id = ? AND session_id = ?',
+                (wallet_address, now_ms(), user_id, session['session_id'])
+            )
+            await interaction.response.send_message(
+                f"✅ Connection completed! Wallet `{wallet_address}` is now connected.", ephemeral=False)
+        else:
+            # Create a new connection
+            session_id = f"manual_{user_id}_{int(datetime.now().timestamp())}"
+            await db.execute(
+                'INSERT INTO wallet_sessions (user_id, session_id, wallet_address, connected, last_active) VALUES (?, ?, ?, TRUE, ?)',
+                (user_id, session_id, wallet_address, now_ms())
+            )
+            await interaction.response.send_message(f"✅ New wallet connection created for `{wallet_address}`",
+                                                    ephemeral=False)
 
         # Update cache
         from bot.bot import sessions_lock
@@ -30,11 +30,66 @@ ENCRYPTED_WALLET_PRIVATE_KEY = os.getenv("ENCRYPTED_WALLET_PRIVATE_KEY")
 COMMISSION_RATE = float(os.getenv("COMMISSION_RATE", "0.15"))
 MAX_BET_AMOUNT = float(os.getenv("MAX_BET_AMOUNT", "1.0"))
 MIN_BET_AMOUNT = float(os.getenv("MIN_BET_AMOUNT", "0.01"))
-API_RATE_LIMIT = int(os.getenv("API_RATE_LIMIT", "30"))
+# A Steam Web API key is allowed about 100,000 calls a day (~1.16 per second sustained). The default
+# pace of 1/s (86,400 a day) stays under that; the burst lets short spikes through without waiting.
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "1"))  # Steam API requests per second, per host
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "10"))  # Requests that may go out back to back
+RATE_LIMITER_MAX_KEYS = int(os.getenv("RATE_LIMITER_MAX_KEYS", "50000"))
+RATE_LIMITER_ENTRY_TTL_SECONDS = int(os.getenv("RATE_LIMITER_ENTRY_TTL_SECONDS", "3600"))
+RATE_LIMITER_PERSIST = os.getenv("RATE_LIMITER_PERSIST", "true").lower() == "true"
 MAX_BETS_PER_HOUR = int(os.getenv("MAX_BETS_PER_HOUR", "5"))
+RESOLUTION_CONCURRENCY = int(os.getenv("RESOLUTION_CONCURRENCY", "8"))
 
 # Database
 DB_PATH = "goodgains.db"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", "4"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+DB_READER_THREADS = int(os.getenv("DB_READER_THREADS", "4"))
+WRITE_QUEUE_FLUSH_MS = int(os.getenv("WRITE_QUEUE_FLUSH_MS", "250"))
+WRITE_QUEUE_MAX_ROWS = int(os.getenv("WRITE_QUEUE_MAX_ROWS", "200"))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_QUERY_STATS_SAMPLES = int(os.getenv("DB_QUERY_STATS_SAMPLES", "1000"))
+DB_SLOW_QUERY_LOG_SIZE = int(os.getenv("DB_SLOW_QUERY_LOG_SIZE", "100"))
+
+# Telemetry retention
+GSI_CONNECTIONS_TTL_HOURS = int(os.getenv("GSI_CONNECTIONS_TTL_HOURS", "48"))
+STATE_TRANSITIONS_TTL_DAYS = int(os.getenv("STATE_TRANSITIONS_TTL_DAYS", "14"))
+INCREMENTAL_VACUUM_PAGES = int(os.getenv("INCREMENTAL_VACUUM_PAGES", "2000"))
+VACUUM_HOUR_UTC = int(os.getenv("VACUUM_HOUR_UTC", "6"))
+
+# Online backups
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_INTERVAL_HOURS = int(os.getenv("BACKUP_INTERVAL_HOURS", "6"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "8"))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP_MS = int(os.getenv("BACKUP_STEP_SLEEP_MS", "5"))
+
+# Completed match details cache
+MATCH_CACHE_MAX_MB = int(os.getenv("MATCH_CACHE_MAX_MB", "64"))
+
+# Steam Web API HTTP client
+STEAM_API_BASE_URL = os.getenv("STEAM_API_BASE_URL", "https://api.steampowered.com").rstrip("/")
+HTTP_TIMEOUT_SECONDS = int(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = int(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "8"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_OPEN_SECONDS = int(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+CIRCUIT_MAX_OPEN_SECONDS = int(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "300"))
+PLAYER_SUMMARY_BATCH_WINDOW_MS = int(os.getenv("PLAYER_SUMMARY_BATCH_WINDOW_MS", "50"))
+PLAYER_SUMMARY_TTL_SECONDS = int(os.getenv("PLAYER_SUMMARY_TTL_SECONDS", "600"))
+LEAGUE_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("LEAGUE_SNAPSHOT_MAX_AGE_SECONDS", "30"))
+MATCH_DETAILS_TTL_IN_PROGRESS = int(os.getenv("MATCH_DETAILS_TTL_IN_PROGRESS", "20"))
+MATCH_DETAILS_TTL_COMPLETED = int(os.getenv("MATCH_DETAILS_TTL_COMPLETED", "3600"))
+
+# Bulk DM delivery (weekly summaries)
+DM_FANOUT_CONCURRENCY = int(os.getenv("DM_FANOUT_CONCURRENCY", "5"))
+DM_FANOUT_PER_SECOND = int(os.getenv("DM_FANOUT_PER_SECOND", "5"))
+DM_MAX_ATTEMPTS = int(os.getenv("DM_MAX_ATTEMPTS", "3"))
 
 # Web server
 FLASK_PORT = 8081
@@ -49,5 +104,18 @@ else:
 
 # Match detection settings
 MATCH_DETECTION_POLL_INTERVAL = int(os.getenv("MATCH_DETECTION_POLL_INTERVAL", "15"))
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "1"))
+POLL_SYNC_SECONDS = int(os.getenv("POLL_SYNC_SECONDS", "30"))
+POLL_MAX_CHECKS_PER_TICK = int(os.getenv("POLL_MAX_CHECKS_PER_TICK", "10"))
+POLL_IDLE_SECONDS = int(os.getenv("POLL_IDLE_SECONDS", "30"))
+POLL_RECENT_SECONDS = int(os.getenv("POLL_RECENT_SECONDS", str(MATCH_DETECTION_POLL_INTERVAL)))
+POLL_DRAFT_SECONDS = int(os.getenv("POLL_DRAFT_SECONDS", "10"))
+POLL_IN_GAME_SECONDS = int(os.getenv("POLL_IN_GAME_SECONDS", "60"))
+POLL_GSI_LIVE_SECONDS = int(os.getenv("POLL_GSI_LIVE_SECONDS", "30"))
+GSI_LIVE_WINDOW_SECONDS = int(os.getenv("GSI_LIVE_WINDOW_SECONDS", "30"))
 MATCH_DETECTION_CONFIDENCE_THRESHOLD = int(os.getenv("MATCH_DETECTION_CONFIDENCE", "80"))
 MATCH_API_PRIORITY = os.getenv("MATCH_API_PRIORITY", "high").lower()
+MATCH_FEED_ENABLED = os.getenv("MATCH_FEED_ENABLED", "false").lower() == "true"
+MATCH_FEED_POLL_SECONDS = int(os.getenv("MATCH_FEED_POLL_SECONDS", "10"))
+MATCH_FEED_MAX_BATCHES = int(os.getenv("MATCH_FEED_MAX_BATCHES", "10"))
+MATCH_FEED_BACKSTOP_MINUTES = int(os.getenv("MATCH_FEED_BACKSTOP_MINUTES", "60"))
@@ -0,0 +1,25 @@
+import logging
+
+logger = logging.getLogger('goodgains_bot')
+
+# Snapshots of ApiRateLimiter state so a restart doesn't immediately retry endpoints that are failing.
+# Rows are (key, failures, backoff_until, last_failure) with times in epoch seconds; stored as epoch ms.
+
+
+def save_backoff_state(conn, rows):
+    """Replace the stored snapshot with rows from ApiRateLimiter.export_state()."""
+    conn.execute('DELETE FROM api_backoff')
+    conn.executemany(
+        'INSERT INTO api_backoff (key, failures, backoff_until, last_failure) VALUES (?, ?, ?, ?)',
+        [(key, failures, int(backoff_until * 1000), int(last_failure * 1000))
+         for key, failures, backoff_until, last_failure in rows]
+    )
+    return len(rows)
+
+
+def load_backoff_state(conn):
+    """Return the stored snapshot as rows for ApiRateLimiter.import_state()."""
+    rows = conn.execute(
+        'SELECT key, failures, backoff_until, last_failure FROM api_backoff ORDER BY last_failure'
+    ).fetchall()
+    return [(row['key'], row['failures'], row['backoff_until'] / 1000, row['last_failure'] / 1000) for row in rows]
@@ -0,0 +1,77 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import DB_READER_THREADS
+from database.connection import get_db_connection
+
+logger = logging.getLogger('goodgains_bot')
+
+
+class AsyncDatabase:
+    """Awaitable database access backed by dedicated DB threads.
+
+    Writes go through a single writer thread so they are applied in order and never
+    contend with each other; reads are spread over a small pool of reader threads.
+    """
+
+    def __init__(self, reader_threads=DB_READER_THREADS):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix='db-reader')
+
+    async def _submit(self, executor, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args))
+
+    @staticmethod
+    def _run_read(fn, args):
+        with get_db_connection(readonly=True) as conn:
+            return fn(conn, *args)
+
+    @staticmethod
+    def _run_snapshot(fn, args):
+        with get_db_connection(readonly=True) as conn:
+            # One read transaction, so multi-query reports see a single consistent snapshot
+            conn.execute('BEGIN')
+            return fn(conn, *args)
+
+    @staticmethod
+    def _run_write(fn, args):
+        with get_db_connection() as conn:
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+
+    async def fetchone(self, sql, params=()):
+        """Run a read query and return the first row (or None)."""
+        return await self._submit(self._readers, self._run_read, lambda conn: conn.execute(sql, params).fetchone(), ())
+
+    async def fetchall(self, sql, params=()):
+        """Run a read query and return all rows."""
+        return await self._submit(self._readers, self._run_read, lambda conn: conn.execute(sql, params).fetchall(), ())
+
+    async def execute(self, sql, params=()):
+        """Run a single write statement in its own transaction and return the affected row count."""
+        return await self._submit(self._writer, self._run_write, lambda conn: conn.execute(sql, params).rowcount, ())
+
+    async def executemany(self, sql, seq_of_params):
+        """Run one write statement for many parameter sets in a single transaction."""
+        return await self._submit(self._writer, self._run_write,
+                                  lambda conn: conn.executemany(sql, seq_of_params).rowcount, ())
+
+    async def run(self, fn, *args, readonly=False):
+        """Run fn(conn, *args) on a DB thread; writes are committed as one transaction.
+
+        readonly=True runs on a query_only connection inside one snapshot, never touching the writer.
+        """
+        if readonly:
+            return await self._submit(self._readers, self._run_snapshot, fn, args)
+        return await self._submit(self._writer, self._run_write, fn, args)
+
+    def close(self):
+        """Wait for queued work to finish and stop the DB threads."""
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+
+db = AsyncDatabase()
@@ -0,0 +1,62 @@
+import os
+import glob
+import sqlite3
+import logging
+import time
+from datetime import datetime
+from config import DB_PATH, BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS
+
+logger = logging.getLogger('goodgains_bot')
+
+
+def backup_database(dest_dir=BACKUP_DIR, pages=BACKUP_PAGES_PER_STEP, step_sleep_ms=BACKUP_STEP_SLEEP_MS):
+    """Copy the live database with the SQLite backup API and return the path of the new backup.
+
+    The copy is taken from one read snapshot, a few pages per step, so writers keep committing
+    to the WAL while it runs and the backup never has to restart.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    dest_path = os.path.join(dest_dir, f"goodgains-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+    partial_path = f"{dest_path}.partial"
+
+    # A dedicated connection: the pooled ones are tuned for short statements, not a long snapshot
+    source = sqlite3.connect(DB_PATH, isolation_level=None)
+    dest = sqlite3.connect(partial_path)
+    started = time.monotonic()
+    try:
+        source.execute('BEGIN')
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()  # Pins the read snapshot
+
+        def pause(status, remaining, total):
+            time.sleep(step_sleep_ms / 1000)
+
+        source.backup(dest, pages=pages, progress=pause)
+        source.execute('ROLLBACK')
+
+        check = dest.execute('PRAGMA quick_check').fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"Backup failed integrity check: {check}")
+    except Exception:
+        dest.close()
+        os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+
+    dest.close()
+    os.replace(partial_path, dest_path)
+
+    logger.info(
+        f"Database backed up to {dest_path} ({os.path.getsize(dest_path) // 1024} KB "
+        f"in {time.monotonic() - started:.1f}s)"
+    )
+    prune_backups(dest_dir)
+    return dest_path
+
+
+def prune_backups(dest_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+    """Delete all but the newest `keep` backups."""
+    backups = sorted(glob.glob(os.path.join(dest_dir, 'goodgains-*.db')))
+    for path in backups[:-keep] if keep > 0 else []:
+        os.remove(path)
+        logger.info(f"Removed old database backup {path}")
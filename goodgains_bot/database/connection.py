@@ -1,132 +1,119 @@
 import sqlite3
+import threading
+import logging
 from contextlib import contextmanager
-from config import DB_PATH
-
+from database.migrations import apply_migrations, find_scanning_queries
+from database.query_stats import InstrumentedConnection
+from config import (DB_PATH, DB_POOL_SIZE, DB_READER_POOL_SIZE, DB_CACHE_SIZE_KB, DB_MMAP_SIZE,
+                    DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE)
+
+logger = logging.getLogger('goodgains_bot')
+
+
+class ConnectionPool:
+    """Keeps long-lived SQLite connections open and hands them out one caller at a time."""
+
+    def __init__(self, db_path, size, readonly=False):
+        self.db_path = db_path
+        self.size = size
+        self.readonly = readonly
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        """Open a new connection with the tuned pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # Shared between the bot loop and the Flask thread
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+            factory=InstrumentedConnection  # Times every statement for query_stats
+        )
+        conn.row_factory = sqlite3.Row
+
+        if not self.readonly:
+            # Both are persistent in the file; auto_vacuum only takes effect on a brand-new database
+            # (older files switch over during the first off-peak vacuum)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('PRAGMA journal_mode = WAL')
+
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA cache_size = -{DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+
+        if self.readonly:
+            conn.execute('PRAGMA query_only = ON')
+
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, or open a new one if none are free."""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool has been closed")
+            if self._idle:
+                return self._idle.pop()
+
+        # Never block here: callers on the event loop may hold a connection across an await,
+        # so waiting for one to come back could stall the loop forever.
+        return self._connect()
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken database connection: {e}")
+            conn.close()
+            return
+
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
 
-@contextmanager
-def get_db_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
         conn.close()
 
+    def close(self):
+        """Close every idle connection and refuse new checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
 
-def initialize_database():
-    """Create necessary tables if they don't exist."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-
-        # Steam ID mapping table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS steam_mappings (
-            user_id INTEGER PRIMARY KEY,
-            steam_id TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Active players table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS active_players (
-            user_id INTEGER PRIMARY KEY,
-            game_id TEXT NOT NULL,
-            match_id TEXT NOT NULL,
-            team TEXT NOT NULL,
-            match_start_time INTEGER NOT NULL,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Bets table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            match_id TEXT NOT NULL,
-            bet_type TEXT NOT NULL DEFAULT 'team_win',
-            team TEXT,
-            target TEXT,
-            amount REAL NOT NULL,
-            placed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            resolved BOOLEAN DEFAULT FALSE,
-            won BOOLEAN DEFAULT FALSE,
-            payout REAL DEFAULT 0,
-            tx_hash TEXT
-        )
-        ''')
-
-        # Match events table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS match_events (
-            match_id TEXT NOT NULL,
-            event_type TEXT NOT NULL,
-            event_target TEXT,
-            event_time INTEGER,
-            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (match_id, event_type)
-        )
-        ''')
-
-        # Wallet sessions table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS wallet_sessions (
-            user_id INTEGER PRIMARY KEY,
-            wallet_address TEXT,
-            session_id TEXT UNIQUE,
-            connected BOOLEAN DEFAULT FALSE,
-            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Rate limiting table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS rate_limits (
-            user_id INTEGER NOT NULL,
-            action TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (user_id, action)
-        )
-        ''')
-
-        # GSI connections table (if needed)
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gsi_connections (
-            user_id INTEGER NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (user_id, timestamp)
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_state_transitions (
-            user_id INTEGER NOT NULL,
-            match_id TEXT NOT NULL,
-            previous_state TEXT,
-            new_state TEXT,
-            timestamp INTEGER,
-            PRIMARY KEY (user_id, match_id, timestamp)
-        )
-        ''')
+        for conn in idle:
+            conn.close()
+
+
+# Writes (and mixed read/write callers) use the writer pool; pure reads can use the query_only readers
+_writer_pool = ConnectionPool(DB_PATH, DB_POOL_SIZE)
+_reader_pool = ConnectionPool(DB_PATH, DB_READER_POOL_SIZE, readonly=True)
 
-        # SQLite requires careful alteration - check if columns exist first
-        columns = [row[1] for row in conn.execute("PRAGMA table_info(active_players)").fetchall()]
 
-        if 'detection_source' not in columns:
-            cursor.execute('ALTER TABLE active_players ADD COLUMN detection_source TEXT;')
+@contextmanager
+def get_db_connection(readonly=False):
+    """Context manager for pooled database connections."""
+    pool = _reader_pool if readonly else _writer_pool
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
 
-        if 'detection_confidence' not in columns:
-            cursor.execute('ALTER TABLE active_players ADD COLUMN detection_confidence INTEGER DEFAULT 0;')
 
-        if 'draft_detected_at' not in columns:
-            cursor.execute('ALTER TABLE active_players ADD COLUMN draft_detected_at INTEGER;')
+def close_db_connections():
+    """Close all pooled connections (used on shutdown)."""
+    _reader_pool.close()
+    _writer_pool.close()
 
-        if 'validated_at' not in columns:
-            cursor.execute('ALTER TABLE active_players ADD COLUMN validated_at INTEGER;')
 
-        if 'game_start_time' not in columns:
-            cursor.execute('ALTER TABLE active_players ADD COLUMN game_start_time INTEGER;')
+def initialize_database():
+    """Bring the schema up to date and check the hot queries are still index-backed."""
+    with get_db_connection() as conn:
+        version = apply_migrations(conn)
+        logger.info(f"Database schema at version {version}")
 
-        conn.commit()
\ No newline at end of file
+        for name, plan in find_scanning_queries(conn).items():
+            logger.warning(f"Hot query '{name}' falls back to a table scan: {' | '.join(plan)}")
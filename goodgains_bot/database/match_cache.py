@@ -0,0 +1,50 @@
+import json
+import logging
+import zlib
+from config import MATCH_CACHE_MAX_MB
+from utils.timestamps import now_ms
+
+logger = logging.getLogger('goodgains_bot')
+
+# Completed matches never change, so their get_match_details payloads are kept here for good
+# (subject to the size bound) and served without touching the Steam API.
+
+
+def load_completed_match(conn, match_id):
+    """Return the cached get_match_details result for a completed match, or None."""
+    row = conn.execute('SELECT payload FROM match_details_cache WHERE match_id = ?', (str(match_id),)).fetchone()
+    if row is None:
+        return None
+    try:
+        return json.loads(zlib.decompress(row['payload']))
+    except (zlib.error, ValueError) as e:
+        logger.warning(f"Discarding unreadable cached details for match {match_id}: {e}")
+        return None
+
+
+def store_completed_match(conn, match_id, result):
+    """Compress and store a completed match's get_match_details result."""
+    payload = zlib.compress(json.dumps(result, separators=(',', ':')).encode(), 6)
+    now = now_ms()
+    conn.execute(
+        '''INSERT OR REPLACE INTO match_details_cache (match_id, payload, size, fetched_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?)''',
+        (str(match_id), payload, len(payload), now, now)
+    )
+
+
+def evict_match_cache(conn, max_bytes=MATCH_CACHE_MAX_MB * 1024 * 1024):
+    """Delete the least recently used payloads until the cache fits in max_bytes; returns rows removed."""
+    removed = conn.execute(
+        '''DELETE FROM match_details_cache WHERE match_id IN (
+            SELECT match_id FROM (
+                SELECT match_id, SUM(size) OVER (ORDER BY last_used_at DESC, match_id) AS running_size
+                FROM match_details_cache
+            ) WHERE running_size > ?
+        )''',
+        (max_bytes,)
+    ).rowcount
+
+    if removed:
+        logger.info(f"Evicted {removed} match details from the on-disk cache")
+    return removed
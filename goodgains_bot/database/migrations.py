@@ -0,0 +1,643 @@
+import logging
+
+logger = logging.getLogger('goodgains_bot')
+
+
+def _create_base_tables(conn):
+    """Create the original set of tables."""
+    # Steam ID mapping table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS steam_mappings (
+        user_id INTEGER PRIMARY KEY,
+        steam_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Active players table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS active_players (
+        user_id INTEGER PRIMARY KEY,
+        game_id TEXT NOT NULL,
+        match_id TEXT NOT NULL,
+        team TEXT NOT NULL,
+        match_start_time INTEGER NOT NULL,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Bets table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS bets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        match_id TEXT NOT NULL,
+        bet_type TEXT NOT NULL DEFAULT 'team_win',
+        team TEXT,
+        target TEXT,
+        amount REAL NOT NULL,
+        placed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        resolved BOOLEAN DEFAULT FALSE,
+        won BOOLEAN DEFAULT FALSE,
+        payout REAL DEFAULT 0,
+        tx_hash TEXT
+    )
+    ''')
+
+    # Match events table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS match_events (
+        match_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        event_target TEXT,
+        event_time INTEGER,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (match_id, event_type)
+    )
+    ''')
+
+    # Wallet sessions table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS wallet_sessions (
+        user_id INTEGER PRIMARY KEY,
+        wallet_address TEXT,
+        session_id TEXT UNIQUE,
+        connected BOOLEAN DEFAULT FALSE,
+        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Rate limiting table
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        user_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, action)
+    )
+    ''')
+
+    # GSI connections table (if needed)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS gsi_connections (
+        user_id INTEGER NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, timestamp)
+    )
+    ''')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS game_state_transitions (
+        user_id INTEGER NOT NULL,
+        match_id TEXT NOT NULL,
+        previous_state TEXT,
+        new_state TEXT,
+        timestamp INTEGER,
+        PRIMARY KEY (user_id, match_id, timestamp)
+    )
+    ''')
+
+
+def _add_detection_columns(conn):
+    """Add the match detection columns to active_players."""
+    # SQLite requires careful alteration - check if columns exist first
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(active_players)").fetchall()]
+
+    if 'detection_source' not in columns:
+        conn.execute('ALTER TABLE active_players ADD COLUMN detection_source TEXT;')
+
+    if 'detection_confidence' not in columns:
+        conn.execute('ALTER TABLE active_players ADD COLUMN detection_confidence INTEGER DEFAULT 0;')
+
+    if 'draft_detected_at' not in columns:
+        conn.execute('ALTER TABLE active_players ADD COLUMN draft_detected_at INTEGER;')
+
+    if 'validated_at' not in columns:
+        conn.execute('ALTER TABLE active_players ADD COLUMN validated_at INTEGER;')
+
+    if 'game_start_time' not in columns:
+        conn.execute('ALTER TABLE active_players ADD COLUMN game_start_time INTEGER;')
+
+
+def _add_hot_query_indexes(conn):
+    """Add indexes for the queries run on every poll, bet and resolution."""
+    # Pending-resolution lookups only ever look at unresolved bets, so keep that index partial
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_bets_pending ON bets (match_id, bet_type) WHERE resolved = FALSE'
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bets_user_placed ON bets (user_id, placed_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bets_placed ON bets (placed_at, user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bets_match_user ON bets (match_id, user_id)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_match_events_lookup ON match_events (match_id, event_type, event_target)'
+    )
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_state_transitions_match ON game_state_transitions (match_id, timestamp)'
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_state_transitions_time ON game_state_transitions (timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_gsi_connections_time ON gsi_connections (timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_active_players_match ON active_players (match_id)')
+
+
+def _add_telemetry_rollups(conn):
+    """Add the hourly rollup tables that replace long-lived raw GSI telemetry."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS rollup_watermarks (
+        name TEXT PRIMARY KEY,
+        rolled_until TEXT NOT NULL
+    )
+    ''')
+
+    # Per-user GSI packet counts, one row per hour
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS gsi_connection_rollups (
+        user_id INTEGER NOT NULL,
+        hour TEXT NOT NULL,
+        packet_count INTEGER NOT NULL DEFAULT 0,
+        first_seen TEXT,
+        last_seen TEXT,
+        PRIMARY KEY (user_id, hour)
+    )
+    ''')
+
+    # When each player's client first and last reported each game phase
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS match_phase_timelines (
+        match_id TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        first_seen INTEGER,
+        last_seen INTEGER,
+        PRIMARY KEY (match_id, user_id, state)
+    )
+    ''')
+
+
+def _backfill_user_stats(conn, day):
+    """Fill the betting stats tables from bets, bucketing daily stats by the SQL expression day.
+
+    The aggregates are kept here, as they were when each migration shipped, rather than shared with
+    database/user_stats.py: that module follows the current schema and must not change what an old
+    migration does.
+    """
+    for table in ('user_stats', 'user_bet_type_stats', 'user_daily_stats'):
+        conn.execute(f'DELETE FROM {table}')
+
+    conn.execute('''
+    INSERT INTO user_stats (user_id, total_bets, total_wagered, wins, losses, pending, total_winnings, last_bet_at)
+    SELECT user_id,
+        COUNT(*),
+        COALESCE(SUM(amount), 0),
+        SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END),
+        SUM(CASE WHEN won = FALSE AND resolved = TRUE THEN 1 ELSE 0 END),
+        SUM(CASE WHEN resolved = FALSE THEN 1 ELSE 0 END),
+        COALESCE(SUM(payout), 0),
+        MAX(placed_at)
+    FROM bets
+    GROUP BY user_id
+    ''')
+
+    conn.execute('''
+    INSERT INTO user_bet_type_stats (user_id, bet_type, bets, wins)
+    SELECT user_id, bet_type, COUNT(*), SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END)
+    FROM bets
+    GROUP BY user_id, bet_type
+    ''')
+
+    conn.execute(f'''
+    INSERT INTO user_daily_stats (user_id, day, total_bets, total_wagered, wins, total_winnings)
+    SELECT user_id, {day},
+        COUNT(*),
+        COALESCE(SUM(amount), 0),
+        SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END),
+        COALESCE(SUM(payout), 0)
+    FROM bets
+    GROUP BY user_id, {day}
+    ''')
+
+
+def _add_user_stats(conn):
+    """Add per-user betting aggregates kept in step with bets, and backfill them."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_bets INTEGER NOT NULL DEFAULT 0,
+        total_wagered REAL NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        pending INTEGER NOT NULL DEFAULT 0,
+        total_winnings REAL NOT NULL DEFAULT 0,
+        last_bet_at TIMESTAMP
+    )
+    ''')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_bet_type_stats (
+        user_id INTEGER NOT NULL,
+        bet_type TEXT NOT NULL,
+        bets INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, bet_type)
+    )
+    ''')
+
+    # Bucketed by the (UTC) day the bet was placed, for weekly summaries
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_daily_stats (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        total_bets INTEGER NOT NULL DEFAULT 0,
+        total_wagered REAL NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        total_winnings REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day)
+    )
+    ''')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_daily_stats_day ON user_daily_stats (day, user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_stats_last_bet ON user_stats (last_bet_at)')
+
+    # placed_at was a TEXT timestamp here
+    _backfill_user_stats(conn, 'date(placed_at)')
+
+
+# SQL default for "now" in epoch milliseconds (julianday keeps this working on SQLite < 3.38)
+_NOW_MS = "(CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER))"
+
+
+def _text_to_ms(column):
+    """SQL expression converting a legacy TEXT timestamp column to epoch milliseconds.
+
+    Values written with datetime.isoformat() ('T' separator) are local time; CURRENT_TIMESTAMP
+    values (space separator) are already UTC.
+    """
+    return f'''CASE
+        WHEN {column} IS NULL OR {column} = '' THEN NULL
+        WHEN typeof({column}) IN ('integer', 'real') THEN CAST({column} AS INTEGER)
+        WHEN instr({column}, 'T') > 0 THEN CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)
+        ELSE CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)
+    END'''
+
+
+def _rebuild_table(conn, table, create_sql, converted):
+    """Recreate a table from create_sql (with {table} placeholder), copying rows through converted column expressions."""
+    columns = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+    indexes = [
+        row['sql'] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        ).fetchall()
+    ]
+
+    conn.execute(create_sql.format(table=f'{table}_new'))
+    conn.execute(
+        f'INSERT INTO {table}_new ({", ".join(columns)}) '
+        f'SELECT {", ".join(converted.get(column, column) for column in columns)} FROM {table}'
+    )
+    conn.execute(f'DROP TABLE {table}')
+    conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+    for sql in indexes:
+        conn.execute(sql)
+
+
+def _convert_timestamps_to_epoch_ms(conn):
+    """Store every timestamp as INTEGER epoch milliseconds so range queries compare numbers, not strings."""
+    _rebuild_table(conn, 'steam_mappings', f'''
+    CREATE TABLE {{table}} (
+        user_id INTEGER PRIMARY KEY,
+        steam_id TEXT NOT NULL,
+        created_at INTEGER DEFAULT {_NOW_MS}
+    )''', {'created_at': _text_to_ms('created_at')})
+
+    # match_start_time and the detection columns stay in epoch seconds, matching the Steam API
+    _rebuild_table(conn, 'active_players', f'''
+    CREATE TABLE {{table}} (
+        user_id INTEGER PRIMARY KEY,
+        game_id TEXT NOT NULL,
+        match_id TEXT NOT NULL,
+        team TEXT NOT NULL,
+        match_start_time INTEGER NOT NULL,
+        started_at INTEGER DEFAULT {_NOW_MS},
+        detection_source TEXT,
+        detection_confidence INTEGER DEFAULT 0,
+        draft_detected_at INTEGER,
+        validated_at INTEGER,
+        game_start_time INTEGER
+    )''', {'started_at': _text_to_ms('started_at')})
+
+    _rebuild_table(conn, 'bets', f'''
+    CREATE TABLE {{table}} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        match_id TEXT NOT NULL,
+        bet_type TEXT NOT NULL DEFAULT 'team_win',
+        team TEXT,
+        target TEXT,
+        amount REAL NOT NULL,
+        placed_at INTEGER DEFAULT {_NOW_MS},
+        resolved BOOLEAN DEFAULT FALSE,
+        won BOOLEAN DEFAULT FALSE,
+        payout REAL DEFAULT 0,
+        tx_hash TEXT
+    )''', {'placed_at': _text_to_ms('placed_at')})
+
+    _rebuild_table(conn, 'match_events', f'''
+    CREATE TABLE {{table}} (
+        match_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        event_target TEXT,
+        event_time INTEGER,
+        recorded_at INTEGER DEFAULT {_NOW_MS},
+        PRIMARY KEY (match_id, event_type)
+    )''', {'event_time': 'event_time * 1000', 'recorded_at': _text_to_ms('recorded_at')})
+
+    _rebuild_table(conn, 'wallet_sessions', f'''
+    CREATE TABLE {{table}} (
+        user_id INTEGER PRIMARY KEY,
+        wallet_address TEXT,
+        session_id TEXT UNIQUE,
+        connected BOOLEAN DEFAULT FALSE,
+        last_active INTEGER DEFAULT {_NOW_MS}
+    )''', {'last_active': _text_to_ms('last_active')})
+
+    _rebuild_table(conn, 'rate_limits', f'''
+    CREATE TABLE {{table}} (
+        user_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        timestamp INTEGER DEFAULT {_NOW_MS},
+        PRIMARY KEY (user_id, action)
+    )''', {'timestamp': _text_to_ms('timestamp')})
+
+    _rebuild_table(conn, 'gsi_connections', f'''
+    CREATE TABLE {{table}} (
+        user_id INTEGER NOT NULL,
+        timestamp INTEGER DEFAULT {_NOW_MS},
+        PRIMARY KEY (user_id, timestamp)
+    )''', {'timestamp': _text_to_ms('timestamp')})
+
+    _rebuild_table(conn, 'game_state_transitions', '''
+    CREATE TABLE {table} (
+        user_id INTEGER NOT NULL,
+        match_id TEXT NOT NULL,
+        previous_state TEXT,
+        new_state TEXT,
+        timestamp INTEGER,
+        PRIMARY KEY (user_id, match_id, timestamp)
+    )''', {'timestamp': 'timestamp * 1000'})
+
+    # Rollups: GSI hours were local ISO hour prefixes, phase timelines were epoch seconds
+    _rebuild_table(conn, 'gsi_connection_rollups', '''
+    CREATE TABLE {table} (
+        user_id INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        packet_count INTEGER NOT NULL DEFAULT 0,
+        first_seen INTEGER,
+        last_seen INTEGER,
+        PRIMARY KEY (user_id, hour)
+    )''', {
+        'hour': _text_to_ms("hour || ':00:00'"),
+        'first_seen': _text_to_ms('first_seen'),
+        'last_seen': _text_to_ms('last_seen'),
+    })
+
+    _rebuild_table(conn, 'match_phase_timelines', '''
+    CREATE TABLE {table} (
+        match_id TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        first_seen INTEGER,
+        last_seen INTEGER,
+        PRIMARY KEY (match_id, user_id, state)
+    )''', {'first_seen': 'first_seen * 1000', 'last_seen': 'last_seen * 1000'})
+
+    _rebuild_table(conn, 'rollup_watermarks', '''
+    CREATE TABLE {table} (
+        name TEXT PRIMARY KEY,
+        rolled_until INTEGER NOT NULL
+    )''', {
+        'rolled_until': f"CASE WHEN name = 'gsi_connections' THEN {_text_to_ms('rolled_until')} "
+                        f"ELSE CAST(rolled_until AS INTEGER) * 1000 END"
+    })
+
+    # The stats tables are derived from bets, so retype them and recompute
+    conn.execute('DROP TABLE user_stats')
+    conn.execute('''
+    CREATE TABLE user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_bets INTEGER NOT NULL DEFAULT 0,
+        total_wagered REAL NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        pending INTEGER NOT NULL DEFAULT 0,
+        total_winnings REAL NOT NULL DEFAULT 0,
+        last_bet_at INTEGER
+    )
+    ''')
+
+    conn.execute('DROP TABLE user_daily_stats')
+    conn.execute('''
+    CREATE TABLE user_daily_stats (
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        total_bets INTEGER NOT NULL DEFAULT 0,
+        total_wagered REAL NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        total_winnings REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day)
+    )
+    ''')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_daily_stats_day ON user_daily_stats (day, user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_stats_last_bet ON user_stats (last_bet_at)')
+
+    _backfill_user_stats(conn, 'placed_at - placed_at % 86400000')
+
+
+def _add_match_details_cache(conn):
+    """Add the durable cache of completed match details."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS match_details_cache (
+        match_id TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        fetched_at INTEGER NOT NULL,
+        last_used_at INTEGER NOT NULL
+    )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_match_details_cache_used ON match_details_cache (last_used_at)')
+
+
+def _add_api_backoff(conn):
+    """Add the table holding snapshots of API backoff state."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS api_backoff (
+        key TEXT PRIMARY KEY,
+        failures INTEGER NOT NULL,
+        backoff_until INTEGER NOT NULL,
+        last_failure INTEGER NOT NULL
+    )
+    ''')
+
+
+def _add_match_history_cursors(conn):
+    """Add per-account cursors so match-history polling only looks at new matches."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS match_history_cursors (
+        account_id INTEGER PRIMARY KEY,
+        last_match_id INTEGER NOT NULL,
+        last_start_time INTEGER NOT NULL,
+        completed BOOLEAN NOT NULL DEFAULT FALSE,
+        updated_at INTEGER NOT NULL
+    )
+    ''')
+
+
+def _add_feed_cursors(conn):
+    """Add persisted cursors for sequence-numbered API feeds."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS feed_cursors (
+        name TEXT PRIMARY KEY,
+        seq_num INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    ''')
+
+
+def _add_resolution_queue(conn):
+    """Add the persisted work queue for bet resolution runs."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS resolution_queue (
+        match_id TEXT PRIMARY KEY,
+        enqueued_at INTEGER NOT NULL
+    )
+    ''')
+
+
+def _add_dm_outbox(conn):
+    """Add the outbox for bulk DMs, so an interrupted fan-out can resume."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS dm_outbox (
+        job TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        queued_at INTEGER NOT NULL,
+        sent_at INTEGER,
+        PRIMARY KEY (job, user_id)
+    )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_dm_outbox_unsent ON dm_outbox (queued_at) WHERE sent_at IS NULL')
+
+
+def _add_dm_outbox_attempts(conn):
+    """Count delivery attempts per outbox message, so failed DMs are retried a bounded number of times."""
+    conn.execute('ALTER TABLE dm_outbox ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+
+
+# Ordered list of (version, description, migration). Append new steps; never edit applied ones.
+MIGRATIONS = [
+    (1, "Create base tables", _create_base_tables),
+    (2, "Add match detection columns to active_players", _add_detection_columns),
+    (3, "Add indexes for hot queries", _add_hot_query_indexes),
+    (4, "Add GSI telemetry rollup tables", _add_telemetry_rollups),
+    (5, "Add per-user betting stats tables", _add_user_stats),
+    (6, "Convert timestamps to epoch milliseconds", _convert_timestamps_to_epoch_ms),
+    (7, "Add completed match details cache", _add_match_details_cache),
+    (8, "Add API backoff snapshot table", _add_api_backoff),
+    (9, "Add match history cursors", _add_match_history_cursors),
+    (10, "Add feed cursors", _add_feed_cursors),
+    (11, "Add bet resolution queue", _add_resolution_queue),
+    (12, "Add DM outbox", _add_dm_outbox),
+    (13, "Add DM outbox delivery attempts", _add_dm_outbox_attempts),
+]
+
+# Queries that must stay index-backed, with representative parameters for EXPLAIN QUERY PLAN
+HOT_QUERIES = {
+    "pending matches": ('SELECT DISTINCT match_id FROM bets WHERE resolved = FALSE', ()),
+    "bet rate limit": ('SELECT COUNT(*) as count FROM bets WHERE user_id = ? AND placed_at > ?', (0, 0)),
+    "unresolved bets by type": (
+        'SELECT id, user_id, team, amount FROM bets WHERE match_id = ? AND bet_type = "team_win" AND resolved = FALSE',
+        ('',)
+    ),
+    "other bettors": ('SELECT DISTINCT user_id FROM bets WHERE match_id = ? AND user_id != ?', ('', 0)),
+    "match events": ('SELECT event_type, event_target FROM match_events WHERE match_id = ?', ('',)),
+    "recent gsi connections": (
+        'SELECT COUNT(*) FROM gsi_connections WHERE user_id = ? AND timestamp >= ? AND (timestamp < ? OR timestamp >= ?)',
+        (0, 0, 0, 0)
+    ),
+    "gsi rollups by user": (
+        'SELECT COALESCE(SUM(packet_count), 0) FROM gsi_connection_rollups WHERE user_id = ? AND hour >= ? AND hour < ?',
+        (0, 0, 0)
+    ),
+    "match state transitions": (
+        'SELECT new_state, timestamp FROM game_state_transitions WHERE match_id = ? ORDER BY timestamp',
+        ('',)
+    ),
+    "user stats": ('SELECT * FROM user_stats WHERE user_id = ?', (0,)),
+    "user bet type stats": ('SELECT bet_type, bets, wins FROM user_bet_type_stats WHERE user_id = ?', (0,)),
+    "inactive bettors": (
+        'SELECT user_id, last_bet_at, total_bets FROM user_stats WHERE last_bet_at < ? AND total_bets > 3',
+        (0,)
+    ),
+    "players in match": ('SELECT user_id FROM active_players WHERE match_id = ?', ('',)),
+    "cached match details": ('SELECT payload FROM match_details_cache WHERE match_id = ?', ('',)),
+}
+
+
+def get_schema_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)."""
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn):
+    """Apply every pending migration in order, each in its own transaction."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    conn.commit()
+
+    current_version = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        logger.info(f"Applying database migration {version}: {description}")
+        conn.execute('BEGIN')
+        try:
+            migrate(conn)
+            conn.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Database migration {version} failed, rolled back")
+            raise
+
+    return get_schema_version(conn)
+
+
+def find_scanning_queries(conn):
+    """Return {name: plan} for hot queries whose plan falls back to a full table or index scan."""
+    partial_indexes = {
+        row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '%WHERE%'")
+    }
+
+    scanning = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+        for step in plan:
+            if not step.startswith('SCAN '):
+                continue
+            # Walking a partial index only touches the rows it covers, which is what we want
+            if ' INDEX ' in step and step.split(' INDEX ')[1].split(' ')[0] in partial_indexes:
+                continue
+            scanning[name] = plan
+            break
+    return scanning
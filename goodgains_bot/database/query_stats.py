@@ -0,0 +1,229 @@
+import re
+import sqlite3
+import threading
+import logging
+from collections import deque
+from time import perf_counter
+from config import DB_SLOW_QUERY_MS, DB_QUERY_STATS_SAMPLES, DB_SLOW_QUERY_LOG_SIZE
+from utils.timestamps import now_ms
+
+logger = logging.getLogger('goodgains_bot')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'IN \((?:\?, )*\?\)', re.IGNORECASE)
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its fingerprint: literals become ?, IN lists and whitespace are collapsed."""
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def _percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class QueryStats:
+    """Per-fingerprint call counts, latency percentiles and row counts, plus a slow-query log."""
+
+    def __init__(self, slow_ms=DB_SLOW_QUERY_MS, samples=DB_QUERY_STATS_SAMPLES, slow_log_size=DB_SLOW_QUERY_LOG_SIZE):
+        self.slow_ms = slow_ms
+        self.samples = samples
+        self._stats = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, sql):
+        # Statements come from a fixed set of string constants, so memoize the regex work
+        fingerprint = self._fingerprints.get(sql)
+        if fingerprint is None:
+            fingerprint = normalize_sql(sql)
+            if len(self._fingerprints) < 10000:
+                self._fingerprints[sql] = fingerprint
+        return fingerprint
+
+    def record(self, conn, sql, params, elapsed_ms, rows):
+        """Record one finished statement; statements over the threshold also go to the slow log."""
+        fingerprint = self.fingerprint(sql)
+
+        with self._lock:
+            entry = self._stats.get(fingerprint)
+            if entry is None:
+                entry = self._stats[fingerprint] = {
+                    'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'latencies': deque(maxlen=self.samples)
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            entry['latencies'].append(elapsed_ms)
+
+        if elapsed_ms >= self.slow_ms:
+            plan = self._explain(conn, sql, params)
+            with self._lock:
+                self._slow.append({
+                    'at': now_ms(), 'fingerprint': fingerprint, 'elapsed_ms': round(elapsed_ms, 3),
+                    'rows': rows, 'plan': plan
+                })
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {rows} rows): {fingerprint} | plan: {' | '.join(plan)}")
+
+    @staticmethod
+    def _explain(conn, sql, params):
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            # A plain cursor, so the EXPLAIN itself is not instrumented
+            return [row[3] for row in sqlite3.Cursor(conn).execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def snapshot(self):
+        """Return {fingerprint: summary} with p50/p95/p99 latencies, busiest statements first."""
+        with self._lock:
+            entries = [(fingerprint, dict(entry, latencies=sorted(entry['latencies'])))
+                       for fingerprint, entry in self._stats.items()]
+
+        summary = {}
+        for fingerprint, entry in sorted(entries, key=lambda item: item[1]['total_ms'], reverse=True):
+            latencies = entry['latencies']
+            summary[fingerprint] = {
+                'calls': entry['calls'],
+                'total_ms': round(entry['total_ms'], 3),
+                'mean_ms': round(entry['total_ms'] / entry['calls'], 3),
+                'p50_ms': round(_percentile(latencies, 50), 3),
+                'p95_ms': round(_percentile(latencies, 95), 3),
+                'p99_ms': round(_percentile(latencies, 99), 3),
+                'max_ms': round(entry['max_ms'], 3),
+                'rows': entry['rows'],
+            }
+        return summary
+
+    def slow_queries(self):
+        """Return the most recent slow statements, newest last."""
+        with self._lock:
+            return list(self._slow)
+
+    def dump(self):
+        """Machine-readable view of everything collected so far."""
+        return {
+            'generated_at': now_ms(),
+            'slow_query_ms': self.slow_ms,
+            'statements': self.snapshot(),
+            'slow_queries': self.slow_queries(),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+
+query_stats = QueryStats()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement, from execute until its rows have been fetched.
+
+    A statement is recorded once its rows run out, or when the cursor is re-executed, closed
+    or garbage collected, whichever comes first.
+    """
+
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = perf_counter()
+        super().execute(sql, parameters)
+        self._begin(sql, parameters, perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._begin(sql, (), perf_counter() - start)
+        return self
+
+    def _begin(self, sql, parameters, elapsed):
+        self._pending = [sql, parameters, elapsed, 0]
+        if self.description is None:
+            # Not a query: nothing left to fetch, count the rows it changed
+            self._pending[3] = max(self.rowcount, 0)
+            self._finish()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, parameters, elapsed, rows = pending
+            query_stats.record(self.connection, sql, parameters, elapsed * 1000, rows)
+
+    def _timed_fetch(self, fetch, *args):
+        start = perf_counter()
+        result = fetch(*args)
+        if self._pending:
+            self._pending[2] += perf_counter() - start
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch(super().fetchone)
+        if self._pending:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed_fetch(super().fetchmany, size or self.arraysize)
+        if self._pending:
+            self._pending[3] += len(rows)
+            if len(rows) < (size or self.arraysize):
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(super().fetchall)
+        if self._pending:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed_fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending:
+            self._pending[3] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Single-row lookups (conn.execute(...).fetchone()) are recorded once the cursor is dropped
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements all run through InstrumentedCursor."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
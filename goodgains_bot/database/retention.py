@@ -0,0 +1,147 @@
+import logging
+from datetime import datetime, timedelta
+from config import GSI_CONNECTIONS_TTL_HOURS, STATE_TRANSITIONS_TTL_DAYS, INCREMENTAL_VACUUM_PAGES, WRITE_QUEUE_FLUSH_MS
+from utils.timestamps import HOUR_MS, to_ms, floor_ms
+
+logger = logging.getLogger('goodgains_bot')
+
+# Telemetry is stamped when it is queued but committed by the write queue up to a flush later,
+# so rollups stop this far short of now; anything still queued is left for the next run
+ROLLUP_LAG_MS = 2 * WRITE_QUEUE_FLUSH_MS
+
+
+def _get_watermark(conn, name, default):
+    row = conn.execute('SELECT rolled_until FROM rollup_watermarks WHERE name = ?', (name,)).fetchone()
+    return row['rolled_until'] if row else default
+
+
+def _set_watermark(conn, name, value):
+    conn.execute(
+        'INSERT OR REPLACE INTO rollup_watermarks (name, rolled_until) VALUES (?, ?)',
+        (name, value)
+    )
+
+
+def rollup_gsi_connections(conn, now=None):
+    """Fold raw GSI packets from completed hours into per-user hourly counts."""
+    now = now or datetime.now()
+    hour_start = floor_ms(to_ms(now) - ROLLUP_LAG_MS, HOUR_MS)
+    watermark = _get_watermark(conn, 'gsi_connections', 0)
+
+    rolled = conn.execute(
+        '''INSERT INTO gsi_connection_rollups (user_id, hour, packet_count, first_seen, last_seen)
+        SELECT user_id, timestamp - timestamp % ?, COUNT(*), MIN(timestamp), MAX(timestamp)
+        FROM gsi_connections
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY user_id, timestamp - timestamp % ?
+        ON CONFLICT (user_id, hour) DO UPDATE SET
+            packet_count = packet_count + excluded.packet_count,
+            first_seen = MIN(first_seen, excluded.first_seen),
+            last_seen = MAX(last_seen, excluded.last_seen)''',
+        (HOUR_MS, watermark, hour_start, HOUR_MS)
+    ).rowcount
+
+    _set_watermark(conn, 'gsi_connections', hour_start)
+    return rolled
+
+
+def rollup_state_transitions(conn, now=None):
+    """Fold raw state transitions into one first/last-seen row per match, user and phase."""
+    now = now or datetime.now()
+    hour_start = floor_ms(to_ms(now) - ROLLUP_LAG_MS, HOUR_MS)
+    watermark = _get_watermark(conn, 'game_state_transitions', 0)
+
+    rolled = conn.execute(
+        '''INSERT INTO match_phase_timelines (match_id, user_id, state, first_seen, last_seen)
+        SELECT match_id, user_id, new_state, MIN(timestamp), MAX(timestamp)
+        FROM game_state_transitions
+        WHERE timestamp >= ? AND timestamp < ? AND new_state IS NOT NULL
+        GROUP BY match_id, user_id, new_state
+        ON CONFLICT (match_id, user_id, state) DO UPDATE SET
+            first_seen = MIN(first_seen, excluded.first_seen),
+            last_seen = MAX(last_seen, excluded.last_seen)''',
+        (watermark, hour_start)
+    ).rowcount
+
+    _set_watermark(conn, 'game_state_transitions', hour_start)
+    return rolled
+
+
+def prune_raw_telemetry(conn, now=None):
+    """Delete raw rows past their TTL, never touching rows that have not been rolled up yet."""
+    now = now or datetime.now()
+
+    gsi_cutoff = min(
+        to_ms(now - timedelta(hours=GSI_CONNECTIONS_TTL_HOURS)),
+        _get_watermark(conn, 'gsi_connections', 0)
+    )
+    gsi_deleted = conn.execute(
+        'DELETE FROM gsi_connections WHERE timestamp < ?',
+        (gsi_cutoff,)
+    ).rowcount
+
+    transition_cutoff = min(
+        to_ms(now - timedelta(days=STATE_TRANSITIONS_TTL_DAYS)),
+        _get_watermark(conn, 'game_state_transitions', 0)
+    )
+    transitions_deleted = conn.execute(
+        'DELETE FROM game_state_transitions WHERE timestamp < ?',
+        (transition_cutoff,)
+    ).rowcount
+
+    return gsi_deleted, transitions_deleted
+
+
+def rollup_and_prune(conn):
+    """Run the hourly rollups and TTL pruning in one transaction."""
+    gsi_rolled = rollup_gsi_connections(conn)
+    timelines_rolled = rollup_state_transitions(conn)
+    gsi_deleted, transitions_deleted = prune_raw_telemetry(conn)
+
+    logger.info(
+        f"Retention: rolled up {gsi_rolled} GSI hours and {timelines_rolled} phase timelines, "
+        f"pruned {gsi_deleted} GSI packets and {transitions_deleted} state transitions"
+    )
+    return gsi_deleted + transitions_deleted
+
+
+def count_recent_gsi_packets(conn, user_id, since):
+    """Count GSI packets for a user since a datetime, reading the rollups plus the not-yet-rolled tail.
+
+    Only whole rolled-up hours after since are read from the rollups; the partial hour at the
+    start of the window is counted from raw rows, which are kept until they pass their TTL.
+    """
+    watermark = _get_watermark(conn, 'gsi_connections', 0)
+    since_ms = to_ms(since)
+    first_full_hour = floor_ms(since_ms + HOUR_MS - 1, HOUR_MS)
+
+    rolled = conn.execute(
+        '''SELECT COALESCE(SUM(packet_count), 0) FROM gsi_connection_rollups
+        WHERE user_id = ? AND hour >= ? AND hour < ?''',
+        (user_id, first_full_hour, watermark)
+    ).fetchone()[0]
+
+    # Raw rows cover the partial first hour and everything the rollups haven't reached yet
+    raw = conn.execute(
+        '''SELECT COUNT(*) FROM gsi_connections
+        WHERE user_id = ? AND timestamp >= ? AND (timestamp < ? OR timestamp >= ?)''',
+        (user_id, since_ms, first_full_hour, watermark)
+    ).fetchone()[0]
+
+    return rolled + raw
+
+
+def run_incremental_vacuum(conn, pages=INCREMENTAL_VACUUM_PAGES):
+    """Return freed pages to the filesystem a chunk at a time, then truncate the WAL."""
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        # Databases created before incremental mode need one full VACUUM to switch over
+        logger.info("Switching database to incremental auto-vacuum (one-time full VACUUM)")
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    else:
+        conn.execute(f'PRAGMA incremental_vacuum({int(pages)})').fetchall()
+
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    logger.info(f"Incremental vacuum done, {freelist} free pages remaining")
+    return freelist
@@ -0,0 +1,152 @@
+import logging
+
+logger = logging.getLogger('goodgains_bot')
+
+# Aggregates over the bets table that the stats tables must always agree with.
+# Each takes a {where} clause so a rebuild can be limited to a few users.
+# Daily buckets start at UTC midnight (placed_at is epoch milliseconds, 86400000 ms per day).
+_USER_STATS_SELECT = '''
+    SELECT user_id,
+        COUNT(*) AS total_bets,
+        COALESCE(SUM(amount), 0) AS total_wagered,
+        SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins,
+        SUM(CASE WHEN won = FALSE AND resolved = TRUE THEN 1 ELSE 0 END) AS losses,
+        SUM(CASE WHEN resolved = FALSE THEN 1 ELSE 0 END) AS pending,
+        COALESCE(SUM(payout), 0) AS total_winnings,
+        MAX(placed_at) AS last_bet_at
+    FROM bets {where}
+    GROUP BY user_id'''
+
+_BET_TYPE_STATS_SELECT = '''
+    SELECT user_id, bet_type,
+        COUNT(*) AS bets,
+        SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins
+    FROM bets {where}
+    GROUP BY user_id, bet_type'''
+
+_DAILY_STATS_SELECT = '''
+    SELECT user_id, placed_at - placed_at % 86400000 AS day,
+        COUNT(*) AS total_bets,
+        COALESCE(SUM(amount), 0) AS total_wagered,
+        SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins,
+        COALESCE(SUM(payout), 0) AS total_winnings
+    FROM bets {where}
+    GROUP BY user_id, placed_at - placed_at % 86400000'''
+
+# (table, aggregate, columns); REAL sums are rounded before comparing so float drift is ignored
+_STATS_TABLES = [
+    ('user_stats', _USER_STATS_SELECT,
+     'user_id, total_bets, ROUND(total_wagered, 9), wins, losses, pending, ROUND(total_winnings, 9), last_bet_at'),
+    ('user_bet_type_stats', _BET_TYPE_STATS_SELECT, 'user_id, bet_type, bets, wins'),
+    ('user_daily_stats', _DAILY_STATS_SELECT,
+     'user_id, day, total_bets, ROUND(total_wagered, 9), wins, ROUND(total_winnings, 9)'),
+]
+
+
+def record_bet_placed(conn, bet_id):
+    """Add a newly inserted bet to its user's stats; call in the same transaction as the INSERT."""
+    conn.execute(
+        '''INSERT INTO user_stats (user_id, total_bets, total_wagered, pending, last_bet_at)
+        SELECT user_id, 1, amount, 1, placed_at FROM bets WHERE id = ?
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_bets = total_bets + 1,
+            total_wagered = total_wagered + excluded.total_wagered,
+            pending = pending + 1,
+            last_bet_at = MAX(COALESCE(last_bet_at, 0), excluded.last_bet_at)''',
+        (bet_id,)
+    )
+    conn.execute(
+        '''INSERT INTO user_bet_type_stats (user_id, bet_type, bets)
+        SELECT user_id, bet_type, 1 FROM bets WHERE id = ?
+        ON CONFLICT (user_id, bet_type) DO UPDATE SET bets = bets + 1''',
+        (bet_id,)
+    )
+    conn.execute(
+        '''INSERT INTO user_daily_stats (user_id, day, total_bets, total_wagered)
+        SELECT user_id, placed_at - placed_at % 86400000, 1, amount FROM bets WHERE id = ?
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            total_bets = total_bets + 1,
+            total_wagered = total_wagered + excluded.total_wagered''',
+        (bet_id,)
+    )
+
+
+def record_bet_resolved(conn, bet_id, won, payout):
+    """Move a bet from pending to won/lost in its user's stats; call in the same transaction as the UPDATE."""
+    bet = conn.execute(
+        'SELECT user_id, bet_type, placed_at - placed_at % 86400000 AS day FROM bets WHERE id = ?',
+        (bet_id,)
+    ).fetchone()
+    if not bet:
+        return
+
+    won = 1 if won else 0
+    conn.execute(
+        '''UPDATE user_stats SET
+            wins = wins + ?, losses = losses + ?, pending = pending - 1, total_winnings = total_winnings + ?
+        WHERE user_id = ?''',
+        (won, 1 - won, payout, bet['user_id'])
+    )
+    conn.execute(
+        'UPDATE user_bet_type_stats SET wins = wins + ? WHERE user_id = ? AND bet_type = ?',
+        (won, bet['user_id'], bet['bet_type'])
+    )
+    conn.execute(
+        '''UPDATE user_daily_stats SET wins = wins + ?, total_winnings = total_winnings + ?
+        WHERE user_id = ? AND day = ?''',
+        (won, payout, bet['user_id'], bet['day'])
+    )
+
+
+def rebuild_user_stats(conn, user_ids=None):
+    """Recompute the stats tables from bets, for everyone or just the given users."""
+    if user_ids is None:
+        where, params = '', ()
+    else:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        where = f"WHERE user_id IN ({', '.join('?' * len(user_ids))})"
+        params = tuple(user_ids)
+
+    for table, select, _ in _STATS_TABLES:
+        conn.execute(f'DELETE FROM {table} {where}', params)
+        conn.execute(f'INSERT INTO {table} {select.format(where=where)}', params)
+
+    rebuilt = conn.execute(f'SELECT COUNT(*) FROM user_stats {where}', params).fetchone()[0]
+    logger.info(f"Rebuilt betting stats for {rebuilt} users")
+    return rebuilt
+
+
+def find_stats_drift(conn):
+    """Return the sorted user IDs whose stored stats no longer match the bets table."""
+    drifted = set()
+    for table, select, columns in _STATS_TABLES:
+        expected = f'SELECT {columns} FROM ({select.format(where="")})'
+        stored = f'SELECT {columns} FROM {table}'
+        rows = conn.execute(
+            f'SELECT user_id FROM ({expected} EXCEPT {stored}) '
+            f'UNION SELECT user_id FROM ({stored} EXCEPT {expected})'
+        ).fetchall()
+        drifted.update(row['user_id'] for row in rows)
+    return sorted(drifted)
+
+
+def weekly_summaries(conn, since_day):
+    """Return one row of summed daily stats per user with bets in the since_day bucket or later.
+
+    since_day is the UTC-midnight bucket holding the window start, so bets placed earlier that
+    same day are counted too: a summary covers whole days rather than dropping the first one.
+    """
+    return conn.execute(
+        '''SELECT user_id,
+            SUM(total_bets) AS total_bets,
+            SUM(total_wagered) AS total_wagered,
+            SUM(wins) AS wins,
+            SUM(total_winnings) AS total_winnings
+        FROM user_daily_stats
+        WHERE day >= ?
+        GROUP BY user_id
+        HAVING SUM(total_bets) > 0''',
+        (since_day,)
+    ).fetchall()
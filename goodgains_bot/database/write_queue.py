@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from config import WRITE_QUEUE_FLUSH_MS, WRITE_QUEUE_MAX_ROWS
+from database.connection import get_db_connection
+
+logger = logging.getLogger('goodgains_bot')
+
+
+class WriteQueue:
+    """Single background writer that group-commits high-frequency writes.
+
+    Statements are buffered and written in one transaction every flush interval, or
+    sooner once the batch reaches max_rows. Callers that need to read their own writes
+    can wait on flush() / flush_async().
+    """
+
+    def __init__(self, flush_interval_ms=WRITE_QUEUE_FLUSH_MS, max_rows=WRITE_QUEUE_MAX_ROWS):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self._pending = []
+        self._waiters = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._writing = False  # True while the writer thread is committing a batch it has taken
+        self.batches_written = 0
+        self.rows_written = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-write-queue', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, sql, params=()):
+        """Queue a write statement; it is committed with the next batch."""
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Write queue has been stopped")
+            self._ensure_started()
+            self._pending.append((sql, params))
+            if len(self._pending) >= self.max_rows:
+                self._cond.notify()
+
+    def flush(self):
+        """Ask for an immediate flush; the returned Future resolves once everything queued so far is committed."""
+        future = Future()
+        with self._cond:
+            if not self._pending and not self._waiters and not self._writing:
+                future.set_result(0)
+                return future
+            self._ensure_started()
+            self._waiters.append(future)
+            self._cond.notify()
+        return future
+
+    async def flush_async(self):
+        """Awaitable version of flush() for coroutines that need read-your-writes."""
+        return await asyncio.wrap_future(self.flush())
+
+    def stop(self):
+        """Flush whatever is still queued and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+
+        if thread:
+            thread.join()
+        else:
+            self._write_batch(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopping and not self._waiters and len(self._pending) < self.max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch, self._pending = self._pending, []
+                waiters, self._waiters = self._waiters, []
+                stopping = self._stopping
+                self._writing = bool(batch)
+
+            if batch:
+                self._write_batch(batch)
+
+            with self._cond:
+                self._writing = False
+
+            for waiter in waiters:
+                waiter.set_result(len(batch))
+
+            if stopping:
+                return
+
+    def _write_batch(self, batch):
+        """Write a batch in one transaction, falling back to row-by-row if any statement fails."""
+        try:
+            with get_db_connection() as conn:
+                conn.execute('BEGIN')
+                for sql, params in batch:
+                    conn.execute(sql, params)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Batched write of {len(batch)} statements failed ({e}), retrying individually")
+            with get_db_connection() as conn:
+                for sql, params in batch:
+                    try:
+                        conn.execute(sql, params)
+                        conn.commit()
+                    except Exception as row_error:
+                        conn.rollback()
+                        logger.error(f"Dropping queued write '{sql}': {row_error}")
+
+        self.batches_written += 1
+        self.rows_written += len(batch)
+
+
+write_queue = WriteQueue()
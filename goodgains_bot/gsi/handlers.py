@@ -2,6 +2,9 @@ import logging
 import asyncio
 from datetime import datetime
 from database.connection import get_db_connection
+from database.async_db import db
+from database.write_queue import write_queue
+from utils.timestamps import now_ms
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -19,7 +22,7 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
         game_state = data.get('map', {}).get('game_state')
 
         # Log basic match info
-        logger.info(f"Processing GSI data for match {match_id}, state: {game_state}")
+        logger.debug(f"Processing GSI data for match {match_id}, state: {game_state}")
 
         if not user_id or not bot:
             return False
@@ -27,10 +30,13 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
         # Track game state transitions
         transition = detect_game_phases(data, user_id, bot)
 
-        # Handle draft phase detection
-        if 'draft' in data and data['draft'].get('activeteam') is not None:
-            logger.info(f"Draft phase detected for user {user_id} in match {match_id}")
-            with get_db_connection() as conn:
+        # Handle draft phase detection (every draft packet carries activeteam; only the first is recorded)
+        if is_draft_packet(data) and not draft_recorded(bot, user_id, match_id):
+            logger.debug(f"Draft phase detected for user {user_id} in match {match_id}")
+
+            draft_time = int(datetime.now().timestamp())
+
+            def record_draft(conn):
                 # Check if already tracking this match
                 existing = conn.execute(
                     'SELECT 1 FROM active_players WHERE user_id = ? AND match_id = ?',
@@ -40,8 +46,9 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
                 if existing:
                     conn.execute(
                         'UPDATE active_players SET draft_detected_at = ? WHERE user_id = ? AND match_id = ?',
-                        (int(datetime.now().timestamp()), user_id, match_id)
+                        (draft_time, user_id, match_id)
                     )
+                    return True
                 else:
                     # Get player team information if available
                     player_team = None
@@ -51,12 +58,30 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
 
                     if player_team:
                         # Create initial match entry with draft phase
-                        current_time = int(datetime.now().timestamp())
                         conn.execute(
                             'INSERT INTO active_players (user_id, game_id, match_id, team, match_start_time, draft_detected_at, detection_source) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                            (user_id, '570', match_id, player_team, current_time, current_time, 'gsi_draft')
+                            (user_id, '570', match_id, player_team, draft_time, draft_time, 'gsi_draft')
                         )
-                conn.commit()
+                        return True
+                return False
+
+            if await db.run(record_draft):
+                # Lets the poll scheduler check this user often until the game starts
+                from bot.bot import active_players_lock
+                with active_players_lock:
+                    tracked = bot.active_players_cache.get(user_id)
+                    if tracked and tracked.get('match_id') == match_id:
+                        tracked['draft_detected_at'] = draft_time
+                    elif 'player' in data:
+                        team_name = data['player'].get('team_name', '').lower()
+                        bot.active_players_cache[user_id] = {
+                            'game_id': '570',
+                            'match_id': match_id,
+                            'team': 'team1' if team_name == 'radiant' else 'team2',
+                            'match_start_time': draft_time,
+                            'draft_detected_at': draft_time,
+                            'last_check_time': draft_time
+                        }
 
             # Cross-validate with draft detection
             await cross_validate_match_detection(bot, user_id, match_id, 'draft')
@@ -89,19 +114,16 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
                     pass
 
             # Update database with precise start time
-            with get_db_connection() as conn:
-                # Check if we're already tracking this match
-                existing = conn.execute(
-                    'SELECT 1 FROM active_players WHERE user_id = ? AND match_id = ?',
-                    (user_id, match_id)
-                ).fetchone()
-
-                if existing:
-                    conn.execute(
-                        'UPDATE active_players SET game_start_time = ? WHERE user_id = ? AND match_id = ?',
-                        (precise_start_time, user_id, match_id)
-                    )
-                    conn.commit()
+            # Only touches the row if we're already tracking this match
+            await db.execute(
+                'UPDATE active_players SET game_start_time = ? WHERE user_id = ? AND match_id = ?',
+                (precise_start_time, user_id, match_id)
+            )
+            from bot.bot import active_players_lock
+            with active_players_lock:
+                tracked = bot.active_players_cache.get(user_id)
+                if tracked and tracked.get('match_id') == match_id:
+                    tracked['game_start_time'] = precise_start_time
 
             # Perform cross-validation
             high_confidence = await cross_validate_match_detection(bot, user_id, match_id, 'gsi')
@@ -115,35 +137,39 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
             # Only process if we have team info
             if player_team:
                 # Make sure there's an entry in active_players
-                with get_db_connection() as conn:
+                current_time = int(datetime.now().timestamp())
+
+                def insert_if_missing(conn):
                     existing = conn.execute(
                         'SELECT match_start_time FROM active_players WHERE user_id = ? AND match_id = ?',
                         (user_id, match_id)
                     ).fetchone()
 
-                    current_time = int(datetime.now().timestamp())
-
                     if not existing:
                         conn.execute(
                             'INSERT INTO active_players (user_id, game_id, match_id, team, match_start_time, game_start_time, detection_source) VALUES (?, ?, ?, ?, ?, ?, ?)',
                             (user_id, '570', match_id, player_team, current_time, precise_start_time, 'gsi')
                         )
-                        conn.commit()
-
-                        # Update cache
-                        from bot.bot import active_players_lock
-                        with active_players_lock:
-                            bot.active_players_cache[user_id] = {
-                                'game_id': '570',
-                                'match_id': match_id,
-                                'team': player_team,
-                                'match_start_time': precise_start_time,
-                                'last_check_time': current_time
-                            }
-
-                        # Send notification only if this is a new detection or high confidence
-                        from utils.notifications import send_match_notification
-                        await send_match_notification(bot, user_id, match_id, player_team, "Public Match")
+                    return existing
+
+                existing = await db.run(insert_if_missing)
+
+                if not existing:
+                    # Update cache
+                    from bot.bot import active_players_lock
+                    with active_players_lock:
+                        bot.active_players_cache[user_id] = {
+                            'game_id': '570',
+                            'match_id': match_id,
+                            'team': player_team,
+                            'match_start_time': precise_start_time,
+                            'game_start_time': precise_start_time,
+                            'last_check_time': current_time
+                        }
+
+                    # Send notification only if this is a new detection or high confidence
+                    from utils.notifications import send_match_notification
+                    await send_match_notification(bot, user_id, match_id, player_team, "Public Match")
 
         # Process other game events (keep your existing code)
         if 'events' in data:
@@ -168,6 +194,20 @@ async def process_dota2_gsi_data(data, user_id=None, bot=None):
         logger.error(traceback.format_exc())
         return False
 
+
+def is_draft_packet(data):
+    """Whether a GSI packet was sent during hero draft."""
+    return 'draft' in data and data['draft'].get('activeteam') is not None
+
+
+def draft_recorded(bot, user_id, match_id):
+    """Whether the user's draft for match_id is already stored, so later draft packets can be ignored."""
+    from bot.bot import active_players_lock
+    with active_players_lock:
+        tracked = bot.active_players_cache.get(user_id)
+        return bool(tracked and tracked.get('match_id') == match_id and tracked.get('draft_detected_at'))
+
+
 def determine_mvp(data, match_id):
     """Determine MVP based on game statistics."""
     players_dict = data.get('players', {})
@@ -213,7 +253,7 @@ def determine_mvp(data, match_id):
             if not existing:
                 conn.execute(
                     'INSERT INTO match_events (match_id, event_type, event_target, event_time) VALUES (?, ?, ?, ?)',
-                    (match_id, "mvp", mvp_name, int(datetime.now().timestamp()))
+                    (match_id, "mvp", mvp_name, now_ms())
                 )
                 conn.commit()
 
@@ -243,12 +283,10 @@ def detect_game_phases(data, user_id, bot):
         logger.info(f"Game state transition for user {user_id}: {previous_state} → {current_state}")
 
         # Record transition in database
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT INTO game_state_transitions (user_id, match_id, previous_state, new_state, timestamp) VALUES (?, ?, ?, ?, ?)',
-                (user_id, match_id, previous_state, current_state, current_time)
-            )
-            conn.commit()
+        write_queue.enqueue(
+            'INSERT OR IGNORE INTO game_state_transitions (user_id, match_id, previous_state, new_state, timestamp) VALUES (?, ?, ?, ?, ?)',
+            (user_id, match_id, previous_state, current_state, now_ms())
+        )
 
         # Update cache with new state
         bot.game_state_cache[user_id] = {
@@ -311,11 +349,9 @@ async def cross_validate_match_detection(bot, user_id, match_id, source):
     is_high_confidence = confidence >= MATCH_DETECTION_CONFIDENCE_THRESHOLD
 
     # Record validation data in database
-    with get_db_connection() as conn:
-        conn.execute(
-            'UPDATE active_players SET detection_confidence = ?, validated_at = ? WHERE user_id = ? AND match_id = ?',
-            (confidence, current_time, user_id, match_id)
-        )
-        conn.commit()
+    write_queue.enqueue(
+        'UPDATE active_players SET detection_confidence = ?, validated_at = ? WHERE user_id = ? AND match_id = ?',
+        (confidence, current_time, user_id, match_id)
+    )
 
     return is_high_confidence
\ No newline at end of file
@@ -0,0 +1,40 @@
+import time
+from config import GSI_LIVE_WINDOW_SECONDS
+
+
+class HeartbeatRegistry:
+    """Latest GSI packet per user, written by the GSI endpoint and read by match polling.
+
+    Lookups are a single dict access; entries are replaced wholesale, so the Flask thread
+    and the bot loop can share the registry without a lock.
+    """
+
+    def __init__(self, live_window=GSI_LIVE_WINDOW_SECONDS):
+        self.live_window = live_window
+        self._beats = {}  # user_id -> (monotonic time, match_id, game_state)
+        self.checks_skipped = 0
+
+    def beat(self, user_id, match_id=None, game_state=None):
+        """Record a packet; returns True if the user's match or game state changed since the last one."""
+        previous = self._beats.get(user_id)
+        self._beats[user_id] = (time.monotonic(), match_id, game_state)
+        return previous is None or previous[1:] != (match_id, game_state)
+
+    def is_live(self, user_id):
+        """True if the user's client has sent GSI data within the live window."""
+        beat = self._beats.get(user_id)
+        return beat is not None and time.monotonic() - beat[0] < self.live_window
+
+    def get(self, user_id):
+        """Return (seconds since last packet, match_id, game_state), or None if never seen."""
+        beat = self._beats.get(user_id)
+        if beat is None:
+            return None
+        return time.monotonic() - beat[0], beat[1], beat[2]
+
+    def stats(self):
+        live = sum(1 for user_id in list(self._beats) if self.is_live(user_id))
+        return {'tracked': len(self._beats), 'live': live, 'checks_skipped': self.checks_skipped}
+
+
+gsi_heartbeats = HeartbeatRegistry()
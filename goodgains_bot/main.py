@@ -5,10 +5,14 @@ import sys
 import signal
 
 # Import configuration
-from config import DISCORD_BOT_TOKEN, NGROK_ENABLED, FLASK_PORT
+from config import DISCORD_BOT_TOKEN, NGROK_ENABLED, FLASK_PORT, RATE_LIMITER_PERSIST
 
 # Import modules
-from database.connection import initialize_database
+from database.connection import initialize_database, close_db_connections, get_db_connection
+from database.api_backoff import save_backoff_state, load_backoff_state
+from api.rate_limiter import rate_limiter
+from database.async_db import db
+from database.write_queue import write_queue
 from web.server import app, run_flask_server
 from web.ngrok import setup_ngrok
 from bot.bot import GoodGainsBot
@@ -29,7 +33,16 @@ app.config['bot'] = bot
 # Function to clean up resources on shutdown
 def shutdown_handler(signum, frame):
     logger.info("Shutdown signal received, cleaning up...")
-    # Any cleanup needed
+    write_queue.stop()
+    db.close()
+    if RATE_LIMITER_PERSIST:
+        try:
+            with get_db_connection() as conn:
+                save_backoff_state(conn, rate_limiter.export_state())
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to save API backoff state: {e}")
+    close_db_connections()
     sys.exit(0)
 
 
@@ -38,6 +51,12 @@ def main():
     initialize_database()
     logger.info("Database initialized")
 
+    # Pick up API backoff state from before the restart
+    if RATE_LIMITER_PERSIST:
+        with get_db_connection(readonly=True) as conn:
+            rate_limiter.import_state(load_backoff_state(conn))
+        logger.info(f"Restored backoff state for {len(rate_limiter)} API keys")
+
     # Register commands
     from commands import register_all_commands
     register_all_commands(bot)
@@ -0,0 +1,135 @@
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import pytest
+
+# The bot runs from its own directory and imports its packages top-level
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connection  # noqa: E402
+from database.connection import ConnectionPool  # noqa: E402
+from database.migrations import apply_migrations  # noqa: E402
+from database.write_queue import write_queue  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Lines reported by benchmark tests, printed together at the end of the run
+_benchmark_results = []
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: measures time or memory; deselect with -m "not benchmark"')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _benchmark_results:
+        terminalreporter.section('benchmarks')
+        for line in _benchmark_results:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture
+def benchmark_report(request):
+    """Return a function that records a measurement for the benchmark summary."""
+    def report(line):
+        _benchmark_results.append(f'{request.node.name}: {line}')
+    return report
+
+
+@pytest.fixture
+def memory_db():
+    """A fresh in-memory database with every migration applied."""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    apply_migrations(conn)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point the connection pools at a migrated throwaway database file."""
+    db_path = str(tmp_path / 'goodgains.db')
+    monkeypatch.setattr(connection, '_writer_pool', ConnectionPool(db_path, 2))
+    monkeypatch.setattr(connection, '_reader_pool', ConnectionPool(db_path, 2, readonly=True))
+
+    with connection.get_db_connection() as conn:
+        apply_migrations(conn)
+
+    yield db_path
+
+    # Don't let queued writes from this test land in the next test's database
+    write_queue.flush().result(timeout=5)
+    connection._writer_pool.close()
+    connection._reader_pool.close()
+
+
+class SteamStandIn:
+    """Local aiohttp server standing in for api.steampowered.com.
+
+    routes maps an API path to a recorded payload (bytes, or a dict to encode as JSON) or to a
+    callable taking the request's query dict and returning one. Every request is logged in calls.
+    """
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.routes = {}
+        self.calls = []
+        self.connections = set()  # client (host, port) pairs, one per TCP connection
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        self.calls.append((request.path, dict(request.query)))
+        self.connections.add(request.transport.get_extra_info('peername'))
+        route = self.routes.get(request.path)
+        if route is None:
+            return web.Response(status=404)
+        body = route(dict(request.query)) if callable(route) else route
+        if isinstance(body, int):
+            return web.Response(status=body)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        return web.Response(body=body, content_type='application/json')
+
+    @contextlib.asynccontextmanager
+    async def running(self):
+        """Serve on a free local port and point the shared HTTP client at it for the duration.
+
+        The client is not paced while pointed at the stand-in: the Steam quota doesn't apply here.
+        """
+        from aiohttp import web
+        from api import http
+        from api.scheduler import ApiScheduler
+
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self._handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.monkeypatch.setattr(http, 'STEAM_API_BASE_URL', f'http://127.0.0.1:{port}')
+        self.monkeypatch.setattr(http, '_steam_host', f'127.0.0.1:{port}')
+        self.monkeypatch.setattr(http, 'scheduler', ApiScheduler(rate=1_000_000, burst=1_000_000))
+        try:
+            yield self
+        finally:
+            await http.close_session()
+            await runner.cleanup()
+
+
+@pytest.fixture
+def steam_stand_in(monkeypatch):
+    return SteamStandIn(monkeypatch)
+
+
+@pytest.fixture
+def load_fixture():
+    """Return a loader for API payloads stored in tests/fixtures."""
+    def load(name):
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            return f.read()
+    return load
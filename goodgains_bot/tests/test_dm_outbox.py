@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from api.scheduler import ApiScheduler
+from config import DM_MAX_ATTEMPTS
+from database.async_db import db
+from utils import dm_fanout
+from utils.dm_fanout import queue_direct_messages, deliver_pending_messages
+
+
+class FakeBot:
+    """Records delivered DMs; users in fail_times fail that many times before succeeding."""
+
+    def __init__(self, fail_times=None, delay=0):
+        self.fail_times = dict(fail_times or {})
+        self.delay = delay
+        self.attempts = []
+        self.delivered = []
+
+    async def send_direct_message(self, user_id, message):
+        self.attempts.append(user_id)
+        await asyncio.sleep(self.delay)
+        if self.fail_times.get(user_id, 0) > 0:
+            self.fail_times[user_id] -= 1
+            return False
+        self.delivered.append(user_id)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def fast_fanout(database, monkeypatch):
+    monkeypatch.setattr(dm_fanout, 'dm_scheduler', ApiScheduler(rate=1000))
+
+
+def _queue(job, user_ids):
+    return asyncio.run(queue_direct_messages(job, [(user_id, f"hello {user_id}") for user_id in user_ids]))
+
+
+def _unsent():
+    rows = asyncio.run(db.fetchall('SELECT user_id, attempts FROM dm_outbox WHERE sent_at IS NULL ORDER BY user_id'))
+    return [tuple(row) for row in rows]
+
+
+def test_job_is_only_queued_once():
+    assert _queue('weekly_summary:2026-W10', [1, 2]) is True
+    assert _queue('weekly_summary:2026-W10', [1, 2, 3]) is False
+
+
+def test_failed_messages_are_retried():
+    _queue('job', [1, 2, 3])
+    bot = FakeBot(fail_times={2: 1})
+
+    assert asyncio.run(deliver_pending_messages(bot, retry_delay=0)) == 3
+    assert sorted(bot.delivered) == [1, 2, 3]
+    assert bot.attempts.count(2) == 2
+    assert _unsent() == []
+
+
+def test_permanently_failing_message_stays_unsent():
+    _queue('job', [1, 2])
+    bot = FakeBot(fail_times={2: DM_MAX_ATTEMPTS + 1})
+
+    assert asyncio.run(deliver_pending_messages(bot, retry_delay=0)) == 1
+    assert bot.attempts.count(2) == DM_MAX_ATTEMPTS
+    assert _unsent() == [(2, DM_MAX_ATTEMPTS)]
+
+    # A later run doesn't keep retrying it
+    assert asyncio.run(deliver_pending_messages(FakeBot(), retry_delay=0)) == 0
+
+
+def test_interrupted_run_resumes_without_duplicates():
+    user_ids = list(range(1, 21))
+    _queue('job', user_ids)
+    first = FakeBot(delay=0.01)
+
+    async def crash_midway():
+        task = asyncio.create_task(deliver_pending_messages(first, retry_delay=0))
+        while len(first.delivered) < 5:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await dm_fanout.write_queue.flush_async()
+
+    asyncio.run(crash_midway())
+    assert 5 <= len(first.delivered) < len(user_ids)
+
+    second = FakeBot()
+    asyncio.run(deliver_pending_messages(second, retry_delay=0))
+
+    assert sorted(first.delivered + second.delivered) == user_ids
+    assert _unsent() == []
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from database.async_db import db
+from gsi import handlers
+from gsi.heartbeat import HeartbeatRegistry
+from web import server
+
+USER_ID = 42
+MATCH_ID = '7712345678'
+
+
+class FakeBot:
+    def __init__(self):
+        self.active_players_cache = {}
+        self.game_state_cache = {}
+        self.match_detection_confidence = {}
+        self.messages = []
+        self.loop = None
+
+    def is_ready(self):
+        return True
+
+    async def send_direct_message(self, user_id, message):
+        self.messages.append((user_id, message))
+        return True
+
+
+def _packet(game_state='DOTA_GAMERULES_STATE_HERO_SELECTION', draft=True, user_id=USER_ID):
+    packet = {
+        'map': {'matchid': MATCH_ID, 'game_state': game_state},
+        'player': {'team_name': 'radiant'},
+        'auth': {'token': f'discord{user_id}'},
+    }
+    if draft:
+        packet['draft'] = {'activeteam': 2}
+    return packet
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Count transactions sent to the writer thread."""
+    counted = {'runs': 0}
+    run = db.run
+
+    async def counting_run(fn, *args, readonly=False):
+        if not readonly:
+            counted['runs'] += 1
+        return await run(fn, *args, readonly=readonly)
+
+    monkeypatch.setattr(db, 'run', counting_run)
+    return counted
+
+
+def test_draft_is_recorded_once_per_match(database, writes):
+    bot = FakeBot()
+
+    async def scenario():
+        for _ in range(30):
+            await handlers.process_dota2_gsi_data(_packet(), USER_ID, bot)
+        return await db.fetchall('SELECT match_id, draft_detected_at FROM active_players WHERE user_id = ?', (USER_ID,))
+
+    rows = asyncio.run(scenario())
+
+    assert [row['match_id'] for row in rows] == [MATCH_ID]
+    assert rows[0]['draft_detected_at'] == bot.active_players_cache[USER_ID]['draft_detected_at']
+    assert writes['runs'] == 1
+    assert len(bot.messages) == 1
+
+
+def test_endpoint_only_schedules_packets_that_can_change_state(database, monkeypatch):
+    bot = FakeBot()
+    scheduled = []
+
+    def run_coroutine_threadsafe(coro, loop):
+        scheduled.append(coro.cr_frame.f_locals['data']['map']['game_state'])
+        coro.close()
+
+    monkeypatch.setattr(server, 'gsi_heartbeats', HeartbeatRegistry())
+    monkeypatch.setattr(server.asyncio, 'run_coroutine_threadsafe', run_coroutine_threadsafe)
+    monkeypatch.setitem(server.app.config, 'bot', bot)
+    client = server.app.test_client()
+
+    # First packet is new; the rest repeat it until the draft lands in the cache
+    client.post('/gsi/dota2', json=_packet())
+    client.post('/gsi/dota2', json=_packet())
+    bot.active_players_cache[USER_ID] = {'match_id': MATCH_ID, 'draft_detected_at': 1}
+    for _ in range(20):
+        client.post('/gsi/dota2', json=_packet())
+    # Picks are over, so the state moves on; then the game clock ticks without a state change
+    for _ in range(20):
+        client.post('/gsi/dota2', json=_packet('DOTA_GAMERULES_STATE_GAME_IN_PROGRESS', draft=False))
+    # Unauthenticated clients can't be tied to a user
+    client.post('/gsi/dota2', json={'map': {'matchid': MATCH_ID, 'game_state': 'DOTA_GAMERULES_STATE_POST_GAME'}})
+
+    assert scheduled == ['DOTA_GAMERULES_STATE_HERO_SELECTION', 'DOTA_GAMERULES_STATE_HERO_SELECTION',
+                         'DOTA_GAMERULES_STATE_GAME_IN_PROGRESS']
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from api import http
+from api.http import steam_get_json, HttpStatusError
+
+PATH = '/ISteamWebAPIUtil/GetSupportedAPIList/v1/'
+
+
+def test_requests_reuse_pooled_connections(steam_stand_in, monkeypatch):
+    monkeypatch.setattr(http, 'STEAM_API_KEY', 'test-key')
+    steam_stand_in.routes[PATH] = lambda query: {'echo': query}
+
+    async def scenario():
+        async with steam_stand_in.running():
+            first = await steam_get_json(PATH, {'n': 0})
+            for n in range(1, 20):
+                await steam_get_json(PATH, {'n': n})
+            return first
+
+    assert asyncio.run(scenario()) == {'echo': {'key': 'test-key', 'n': '0'}}
+    assert len(steam_stand_in.calls) == 20
+    assert len(steam_stand_in.connections) == 1
+
+
+def test_error_status_raises(steam_stand_in):
+    steam_stand_in.routes[PATH] = 503
+
+    async def scenario():
+        async with steam_stand_in.running():
+            with pytest.raises(HttpStatusError) as excinfo:
+                await steam_get_json(PATH)
+            return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert (error.status, error.path) == (503, PATH)
+
+
+def test_concurrent_requests_stay_within_per_host_limit(steam_stand_in):
+    steam_stand_in.routes[PATH] = lambda query: {'n': query['n']}
+
+    async def scenario():
+        async with steam_stand_in.running():
+            return await asyncio.gather(*(steam_get_json(PATH, {'n': n}) for n in range(40)))
+
+    results = asyncio.run(scenario())
+    assert [result['n'] for result in results] == [str(n) for n in range(40)]
+    assert len(steam_stand_in.connections) <= http.HTTP_MAX_CONNECTIONS_PER_HOST
+
+
+@pytest.mark.benchmark
+def test_keepalive_session_against_requests_in_a_thread(steam_stand_in, benchmark_report):
+    # The client this replaced: a fresh requests.get per call, run in a worker thread
+    requests = pytest.importorskip('requests')
+    steam_stand_in.routes[PATH] = lambda query: {'n': query['n']}
+    calls = 200
+
+    async def old_get(n):
+        response = await asyncio.to_thread(requests.get, f"{http.STEAM_API_BASE_URL}{PATH}", {'n': n}, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    async def new_get(n):
+        return await steam_get_json(PATH, {'n': n})
+
+    async def sequential(get):
+        latencies = []
+        for n in range(calls):
+            started = time.perf_counter()
+            await get(n)
+            latencies.append(time.perf_counter() - started)
+        return sorted(latencies)
+
+    async def concurrent(get):
+        started = time.perf_counter()
+        await asyncio.gather(*(get(n) for n in range(calls)))
+        return time.perf_counter() - started
+
+    async def scenario():
+        async with steam_stand_in.running():
+            await old_get(0), await new_get(0)  # warm up both clients
+            return {
+                name: (await sequential(get), await concurrent(get))
+                for name, get in (('requests.get in thread', old_get), ('keep-alive session', new_get))
+            }
+
+    results = asyncio.run(scenario())
+
+    for name, (latencies, concurrent_time) in results.items():
+        benchmark_report(
+            f'{name}: {calls} sequential p50 {latencies[calls // 2] * 1000:.2f} ms, '
+            f'p99 {latencies[int(calls * 0.99) - 1] * 1000:.2f} ms, {calls / sum(latencies):.0f} req/s; '
+            f'{calls} concurrent {calls / concurrent_time:.0f} req/s'
+        )
+    old_latencies, old_concurrent = results['requests.get in thread']
+    new_latencies, new_concurrent = results['keep-alive session']
+    assert sum(new_latencies) < sum(old_latencies)
+    assert new_concurrent < old_concurrent
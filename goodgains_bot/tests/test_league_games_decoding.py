@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import tracemalloc
+import ijson
+import pytest
+from api import dota
+
+PATH = '/IDOTA2Match_570/GetLiveLeagueGames/v1/'
+
+
+def _fetch(steam_stand_in):
+    async def fetch():
+        async with steam_stand_in.running():
+            return await dota.get_live_league_games()
+    return asyncio.run(fetch())
+
+
+def test_streaming_and_full_decode_agree(steam_stand_in, load_fixture, monkeypatch):
+    payload = load_fixture('get_live_league_games.json')
+    steam_stand_in.routes[PATH] = payload
+
+    streamed = _fetch(steam_stand_in)
+    monkeypatch.setattr(dota, 'ijson', None)
+    full = _fetch(steam_stand_in)
+
+    expected = [
+        {
+            'match_id': game['match_id'],
+            'players': [{'account_id': player['account_id'], 'team': player['team']} for player in game['players']]
+        }
+        for game in json.loads(payload)['result']['games']
+    ]
+    assert streamed == full == expected
+
+
+def test_projection_ignores_scoreboard_players(load_fixture):
+    # Scoreboard entries also carry account_ids; only result.games[].players should be collected
+    projection = dota._LeagueGamesProjection()
+    for prefix, event, value in ijson.parse(load_fixture('get_live_league_games.json')):
+        projection.feed(prefix, event, value)
+
+    assert len(projection.games) == 13
+    assert all(len(game['players']) in (0, 10, 11, 12) for game in projection.games)
+    assert all(set(player) == {'account_id', 'team'} for game in projection.games for player in game['players'])
+
+
+class _RecordedResponse:
+    """Serves a payload the way aiohttp does: read() copies the whole body, content.read(n) hands out chunks."""
+
+    def __init__(self, body):
+        self._body = body
+        self._offset = 0
+        self.content = self
+
+    async def read(self, n=-1):
+        if n < 0:
+            return bytes(memoryview(self._body))
+        chunk = self._body[self._offset:self._offset + n]
+        self._offset += len(chunk)
+        return chunk
+
+
+def _scaled_payload(payload, copies):
+    # Production responses run to megabytes; repeating the recorded games keeps the shape
+    data = json.loads(payload)
+    data['result']['games'] = data['result']['games'] * copies
+    return json.dumps(data).encode()
+
+
+def _measure_decode(body):
+    """Return (peak traced bytes, best-of-five seconds) for one _decode_league_games pass."""
+    # Warm up first so lazily imported modules don't count towards the peak
+    asyncio.run(dota._decode_league_games(_RecordedResponse(body)))
+    tracemalloc.start()
+    asyncio.run(dota._decode_league_games(_RecordedResponse(body)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        asyncio.run(dota._decode_league_games(_RecordedResponse(body)))
+        timings.append(time.perf_counter() - start)
+    return peak, min(timings)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('copies', [1, 40])
+def test_streaming_decode_memory_and_time(load_fixture, monkeypatch, benchmark_report, copies):
+    body = _scaled_payload(load_fixture('get_live_league_games.json'), copies)
+
+    streamed_peak, streamed_time = _measure_decode(body)
+    monkeypatch.setattr(dota, 'ijson', None)
+    full_peak, full_time = _measure_decode(body)
+
+    benchmark_report(
+        f'{len(body) / 1024:.0f} KiB payload: '
+        f'ijson projection peak {streamed_peak / 1024:.0f} KiB in {streamed_time * 1000:.1f} ms, '
+        f'json.loads peak {full_peak / 1024:.0f} KiB in {full_time * 1000:.1f} ms'
+    )
+    # ijson materialises the events for one 64 KiB read at a time, so streaming costs about a
+    # megabyte whatever the payload size and only pays off once responses reach production size
+    if copies > 1:
+        assert streamed_peak * 4 < full_peak
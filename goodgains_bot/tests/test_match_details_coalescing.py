@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from api import dota
+
+
+@pytest.fixture
+def fetches(database, monkeypatch):
+    """Replace the Steam call with a slow stand-in; returns the list of match_ids it was asked for."""
+    calls = []
+
+    async def fake_fetch(match_id, priority):
+        calls.append(match_id)
+        await asyncio.sleep(0.05)
+        if match_id.startswith('done'):
+            return {'status': 'completed', 'winner': 'team1', 'data': {'match_id': match_id, 'radiant_win': True}}
+        return {'status': 'in_progress', 'data': {'match_id': match_id}}
+
+    monkeypatch.setattr(dota, '_fetch_match_details', fake_fetch)
+    monkeypatch.setattr(dota, '_match_details_cache', {})
+    monkeypatch.setattr(dota, '_match_details_inflight', {})
+    monkeypatch.setattr(dota, 'match_details_stats', dict.fromkeys(dota.match_details_stats, 0))
+    return calls
+
+
+def test_concurrent_callers_share_one_request(fetches):
+    async def scenario():
+        return await asyncio.gather(*(dota.get_match_details('live1') for _ in range(10)))
+
+    results = asyncio.run(scenario())
+
+    assert fetches == ['live1']
+    assert all(result is results[0] for result in results)
+    stats = dota.get_match_details_stats()
+    assert (stats['requests'], stats['fetches'], stats['coalesced']) == (10, 1, 9)
+    assert stats['dedup_ratio'] == pytest.approx(0.9)
+
+
+def test_results_are_cached_until_they_expire(fetches, monkeypatch):
+    async def twice():
+        await dota.get_match_details('live2')
+        await dota.get_match_details('live2')
+
+    asyncio.run(twice())
+    assert fetches == ['live2']
+
+    monkeypatch.setattr(dota, 'MATCH_DETAILS_TTL_IN_PROGRESS', 0)
+    asyncio.run(dota.get_match_details('live3'))
+    asyncio.run(dota.get_match_details('live3'))
+    assert fetches == ['live2', 'live3', 'live3']
+
+
+def test_completed_matches_come_back_from_disk(fetches, monkeypatch):
+    first = asyncio.run(dota.get_match_details('done1'))
+    monkeypatch.setattr(dota, '_match_details_cache', {})
+
+    assert asyncio.run(dota.get_match_details('done1')) == first
+    assert fetches == ['done1']
+    assert dota.match_details_stats['disk_hits'] == 1
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+from api import dota
+from api.match_feed import MatchSequenceFeed
+from database.async_db import db
+from database.write_queue import write_queue
+
+SEQ_PATH = '/IDOTA2Match_570/GetMatchHistoryBySequenceNum/v1/'
+HISTORY_PATH = '/IDOTA2Match_570/GetMatchHistory/v1/'
+
+
+@pytest.fixture
+def feed_server(database, steam_stand_in, load_fixture, monkeypatch):
+    """Stand-in serving a recorded run of finished matches by sequence number."""
+    matches = json.loads(load_fixture('get_match_history_by_seq_num.json'))
+
+    def by_seq_num(query):
+        start, count = int(query['start_at_match_seq_num']), int(query['matches_requested'])
+        batch = [match for match in matches if match['match_seq_num'] >= start][:count]
+        return {'result': {'status': 1, 'matches': batch}}
+
+    steam_stand_in.routes[SEQ_PATH] = by_seq_num
+    # The newest match before the recording starts, so a fresh feed begins at the first recorded match
+    steam_stand_in.routes[HISTORY_PATH] = {
+        'result': {'status': 1, 'matches': [{'match_seq_num': matches[0]['match_seq_num'] - 1}]}
+    }
+    monkeypatch.setattr(dota, '_match_details_cache', {})
+    steam_stand_in.matches = matches
+    return steam_stand_in
+
+
+def test_feed_finds_tracked_matches_in_one_pass(feed_server):
+    matches = feed_server.matches
+    tracked = {str(matches[3]['match_id']), str(matches[120]['match_id']), '1'}
+    feed = MatchSequenceFeed()
+
+    async def scenario():
+        async with feed_server.running():
+            found = await feed.poll(tracked)
+            cached = await dota.get_cached_match_details(matches[120]['match_id'])
+            return found, cached
+
+    found, cached = asyncio.run(scenario())
+
+    assert sorted(match_id for match_id, _ in found) == sorted(tracked - {'1'})
+    assert all(result['status'] == 'completed' for _, result in found)
+    assert cached['winner'] == ('team1' if matches[120]['radiant_win'] else 'team2')
+    # One call for the starting point, then 100 + 50 matches
+    assert [path for path, _ in feed_server.calls] == [HISTORY_PATH, SEQ_PATH, SEQ_PATH]
+    assert feed.is_live()
+    assert feed.matches_seen == len(matches)
+
+
+def test_cursor_is_persisted_and_resumed(feed_server):
+    matches = feed_server.matches
+
+    async def scenario():
+        async with feed_server.running():
+            await MatchSequenceFeed().poll(set())
+            await write_queue.flush_async()
+            row = await db.fetchone('SELECT seq_num FROM feed_cursors WHERE name = ?', ('match_sequence',))
+
+            feed_server.calls.clear()
+            # A restarted feed picks up from the stored cursor and finds nothing new
+            found = await MatchSequenceFeed().poll({str(matches[0]['match_id'])})
+            return row['seq_num'], found
+
+    seq_num, found = asyncio.run(scenario())
+
+    assert seq_num == matches[-1]['match_seq_num'] + 1
+    assert found == []
+    assert [path for path, query in feed_server.calls] == [SEQ_PATH]
+    assert feed_server.calls[0][1]['start_at_match_seq_num'] == str(seq_num)
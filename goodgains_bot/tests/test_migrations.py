@@ -0,0 +1,41 @@
+import sqlite3
+import pytest
+from database.migrations import MIGRATIONS, apply_migrations
+from database.user_stats import find_stats_drift
+
+
+@pytest.fixture
+def legacy_db():
+    """A database at schema version 4, with TEXT timestamps, holding a couple of bets."""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    for version, _, migrate in MIGRATIONS[:4]:
+        migrate(conn)
+    conn.executemany(
+        'INSERT INTO bets (user_id, match_id, amount, placed_at, resolved, won, payout) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(1, 'm1', 0.1, '2026-03-01 10:00:00', True, True, 0.17),
+         (1, 'm2', 0.2, '2026-03-02 11:00:00', False, False, 0)]
+    )
+    yield conn
+    conn.close()
+
+
+def test_user_stats_migration_buckets_text_timestamps_by_date(legacy_db):
+    MIGRATIONS[4][2](legacy_db)
+
+    days = [row['day'] for row in legacy_db.execute('SELECT day FROM user_daily_stats ORDER BY day')]
+    assert days == ['2026-03-01', '2026-03-02']
+    stats = legacy_db.execute('SELECT total_bets, wins, pending FROM user_stats WHERE user_id = 1').fetchone()
+    assert tuple(stats) == (2, 1, 1)
+
+
+def test_legacy_database_migrates_to_consistent_stats(legacy_db):
+    legacy_db.execute('CREATE TABLE schema_version (version INTEGER PRIMARY KEY, description TEXT NOT NULL, '
+                      'applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    legacy_db.executemany('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                          [(version, description) for version, description, _ in MIGRATIONS[:4]])
+    legacy_db.commit()
+
+    assert apply_migrations(legacy_db) == MIGRATIONS[-1][0]
+    assert find_stats_drift(legacy_db) == []
+    assert legacy_db.execute('SELECT COUNT(*) FROM user_daily_stats WHERE day = 0').fetchone()[0] == 0
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from api import steam
+
+
+@pytest.fixture
+def steam_api(monkeypatch):
+    """Stand-in for GetPlayerSummaries that records the IDs asked for in each call."""
+    calls = []
+
+    async def fake_get_json(path, params=None, timeout=None, priority=None):
+        steam_ids = params['steamids'].split(',')
+        calls.append(steam_ids)
+        await asyncio.sleep(0.05)
+        return {'response': {'players': [{'steamid': steam_id} for steam_id in steam_ids]}}
+
+    monkeypatch.setattr(steam, 'steam_get_json', fake_get_json)
+    monkeypatch.setattr(steam, '_summary_cache', {})
+    monkeypatch.setattr(steam, '_pending_summaries', {})
+    monkeypatch.setattr(steam, '_summary_batch_task', None)
+    return calls
+
+
+def test_lookups_are_batched_per_100_ids(steam_api):
+    steam_ids = [str(76561198000000000 + i) for i in range(250)]
+
+    async def lookup_all():
+        return await asyncio.gather(*(steam.get_player_summary(steam_id) for steam_id in steam_ids))
+
+    summaries = asyncio.run(lookup_all())
+
+    assert [summary['steamid'] for summary in summaries] == steam_ids
+    assert sorted(len(call) for call in steam_api) == [50, 100, 100]
+
+
+def test_lookup_during_in_flight_batch_is_fetched(steam_api):
+    async def lookups():
+        first = asyncio.create_task(steam.get_player_summary('1'))
+        await asyncio.sleep(0.07)  # past the batch window, while the first request is in flight
+        second = await asyncio.wait_for(steam.get_player_summary('2'), timeout=2)
+        return await first, second
+
+    first, second = asyncio.run(lookups())
+
+    assert first == {'steamid': '1'} and second == {'steamid': '2'}
+    assert steam_api == [['1'], ['2']]
+
+
+def test_cached_summary_skips_the_api(steam_api):
+    async def lookup_twice():
+        await steam.get_player_summary('3')
+        return await steam.get_player_summary('3')
+
+    assert asyncio.run(lookup_twice()) == {'steamid': '3'}
+    assert steam_api == [['3']]
@@ -0,0 +1,54 @@
+import time
+from types import SimpleNamespace
+import pytest
+from bot import poll_scheduler as poll_scheduler_module
+from bot.poll_scheduler import PollScheduler, STATE_INTERVALS
+from gsi.heartbeat import HeartbeatRegistry
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(poll_scheduler_module, 'gsi_heartbeats', HeartbeatRegistry(live_window=30))
+    scheduler = PollScheduler()
+    scheduler.sync({1: '76561198000000001'})
+    return scheduler
+
+
+def _bot(**tracked):
+    return SimpleNamespace(active_players_cache={1: tracked} if tracked else {})
+
+
+def test_new_users_are_due_immediately(scheduler):
+    assert scheduler.pop_due(10) == [(1, '76561198000000001')]
+    assert scheduler.pop_due(10) == []
+
+
+def test_idle_and_recent_users(scheduler):
+    now = time.time()
+    assert scheduler.classify(_bot(), 1, now) == 'idle'
+    scheduler.reschedule(_bot(), 1, in_match=True)
+    assert scheduler.classify(_bot(), 1, time.time()) == 'recent'
+
+
+def test_draft_without_gsi_feed(scheduler):
+    now = time.time()
+    bot = _bot(match_id='123', draft_detected_at=int(now) - 30)
+    assert scheduler.classify(bot, 1, now) == 'draft'
+
+    scheduler.reschedule(bot, 1, in_match=True)
+    assert scheduler._users[1]['due'] - time.time() <= STATE_INTERVALS['draft']
+
+
+def test_draft_takes_precedence_over_live_gsi(scheduler):
+    poll_scheduler_module.gsi_heartbeats.beat(1, '123', 'DOTA_GAMERULES_STATE_GAME_IN_PROGRESS')
+    now = time.time()
+    assert scheduler.classify(_bot(match_id='123', draft_detected_at=int(now)), 1, now) == 'draft'
+    assert scheduler.classify(_bot(match_id='123'), 1, now) == 'gsi_live'
+
+
+def test_game_start_or_old_draft_means_in_game(scheduler):
+    now = time.time()
+    started = _bot(match_id='123', draft_detected_at=int(now) - 60, game_start_time=int(now))
+    assert scheduler.classify(started, 1, now) == 'in_game'
+    stale = _bot(match_id='123', draft_detected_at=int(now) - 3600)
+    assert scheduler.classify(stale, 1, now) == 'in_game'
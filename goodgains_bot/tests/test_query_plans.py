@@ -0,0 +1,14 @@
+from database.migrations import MIGRATIONS, HOT_QUERIES, find_scanning_queries, get_schema_version
+
+
+def test_migrations_reach_latest_version(memory_db):
+    assert get_schema_version(memory_db) == MIGRATIONS[-1][0]
+
+
+def test_hot_queries_use_indexes(memory_db):
+    assert find_scanning_queries(memory_db) == {}
+
+
+def test_scanning_query_is_reported(memory_db, monkeypatch):
+    monkeypatch.setitem(HOT_QUERIES, "unindexed", ('SELECT * FROM bets WHERE amount > ?', (0,)))
+    assert list(find_scanning_queries(memory_db)) == ["unindexed"]
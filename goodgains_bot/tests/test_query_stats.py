@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+from database import query_stats as query_stats_module
+from database.query_stats import InstrumentedConnection, QueryStats
+
+SELECT = 'SELECT n FROM numbers ORDER BY n'
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = QueryStats(slow_ms=float('inf'))
+    monkeypatch.setattr(query_stats_module, 'query_stats', stats)
+    return stats
+
+
+@pytest.fixture
+def conn(stats):
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE numbers (n INTEGER)')
+    conn.executemany('INSERT INTO numbers (n) VALUES (?)', [(n,) for n in range(5)])
+    stats.reset()
+    yield conn
+    conn.close()
+
+
+def test_fetchone_loop_is_recorded_once_with_every_row(conn, stats):
+    cursor = conn.execute(SELECT)
+    rows = []
+    while (row := cursor.fetchone()) is not None:
+        rows.append(row[0])
+        # Still being read, so nothing is recorded yet
+        assert stats.snapshot() == {}
+
+    assert rows == [0, 1, 2, 3, 4]
+    assert stats.snapshot()[SELECT]['calls'] == 1
+    assert stats.snapshot()[SELECT]['rows'] == 5
+
+
+def test_partial_fetchone_is_recorded_when_cursor_is_reused_or_dropped(conn, stats):
+    cursor = conn.cursor()
+    cursor.execute(SELECT).fetchone()
+    cursor.fetchone()
+    cursor.execute('SELECT COUNT(*) FROM numbers')
+    assert stats.snapshot()[SELECT]['rows'] == 2
+
+    # The usual single-row lookup never reads past its row
+    assert conn.execute('SELECT n FROM numbers WHERE n = ?', (3,)).fetchone()[0] == 3
+    del cursor
+
+    snapshot = stats.snapshot()
+    assert snapshot['SELECT n FROM numbers WHERE n = ?']['rows'] == 1
+    assert snapshot['SELECT COUNT(*) FROM numbers']['calls'] == 1
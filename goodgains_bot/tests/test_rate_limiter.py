@@ -0,0 +1,96 @@
+import sys
+import time
+import tracemalloc
+import pytest
+from api import rate_limiter as rate_limiter_module
+from api.rate_limiter import ApiRateLimiter
+from database.api_backoff import save_backoff_state, load_backoff_state
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def _limiter(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter_module, 'time', clock)
+    return ApiRateLimiter(**kwargs), clock
+
+
+def test_backoff_doubles_and_resets_on_success(monkeypatch):
+    limiter, clock = _limiter(monkeypatch)
+
+    assert [limiter.record_failure('match_details_1') for _ in range(3)] == [2, 4, 8]
+    assert not limiter.should_retry('match_details_1')
+    clock.now += 9
+    assert limiter.should_retry('match_details_1')
+
+    limiter.record_success('match_details_1')
+    assert len(limiter) == 0
+
+
+def test_keys_expire_after_ttl(monkeypatch):
+    limiter, clock = _limiter(monkeypatch, entry_ttl=60)
+    limiter.record_failure('a')
+    clock.now += 30
+    limiter.record_failure('b')
+
+    clock.now += 40
+    limiter.record_failure('c')
+    assert [row[0] for row in limiter.export_state()] == ['b', 'c']
+
+
+def _fail_distinct_keys(limiter, clock, count):
+    for i in range(count):
+        limiter.record_failure(f"match_details_{i}")
+        clock.now += 0.001
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('max_keys', [50_000, None], ids=['capped', 'uncapped'])
+def test_synthetic_keys_stay_bounded(monkeypatch, benchmark_report, max_keys):
+    keys = 1_000_000
+    cap = max_keys or sys.maxsize
+
+    limiter, clock = _limiter(monkeypatch, max_keys=cap)
+    started = time.perf_counter()
+    _fail_distinct_keys(limiter, clock, keys)
+    elapsed = time.perf_counter() - started
+
+    assert len(limiter) == min(keys, cap)
+    assert limiter.should_retry('match_details_0')
+    assert not limiter.should_retry(f'match_details_{keys - 1}')
+    del limiter
+
+    # Memory is measured on a second run, as tracing slows the loop down several times
+    limiter, clock = _limiter(monkeypatch, max_keys=cap)
+    tracemalloc.start()
+    _fail_distinct_keys(limiter, clock, keys)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    benchmark_report(
+        f'{keys} distinct keys, max_keys={max_keys}: {elapsed:.2f}s ({elapsed / keys * 1e6:.2f} us/failure), '
+        f'{len(limiter)} kept, {retained / 2**20:.1f} MiB retained, {peak / 2**20:.1f} MiB peak'
+    )
+    if max_keys is not None:
+        assert elapsed < 10
+        assert peak < 32 * 2**20
+
+
+def test_state_survives_a_restart(memory_db, monkeypatch):
+    limiter, clock = _limiter(monkeypatch)
+    limiter.record_failure('player_summary_1')
+    limiter.record_failure('player_summary_1')
+    limiter.record_failure('match_history_2')
+    save_backoff_state(memory_db, limiter.export_state())
+
+    restarted = ApiRateLimiter()
+    restarted.import_state(load_backoff_state(memory_db))
+
+    assert restarted.export_state() == limiter.export_state()
+    assert not restarted.should_retry('player_summary_1')
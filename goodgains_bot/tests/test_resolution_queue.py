@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from bot import tasks
+from database.async_db import db
+from database.write_queue import write_queue
+
+
+class FakeBot:
+    async def wait_until_ready(self):
+        pass
+
+
+@pytest.fixture
+def resolver(database, monkeypatch):
+    """Stub out per-match resolution with a slow stand-in that tracks concurrency."""
+    state = {'handled': [], 'in_flight': 0, 'max_in_flight': 0, 'fail': set()}
+
+    async def fake_resolve_match(bot, match_id):
+        state['in_flight'] += 1
+        state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        try:
+            await asyncio.sleep(0.01)
+            state['handled'].append(match_id)
+            if match_id in state['fail']:
+                raise RuntimeError("API timeout")
+        finally:
+            state['in_flight'] -= 1
+
+    monkeypatch.setattr(tasks, '_resolve_match', fake_resolve_match)
+    return state
+
+
+def _place_bets(match_ids):
+    asyncio.run(db.executemany(
+        'INSERT INTO bets (user_id, match_id, team, amount) VALUES (1, ?, ?, 0.1)',
+        [(match_id, 'team1') for match_id in match_ids]
+    ))
+
+
+def _run_resolution():
+    async def run():
+        await tasks.resolve_bets.coro(FakeBot())
+        await write_queue.flush_async()
+        return await db.fetchone('SELECT COUNT(*) AS count FROM resolution_queue')
+
+    return asyncio.run(run())['count']
+
+
+def test_pending_matches_resolve_concurrently(resolver, monkeypatch):
+    monkeypatch.setattr(tasks, 'RESOLUTION_CONCURRENCY', 50)
+    match_ids = [str(7600000000 + i) for i in range(1000)]
+    _place_bets(match_ids)
+    resolver['fail'] = {match_ids[10]}
+
+    started = time.perf_counter()
+    assert _run_resolution() == 0
+    elapsed = time.perf_counter() - started
+
+    # Every match handled once, despite one failing, with at most 50 in flight
+    assert sorted(resolver['handled']) == match_ids
+    assert resolver['max_in_flight'] == 50
+    # One at a time this would take at least 10s
+    assert elapsed < 5
+
+
+def test_interrupted_run_resumes_from_the_queue(resolver):
+    _place_bets(['1', '2', '3'])
+    # A crashed run left two matches in the queue
+    asyncio.run(db.executemany('INSERT INTO resolution_queue (match_id, enqueued_at) VALUES (?, 0)', [('2',), ('3',)]))
+
+    assert _run_resolution() == 0
+    assert sorted(resolver['handled']) == ['2', '3']
+
+    # The next run starts over from the bets table
+    assert _run_resolution() == 0
+    assert sorted(resolver['handled']) == ['1', '2', '2', '3', '3']
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from database.retention import ROLLUP_LAG_MS, rollup_gsi_connections, count_recent_gsi_packets
+from utils.timestamps import HOUR_MS, to_ms, from_ms
+
+HOUR = to_ms(datetime(2026, 3, 1, 10)) // HOUR_MS * HOUR_MS
+
+
+def _add_packets(conn, *timestamps):
+    conn.executemany('INSERT INTO gsi_connections (user_id, timestamp) VALUES (1, ?)', [(ts,) for ts in timestamps])
+
+
+def test_count_excludes_rolled_packets_before_since(memory_db):
+    minute = 60 * 1000
+    _add_packets(memory_db, HOUR + 10 * minute, HOUR + 40 * minute, HOUR + HOUR_MS + 5 * minute,
+                 HOUR + 2 * HOUR_MS + 5 * minute)
+    rollup_gsi_connections(memory_db, now=from_ms(HOUR + 2 * HOUR_MS + 30 * minute))
+
+    since = from_ms(HOUR + 30 * minute)
+    assert count_recent_gsi_packets(memory_db, 1, since) == 3
+    assert count_recent_gsi_packets(memory_db, 1, from_ms(HOUR)) == 4
+
+
+def test_count_before_any_rollup(memory_db):
+    _add_packets(memory_db, HOUR + 1, HOUR + 2, HOUR + 3)
+    assert count_recent_gsi_packets(memory_db, 1, from_ms(HOUR + 2)) == 2
+
+
+def test_rollup_stops_short_of_queued_writes(memory_db):
+    # Just past the hour, packets from the previous hour may still be in the write queue
+    now = from_ms(HOUR + ROLLUP_LAG_MS // 2)
+    _add_packets(memory_db, HOUR - 1000)
+    rollup_gsi_connections(memory_db, now=now)
+    _add_packets(memory_db, HOUR - 500)  # committed late
+
+    rollup_gsi_connections(memory_db, now=now + timedelta(hours=1))
+    rolled = memory_db.execute('SELECT SUM(packet_count) FROM gsi_connection_rollups').fetchone()[0]
+    assert rolled == 2
@@ -0,0 +1,117 @@
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from database.migrations import MIGRATIONS, apply_migrations
+from utils.timestamps import DAY_MS, floor_ms, to_ms
+
+BETS = 200_000
+USERS = 2_000
+SAMPLED_USERS = 200
+
+# The range queries as they ran against TEXT timestamps (before migration 6) and as they run now.
+# Per-user queries are timed as one pass over SAMPLED_USERS users; the others as a single query.
+WEEKLY_OVER_BETS = '''SELECT COUNT(*) AS total_bets, SUM(amount) AS total_wagered,
+    SUM(CASE WHEN won = TRUE THEN 1 ELSE 0 END) AS wins, SUM(payout) AS total_winnings
+    FROM bets WHERE user_id = ? AND placed_at > ?'''
+WEEKLY_OVER_DAILY_STATS = '''SELECT SUM(total_bets) AS total_bets, SUM(total_wagered) AS total_wagered,
+    SUM(wins) AS wins, SUM(total_winnings) AS total_winnings
+    FROM user_daily_stats WHERE user_id = ? AND day {op} ?'''
+INACTIVE_OVER_USER_STATS = '''SELECT user_id, last_bet_at AS last_bet, total_bets
+    FROM user_stats WHERE last_bet_at < ? AND total_bets > 3'''
+INACTIVE_OVER_BETS = '''SELECT user_id, MAX(placed_at) AS last_bet, COUNT(*) AS total_bets
+    FROM bets GROUP BY user_id HAVING last_bet < ? AND total_bets > 3'''
+
+
+def _legacy_database(now):
+    """A schema version 5 database holding BETS bets with CURRENT_TIMESTAMP-style TEXT placed_at values."""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    rng = random.Random(7)
+
+    for _, _, migrate in MIGRATIONS[:4]:
+        migrate(conn)
+
+    utc_now = now.astimezone(timezone.utc)
+    rows = []
+    for i in range(BETS):
+        user_id = rng.randrange(1, USERS + 1)
+        # One user in ten has gone quiet for at least 20 days
+        age = timedelta(days=rng.uniform(20 if user_id % 10 == 0 else 0, 60))
+        resolved = rng.random() < 0.9
+        won = resolved and rng.random() < 0.5
+        amount = round(rng.uniform(0.01, 0.5), 4)
+        rows.append((user_id, str(7900000000 + i // 5), amount, (utc_now - age).strftime('%Y-%m-%d %H:%M:%S'),
+                     resolved, won, amount * 2 if won else 0))
+    conn.executemany(
+        'INSERT INTO bets (user_id, match_id, amount, placed_at, resolved, won, payout) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    MIGRATIONS[4][2](conn)
+
+    conn.execute('CREATE TABLE schema_version (version INTEGER PRIMARY KEY, description TEXT NOT NULL, '
+                 'applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    conn.executemany('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                     [(version, description) for version, description, _ in MIGRATIONS[:5]])
+    conn.commit()
+    return conn
+
+
+def _time_ms(conn, sql, param_sets, repeats=10):
+    """Best-of-repeats milliseconds for one pass over param_sets, and the rows of the last query."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for params in param_sets:
+            rows = conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, rows
+
+
+def _run_queries(conn, now, old_format):
+    """Time each range query, passing thresholds the way the code did before or after migration 6."""
+    users = range(1, USERS + 1, USERS // SAMPLED_USERS)
+    hour_ago, week_ago, two_weeks_ago = now - timedelta(hours=1), now - timedelta(days=7), now - timedelta(days=14)
+
+    if old_format:
+        threshold, since, since_day, inactive_since, op = (
+            hour_ago.isoformat(), week_ago.isoformat(), week_ago.date().isoformat(), two_weeks_ago.isoformat(), '>')
+    else:
+        threshold, since, since_day, inactive_since, op = (
+            to_ms(hour_ago), to_ms(week_ago), floor_ms(to_ms(week_ago), DAY_MS), to_ms(two_weeks_ago), '>=')
+
+    return {
+        'rate limit': _time_ms(conn, 'SELECT COUNT(*) as count FROM bets WHERE user_id = ? AND placed_at > ?',
+                               [(user_id, threshold) for user_id in users]),
+        'weekly range over bets': _time_ms(conn, WEEKLY_OVER_BETS, [(user_id, since) for user_id in users]),
+        'weekly via daily stats': _time_ms(conn, WEEKLY_OVER_DAILY_STATS.format(op=op),
+                                           [(user_id, since_day) for user_id in users]),
+        'inactivity via user_stats': _time_ms(conn, INACTIVE_OVER_USER_STATS, [(inactive_since,)]),
+        'inactivity grouping over bets': _time_ms(conn, INACTIVE_OVER_BETS, [(inactive_since,)]),
+    }
+
+
+@pytest.mark.benchmark
+def test_epoch_ms_range_queries(benchmark_report):
+    """Reproduces the before/after numbers for migration 6 (TEXT timestamps -> epoch milliseconds)."""
+    now = datetime.now()
+    conn = _legacy_database(now)
+    try:
+        before = _run_queries(conn, now, old_format=True)
+        assert apply_migrations(conn) == MIGRATIONS[-1][0]
+        after = _run_queries(conn, now, old_format=False)
+    finally:
+        conn.close()
+
+    for name in before:
+        benchmark_report(f'{name}: {before[name][0]:.2f} -> {after[name][0]:.2f} ms '
+                         f'({BETS} bets, {SAMPLED_USERS} users per query)')
+
+    benchmark_report(f"inactive users found: {len(before['inactivity via user_stats'][1])} -> "
+                     f"{len(after['inactivity via user_stats'][1])} (expected {USERS // 10})")
+
+    # Integer thresholds pick out exactly the users who went quiet, whichever table answers
+    assert len(after['inactivity via user_stats'][1]) == USERS // 10
+    assert len(after['inactivity grouping over bets'][1]) == USERS // 10
+    assert after['inactivity grouping over bets'][0] < before['inactivity grouping over bets'][0]
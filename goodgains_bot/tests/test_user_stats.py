@@ -0,0 +1,26 @@
+from datetime import timedelta
+from database.user_stats import rebuild_user_stats, weekly_summaries
+from utils.timestamps import DAY_MS, HOUR_MS, floor_ms, from_ms, to_ms
+
+
+def test_weekly_summary_includes_the_bucket_holding_the_window_start(memory_db):
+    # The window opens mid-afternoon, seven days before the summary runs
+    now = from_ms(1_760_000_000_000 - 1_760_000_000_000 % DAY_MS + 15 * HOUR_MS)
+    window_start = to_ms(now - timedelta(days=7))
+    since_day = floor_ms(window_start, DAY_MS)
+
+    placed = {
+        1: since_day - HOUR_MS,        # the day before: outside the window
+        2: since_day + HOUR_MS,        # start day, before the window start
+        3: window_start + HOUR_MS,     # start day, inside the window
+        4: to_ms(now) - HOUR_MS,       # today
+    }
+    memory_db.executemany(
+        'INSERT INTO bets (user_id, match_id, team, amount, placed_at) VALUES (?, ?, ?, 0.1, ?)',
+        [(user_id, str(7800000000 + user_id), 'team1', placed_at) for user_id, placed_at in placed.items()]
+    )
+    rebuild_user_stats(memory_db)
+
+    rows = weekly_summaries(memory_db, since_day)
+    assert sorted(row['user_id'] for row in rows) == [2, 3, 4]
+    assert all(row['total_bets'] == 1 for row in rows)
@@ -0,0 +1,51 @@
+import threading
+from database.connection import get_db_connection
+from database.write_queue import WriteQueue
+
+
+def _count_rows():
+    with get_db_connection(readonly=True) as conn:
+        return conn.execute('SELECT COUNT(*) FROM gsi_connections').fetchone()[0]
+
+
+def test_rows_are_group_committed(database):
+    queue = WriteQueue(flush_interval_ms=60000, max_rows=1000)
+    for i in range(50):
+        queue.enqueue('INSERT INTO gsi_connections (user_id, timestamp) VALUES (?, ?)', (1, i))
+
+    assert queue.flush().result(timeout=5) == 50
+    assert queue.batches_written == 1
+    assert _count_rows() == 50
+    queue.stop()
+
+
+def test_flush_waits_for_batch_already_being_written(database):
+    queue = WriteQueue(flush_interval_ms=10, max_rows=1000)
+    batch_taken = threading.Event()
+    release = threading.Event()
+    write_batch = queue._write_batch
+
+    def slow_write_batch(batch):
+        batch_taken.set()
+        release.wait(5)
+        write_batch(batch)
+
+    queue._write_batch = slow_write_batch
+    queue.enqueue('INSERT INTO gsi_connections (user_id, timestamp) VALUES (?, ?)', (1, 1))
+    assert batch_taken.wait(5)
+
+    # Nothing is pending any more, but the row is not committed yet
+    future = queue.flush()
+    assert not future.done()
+
+    release.set()
+    future.result(timeout=5)
+    assert _count_rows() == 1
+    queue.stop()
+
+
+def test_stop_writes_remaining_rows(database):
+    queue = WriteQueue(flush_interval_ms=60000, max_rows=1000)
+    queue.enqueue('INSERT INTO gsi_connections (user_id, timestamp) VALUES (?, ?)', (1, 1))
+    queue.stop()
+    assert _count_rows() == 1
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from config import DM_FANOUT_CONCURRENCY, DM_FANOUT_PER_SECOND, DM_MAX_ATTEMPTS
+from api.scheduler import ApiScheduler
+from database.async_db import db
+from database.write_queue import write_queue
+from utils.timestamps import now_ms
+
+logger = logging.getLogger('goodgains_bot')
+
+# Bulk DMs get their own token bucket, separate from the Steam API one
+dm_scheduler = ApiScheduler(rate=DM_FANOUT_PER_SECOND)
+
+# Pause between delivery passes, so transient Discord errors have a chance to clear
+RETRY_DELAY_SECONDS = 60
+
+
+def estimate_fanout_seconds(message_count, rate=DM_FANOUT_PER_SECOND):
+    """Expected time to deliver message_count DMs at the fan-out rate."""
+    return message_count / rate if rate else 0.0
+
+
+async def queue_direct_messages(job, messages):
+    """Store [(user_id, message)] in the outbox under job; returns False if the job was already queued."""
+    def insert(conn):
+        if conn.execute('SELECT 1 FROM dm_outbox WHERE job = ? LIMIT 1', (job,)).fetchone():
+            return False
+        queued_at = now_ms()
+        conn.executemany(
+            'INSERT INTO dm_outbox (job, user_id, message, queued_at) VALUES (?, ?, ?, ?)',
+            [(job, user_id, message, queued_at) for user_id, message in messages]
+        )
+        return True
+
+    return await db.run(insert)
+
+
+async def deliver_pending_messages(bot, retry_delay=RETRY_DELAY_SECONDS):
+    """Send every unsent outbox message, at most DM_FANOUT_CONCURRENCY at a time and
+    DM_FANOUT_PER_SECOND per second; returns how many were delivered.
+
+    A message is marked sent only once Discord accepts it, so a run cut short by a crash
+    picks up where it stopped. Failed messages are retried in later passes until they have
+    had DM_MAX_ATTEMPTS attempts, then left in the outbox unsent.
+    """
+    semaphore = asyncio.Semaphore(DM_FANOUT_CONCURRENCY)
+
+    async def deliver(row):
+        async with semaphore:
+            await dm_scheduler.acquire('discord')
+            delivered = await bot.send_direct_message(row['user_id'], row['message'])
+            write_queue.enqueue(
+                'UPDATE dm_outbox SET attempts = attempts + 1, sent_at = ? WHERE job = ? AND user_id = ?',
+                (now_ms() if delivered else None, row['job'], row['user_id'])
+            )
+            return delivered
+
+    sent = 0
+    for attempt in range(DM_MAX_ATTEMPTS):
+        pending = await db.fetchall(
+            '''SELECT job, user_id, message FROM dm_outbox
+            WHERE sent_at IS NULL AND attempts < ?
+            ORDER BY queued_at, user_id''',
+            (DM_MAX_ATTEMPTS,)
+        )
+        if not pending:
+            break
+
+        if attempt:
+            await asyncio.sleep(retry_delay)
+        logger.info(f"Delivering {len(pending)} queued DMs (about {estimate_fanout_seconds(len(pending)):.0f}s)")
+
+        results = await asyncio.gather(*(deliver(row) for row in pending))
+        sent += sum(results)
+        # The next pass reads the attempt counts back
+        await write_queue.flush_async()
+
+        if all(results):
+            break
+        logger.warning(f"{results.count(False)} of {len(pending)} DMs failed")
+
+    return sent
@@ -0,0 +1,26 @@
+import time
+from datetime import datetime
+
+# Every stored timestamp is an integer count of milliseconds since the Unix epoch (UTC)
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+
+def now_ms():
+    """Return the current time in epoch milliseconds."""
+    return int(time.time() * 1000)
+
+
+def to_ms(dt):
+    """Convert a datetime (naive values are local time) to epoch milliseconds."""
+    return int(dt.timestamp() * 1000)
+
+
+def from_ms(ms):
+    """Convert epoch milliseconds to a naive local datetime."""
+    return datetime.fromtimestamp(ms / 1000)
+
+
+def floor_ms(ms, bucket_ms):
+    """Round epoch milliseconds down to the start of their hour/day bucket (UTC)."""
+    return ms - ms % bucket_ms
@@ -3,7 +3,7 @@ import logging
 import asyncio
 from datetime import datetime
 from config import WALLETCONNECT_PROJECT_ID
-from database.connection import get_db_connection
+from database.async_db import db
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -31,12 +31,10 @@ async def create_wallet_session(user_id):
 
     try:
         # Save pending session to database
-        with get_db_connection() as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO wallet_sessions (user_id, session_id, connected) VALUES (?, ?, FALSE)',
-                (user_id, session_id)
-            )
-            conn.commit()
+        await db.execute(
+            'INSERT OR REPLACE INTO wallet_sessions (user_id, session_id, connected) VALUES (?, ?, FALSE)',
+            (user_id, session_id)
+        )
 
         return {
             "uri": wc_uri,
@@ -54,26 +52,23 @@ async def wait_for_wallet_connection(user_id, session_id, timeout=60):
 
     while (datetime.now() - start_time).total_seconds() < timeout:
         # Check connection status
-        with get_db_connection() as conn:
-            status = conn.execute(
-                'SELECT connected, wallet_address FROM wallet_sessions WHERE user_id = ? AND session_id = ?',
-                (user_id, session_id)
-            ).fetchone()
+        status = await db.fetchone(
+            'SELECT connected, wallet_address FROM wallet_sessions WHERE user_id = ? AND session_id = ?',
+            (user_id, session_id)
+        )
 
-            if status and status['connected']:
-                connected = True
-                wallet_address = status['wallet_address']
-                break
+        if status and status['connected']:
+            connected = True
+            wallet_address = status['wallet_address']
+            break
 
         await asyncio.sleep(2)  # Check every 2 seconds
 
     return connected, wallet_address
 
-def cleanup_failed_sessions(user_id):
+async def cleanup_failed_sessions(user_id):
     """Clean up failed wallet connection sessions."""
-    with get_db_connection() as conn:
-        conn.execute(
-            'DELETE FROM wallet_sessions WHERE user_id = ? AND connected = FALSE',
-            (user_id,)
-        )
-        conn.commit()
\ No newline at end of file
+    await db.execute(
+        'DELETE FROM wallet_sessions WHERE user_id = ? AND connected = FALSE',
+        (user_id,)
+    )
\ No newline at end of file
@@ -2,9 +2,11 @@ from flask import Flask, request, jsonify
 import logging
 import asyncio
 import json
-from datetime import datetime
 from database.connection import get_db_connection
-from gsi.handlers import process_dota2_gsi_data
+from database.write_queue import write_queue
+from utils.timestamps import now_ms
+from gsi.handlers import process_dota2_gsi_data, is_draft_packet, draft_recorded
+from gsi.heartbeat import gsi_heartbeats
 
 logger = logging.getLogger('goodgains_bot')
 
@@ -49,7 +51,7 @@ def wallet_connect_webhook():
             # Update session with wallet address
             conn.execute(
                 'UPDATE wallet_sessions SET wallet_address = ?, connected = TRUE, last_active = ? WHERE session_id = ?',
-                (wallet_address, datetime.now().isoformat(), topic)
+                (wallet_address, now_ms(), topic)
             )
             conn.commit()
             logger.info(f"User {user_id} connected wallet {wallet_address}")
@@ -64,11 +66,12 @@ def wallet_connect_webhook():
 def dota2_gsi_endpoint():
     """Handle Dota 2 Game State Integration data."""
     try:
-        logger.info(f"Received GSI data: {request.headers}")
-        logger.info(f"Request data sample: {str(request.data)[:100]}")
+        logger.debug(f"Received GSI data: {request.headers}")
+        logger.debug(f"Request data sample: {str(request.data)[:100]}")
 
         data = request.get_json()
         user_id = None
+        changed = False
 
         # Extract auth token to identify the user
         if 'auth' in data and 'token' in data['auth']:
@@ -79,18 +82,26 @@ def dota2_gsi_endpoint():
                 try:
                     user_id = int(auth_token[7:])  # Remove 'discord' prefix
 
-                    # Log the GSI connection
-                    with get_db_connection() as conn:
-                        conn.execute(
-                            'INSERT INTO gsi_connections (user_id, timestamp) VALUES (?, ?)',
-                            (user_id, datetime.now().isoformat())
-                        )
-                        conn.commit()
+                    # Mark the user's client as live so match polling can leave them to GSI
+                    game_map = data.get('map', {})
+                    changed = gsi_heartbeats.beat(user_id, game_map.get('matchid'), game_map.get('game_state'))
+
+                    # Log the GSI connection (group-committed with other high-frequency writes)
+                    write_queue.enqueue(
+                        'INSERT OR IGNORE INTO gsi_connections (user_id, timestamp) VALUES (?, ?)',
+                        (user_id, now_ms())
+                    )
                 except Exception as e:
                     logger.error(f"Error processing GSI auth token: {e}")
 
-        # Process the GSI data
-        process_dota2_gsi_data(data, user_id, bot)
+        # Process the GSI data on the bot's event loop (this handler runs on the Flask thread).
+        # Clients send several packets a second; only a new match or game state, or the first
+        # draft packet of a match, can change anything there.
+        discord_bot = app.config.get('bot')
+        if user_id is not None and discord_bot is not None and discord_bot.is_ready():
+            match_id = data.get('map', {}).get('matchid')
+            if changed or (is_draft_packet(data) and not draft_recorded(discord_bot, user_id, match_id)):
+                asyncio.run_coroutine_threadsafe(process_dota2_gsi_data(data, user_id, discord_bot), discord_bot.loop)
 
         return jsonify({"status": "success"}), 200
     except Exception as e: